@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Tuple
+
+try:
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.adk.events import Event
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types as genai_types
+except ImportError:  # pragma: no cover - optional dependency
+    Event = None  # type: ignore[assignment]
+    RunConfig = StreamingMode = None  # type: ignore[assignment]
+    InMemoryRunner = None  # type: ignore[assignment]
+    genai_types = None  # type: ignore[assignment]
+
+# ADK sessions kept in memory; the least recently used are dropped (and rebuilt from ChatSession if resumed).
+MAX_AGENT_SESSIONS = int(os.getenv("CHATBOT_MAX_AGENT_SESSIONS", "512"))
+
+SessionKey = Tuple[str, str]
+
+
+class AgentRuntime:
+    """A long-lived runner for the root agent with ADK sessions keyed by our chat ``sessionId``.
+
+    The runner and its session service are created once per process, so a
+    query only pays for the agent run itself. Each ``ChatSession`` maps to
+    one ADK session that accumulates the conversation; turns the agent has
+    not seen (a session restored from storage after a restart, or answers
+    served from the answer cache) are replayed into it before the next run.
+    """
+
+    def __init__(self, agent: Any, *, max_sessions: int = MAX_AGENT_SESSIONS):
+        if InMemoryRunner is None or genai_types is None:
+            raise RuntimeError("google-adk runtime is not available")
+        self.agent = agent
+        self.runner = InMemoryRunner(agent=agent)
+        self.max_sessions = max_sessions
+        # Number of ChatSession messages already present in each ADK session, in LRU order.
+        self._synced: "OrderedDict[SessionKey, int]" = OrderedDict()
+        self._locks: Dict[SessionKey, asyncio.Lock] = {}
+
+    @staticmethod
+    def session_key(chat_session: Any) -> SessionKey:
+        return f"{chat_session.user_id}:{chat_session.dataset_id}", chat_session.session_id
+
+    def _history_event(self, role: str, text: str) -> Any:
+        is_user = role == "user"
+        return Event(
+            invocation_id=f"history-{uuid.uuid4()}",
+            author="user" if is_user else self.agent.name,
+            content=genai_types.Content(
+                role="user" if is_user else "model",
+                parts=[genai_types.Part(text=text)],
+            ),
+        )
+
+    async def _prepare(self, key: SessionKey, chat_session: Any) -> None:
+        user_id, session_id = key
+        service = self.runner.session_service
+        adk_session = await service.get_session(
+            app_name=self.runner.app_name, user_id=user_id, session_id=session_id
+        )
+        if adk_session is None:
+            adk_session = await service.create_session(
+                app_name=self.runner.app_name, user_id=user_id, session_id=session_id
+            )
+            self._synced[key] = 0
+
+        # The last message is the question being asked now; it is sent as new_message.
+        for message in chat_session.messages[self._synced.get(key, 0):-1]:
+            await service.append_event(adk_session, self._history_event(message.role, message.text))
+        self._synced[key] = len(chat_session.messages)
+        self._synced.move_to_end(key)
+        await self._evict()
+
+    async def _evict(self) -> None:
+        """Drop least recently used sessions (and their locks) beyond ``max_sessions``.
+
+        Sessions with a run in progress (their lock is held) are skipped and
+        left for a later eviction, so the cache may briefly exceed its bound.
+        """
+
+        for key in list(self._synced):
+            if len(self._synced) <= self.max_sessions:
+                break
+            lock = self._locks.get(key)
+            if lock is not None and lock.locked():
+                continue
+            del self._synced[key]
+            self._locks.pop(key, None)
+            user_id, session_id = key
+            await self.runner.session_service.delete_session(
+                app_name=self.runner.app_name, user_id=user_id, session_id=session_id
+            )
+
+    async def events(self, chat_session: Any, question: str, *, streaming: bool = False) -> AsyncIterator[Any]:
+        """Run the agent for ``question`` in the chat's ADK session, yielding ADK events.
+
+        With ``streaming`` the model output arrives as partial text events as well.
+        """
+
+        key = self.session_key(chat_session)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                await self._prepare(key, chat_session)
+                new_message = genai_types.Content(role="user", parts=[genai_types.Part(text=question)])
+                run_kwargs = {}
+                if streaming and RunConfig is not None:
+                    run_kwargs["run_config"] = RunConfig(streaming_mode=StreamingMode.SSE)
+                async for event in self.runner.run_async(
+                    user_id=key[0],
+                    session_id=key[1],
+                    new_message=new_message,
+                    **run_kwargs,
+                ):
+                    yield event
+                # The run recorded the answer itself; skip it when the caller appends it to the ChatSession.
+                if key in self._synced:
+                    self._synced[key] = len(chat_session.messages) + 1
+        finally:
+            # A key without a session (its _prepare failed) must not keep its lock entry forever.
+            if key not in self._synced and not lock.locked() and self._locks.get(key) is lock:
+                del self._locks[key]
+
+    async def close(self) -> None:
+        close = getattr(self.runner, "close", None)
+        if close is not None:
+            await close()
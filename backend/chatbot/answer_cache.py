@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Cosine similarity above which a new question reuses a cached answer; > 1 disables the semantic lookup.
+ANSWER_CACHE_SIMILARITY = float(os.getenv("CHATBOT_ANSWER_CACHE_SIMILARITY", "0.95"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("CHATBOT_ANSWER_CACHE_MAX_ENTRIES", "256"))
+ANSWER_CACHE_MAX_DATASETS = int(os.getenv("CHATBOT_ANSWER_CACHE_MAX_DATASETS", "64"))
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.casefold().split())
+
+
+def question_key(question: str) -> str:
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class CachedAnswer:
+    question: str
+    answer: str
+    created_at: datetime = field(default_factory=lambda: datetime.utcnow())
+    hits: int = 0
+
+
+class DatasetAnswerCache:
+    """Answers for one dataset, valid for a single version of its report."""
+
+    def __init__(self, report_digest: str, max_entries: int):
+        self.report_digest = report_digest
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        # Row i of _vectors is the normalised question embedding of _vector_keys[i].
+        self._vector_keys: List[str] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def get_exact(self, question: str) -> Optional[CachedAnswer]:
+        key = question_key(question)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def get_similar(self, vector: Sequence[float], threshold: float) -> Optional[Tuple[CachedAnswer, float]]:
+        query = _normalised(vector)
+        if query is None or not self._vector_keys or query.shape[0] != self._vectors.shape[1]:
+            return None
+        scores = self._vectors @ query
+        best = int(np.argmax(scores))
+        if float(scores[best]) < threshold:
+            return None
+        key = self._vector_keys[best]
+        self._entries.move_to_end(key)
+        return self._entries[key], float(scores[best])
+
+    def put(self, question: str, answer: str, vector: Optional[Sequence[float]]) -> None:
+        key = question_key(question)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CachedAnswer(question=question, answer=answer)
+        normalised = _normalised(vector)
+        if normalised is not None:
+            if not self._vector_keys:
+                self._vectors = normalised[np.newaxis, :]
+                self._vector_keys = [key]
+            elif normalised.shape[0] == self._vectors.shape[1]:
+                self._vectors = np.vstack([self._vectors, normalised])
+                self._vector_keys.append(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if key in self._vector_keys:
+            row = self._vector_keys.index(key)
+            self._vector_keys.pop(row)
+            self._vectors = np.delete(self._vectors, row, axis=0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _normalised(vector: Optional[Sequence[float]]) -> Optional[np.ndarray]:
+    if vector is None or len(vector) == 0:
+        return None
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    if norm == 0:
+        return None
+    return array / norm
+
+
+_datasets: "OrderedDict[Tuple[str, str], DatasetAnswerCache]" = OrderedDict()
+_lock = threading.Lock()
+_stats: Dict[str, int] = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+
+def _dataset_cache(user_id: str, dataset_id: str, report_digest: str) -> DatasetAnswerCache:
+    key = (user_id, dataset_id)
+    cache = _datasets.get(key)
+    if cache is None or cache.report_digest != report_digest:
+        # First question for this dataset, or its report changed: start empty.
+        cache = DatasetAnswerCache(report_digest, ANSWER_CACHE_MAX_ENTRIES)
+        _datasets[key] = cache
+    _datasets.move_to_end(key)
+    while len(_datasets) > ANSWER_CACHE_MAX_DATASETS:
+        _datasets.popitem(last=False)
+    return cache
+
+
+def lookup_exact_answer(user_id: str, dataset_id: str, report_digest: str, question: str) -> Optional[CachedAnswer]:
+    with _lock:
+        entry = _dataset_cache(user_id, dataset_id, report_digest).get_exact(question)
+        if entry is not None:
+            entry.hits += 1
+            _stats["exact_hits"] += 1
+        return entry
+
+
+def lookup_similar_answer(
+    user_id: str,
+    dataset_id: str,
+    report_digest: str,
+    vector: Optional[Sequence[float]],
+) -> Optional[Tuple[CachedAnswer, float]]:
+    if ANSWER_CACHE_SIMILARITY > 1 or not vector:
+        with _lock:
+            _stats["misses"] += 1
+        return None
+    with _lock:
+        match = _dataset_cache(user_id, dataset_id, report_digest).get_similar(vector, ANSWER_CACHE_SIMILARITY)
+        if match is None:
+            _stats["misses"] += 1
+        else:
+            match[0].hits += 1
+            _stats["semantic_hits"] += 1
+        return match
+
+
+def store_answer(
+    user_id: str,
+    dataset_id: str,
+    report_digest: str,
+    question: str,
+    answer: str,
+    vector: Optional[Sequence[float]] = None,
+) -> None:
+    if not answer:
+        return
+    with _lock:
+        _dataset_cache(user_id, dataset_id, report_digest).put(question, answer, vector)
+
+
+def invalidate_answers(user_id: str, dataset_id: str) -> None:
+    with _lock:
+        _datasets.pop((user_id, dataset_id), None)
+
+
+def answer_cache_stats() -> dict:
+    with _lock:
+        return {
+            **_stats,
+            "datasets": len(_datasets),
+            "entries": sum(len(cache) for cache in _datasets.values()),
+            "similarity_threshold": ANSWER_CACHE_SIMILARITY,
+        }
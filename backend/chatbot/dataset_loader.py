@@ -1,8 +1,13 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import hashlib
 import json
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
@@ -11,15 +16,32 @@ from urllib.parse import urlparse
 
 import httpx
 
+from chatbot.http_clients import get_artefacts_sync_client
+
 CACHE_ROOT = Path(__file__).resolve().parent / "_cache"
 CACHE_ROOT.mkdir(parents=True, exist_ok=True)
 
+ARTEFACTS_CACHE_MAX_BYTES = int(os.getenv("DATASET_ARTEFACTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Start downloading the event log in the background as soon as a dataset is loaded.
+PREFETCH_LOG = os.getenv("DATASET_PREFETCH_LOG", "1").lower() not in {"0", "false", "no"}
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+# Bodies at least this large are fetched as DOWNLOAD_SEGMENTS parallel ranges (when the server allows it).
+PARALLEL_DOWNLOAD_MIN_BYTES = int(os.getenv("DATASET_PARALLEL_DOWNLOAD_MIN_BYTES", str(64 * 1024 * 1024)))
+DOWNLOAD_SEGMENTS = int(os.getenv("DATASET_DOWNLOAD_SEGMENTS", "4"))
+_download_locks: Dict[str, threading.Lock] = {}
+_download_locks_guard = threading.Lock()
+# Optional per-file version fields; any change invalidates the cached artefacts.
+_VERSION_KEYS = ("version", "generation", "updatedAt", "etag", "md5Hash", "sha256", "size")
+
 
 @dataclass(slots=True)
 class DatasetFile:
     type: str
     name: str
     url: str
+    md5_hash: Optional[str] = None
+    sha256: Optional[str] = None
+    size: Optional[int] = None
 
     @property
     def basename(self) -> str:
@@ -39,6 +61,15 @@ class DatasetArtefacts:
     chat_logs_folder: str
     local_dir: Path
     loaded_at: datetime = field(default_factory=lambda: datetime.utcnow())
+    approx_bytes: int = 0
+    # sha256 of report.json; answers cached for this dataset are only valid for this version.
+    report_digest: str = ""
+    # Full-log worker tool results (analytics.json); empty for datasets processed before it existed.
+    analytics: dict = field(default_factory=dict, repr=False)
+    # Waiting-time / case-duration percentile sketches (sketches.json); empty when absent.
+    sketches: dict = field(default_factory=dict, repr=False)
+    # Files already fetched or revalidated for this load; others are fetched on first use.
+    verified_files: set = field(default_factory=set, repr=False)
 
     def ensure_local_file(self, identifier: str, *, file_type: Optional[str] = None) -> Path:
         """Return path to cached file by name or type, downloading if necessary."""
@@ -55,11 +86,35 @@ class DatasetArtefacts:
             raise FileNotFoundError(f"Dataset file not found: {identifier}")
 
         target_path = self.local_dir / file_info.basename
-        if not target_path.exists():
-            target_path.parent.mkdir(parents=True, exist_ok=True)
-            _download_file_sync(file_info.url, target_path)
+        if file_info.type.startswith("generated:"):
+            return target_path
+        # Single-flight: concurrent callers (tools, the background prefetch) wait on
+        # the same per-path lock; the first one revalidates or fetches the file.
+        with _path_lock(target_path):
+            if file_info.basename not in self.verified_files:
+                _download_locked(file_info.url, target_path, file_info)
+                self.verified_files.add(file_info.basename)
         return target_path
 
+    @property
+    def log_file(self) -> Optional[DatasetFile]:
+        return self.files_by_type.get("log_cleaned") or self.files_by_type.get("log_raw")
+
+    def prefetch_log(self) -> None:
+        """Start fetching the event log in a background thread."""
+
+        log_file = self.log_file
+        if log_file is None:
+            return
+
+        def run() -> None:
+            try:
+                self.ensure_local_file(log_file.name, file_type=log_file.type)
+            except Exception as exc:  # noqa: BLE001 - the next ensure_local_file retries
+                print(f"[!] Prefetch of {log_file.name} failed: {exc}")
+
+        threading.Thread(target=run, name=f"prefetch-{self.dataset_id}", daemon=True).start()
+
     def register_local_file(self, path: Path) -> Path:
         """Record a newly generated local file so subsequent calls can resolve it."""
 
@@ -101,22 +156,262 @@ def _parse_gcs_url(url: str) -> Tuple[str, str]:
     return segments[0], segments[1]
 
 
-def _download_file_sync(url: str, target_path: Path) -> None:
-    """Blocking helper used in threads to fetch remote artefacts."""
+def _meta_path(target_path: Path) -> Path:
+    return target_path.with_name(target_path.name + ".meta.json")
+
+
+def _read_cache_meta(target_path: Path) -> Optional[dict]:
+    """Return validator metadata of a cached file, or None if the copy can't be trusted."""
 
+    meta_path = _meta_path(target_path)
+    if not target_path.exists() or not meta_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if meta.get("size") != target_path.stat().st_size:
+        return None
+    return meta
+
+
+def _write_cache_meta(target_path: Path, meta: dict) -> None:
+    meta_path = _meta_path(target_path)
+    tmp_path = meta_path.with_name(meta_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp_path, meta_path)
+
+
+def _digest_matches(meta: dict, file_info: Optional[DatasetFile]) -> bool:
+    if file_info is None:
+        return False
+    if file_info.sha256 and meta.get("sha256"):
+        return file_info.sha256.lower() == meta["sha256"]
+    if file_info.md5_hash and meta.get("md5"):
+        return file_info.md5_hash == meta["md5"]
+    return False
+
+
+def _part_paths(target_path: Path) -> Tuple[Path, Path]:
+    part_path = target_path.with_name(target_path.name + ".part")
+    return part_path, part_path.with_name(part_path.name + ".meta.json")
+
+
+def _path_lock(target_path: Path) -> threading.Lock:
+    key = str(target_path)
+    with _download_locks_guard:
+        lock = _download_locks.get(key)
+        if lock is None:
+            lock = _download_locks[key] = threading.Lock()
+        return lock
+
+
+def _file_digests(path: Path) -> Tuple[str, str]:
+    """Return (base64 md5, hex sha256) of ``path``, read in chunks."""
+
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(DOWNLOAD_CHUNK_BYTES), b""):
+            md5.update(chunk)
+            sha256.update(chunk)
+    return base64.b64encode(md5.digest()).decode("ascii"), sha256.hexdigest()
+
+
+def _discard_part(part_path: Path, part_meta_path: Path) -> None:
+    part_path.unlink(missing_ok=True)
+    part_meta_path.unlink(missing_ok=True)
+
+
+def _read_part_meta(part_path: Path, part_meta_path: Path, url: str) -> Optional[dict]:
+    """Return the validator a partial download was started with, if it can be resumed."""
+
+    if not part_path.exists() or not part_meta_path.exists():
+        return None
+    try:
+        part_meta = json.loads(part_meta_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    # Segmented downloads preallocate the file, so its size says nothing about progress.
+    if part_meta.get("url") != url or part_meta.get("segmented"):
+        return None
+    if not (part_meta.get("etag") or part_meta.get("last_modified")):
+        return None
+    return part_meta
+
+
+def _supports_segments(response: httpx.Response) -> Optional[int]:
+    """Return the body size if ``response`` is large enough to fetch as parallel ranges."""
+
+    if DOWNLOAD_SEGMENTS < 2 or response.status_code != 200:
+        return None
+    if response.headers.get("accept-ranges", "").lower() != "bytes":
+        return None
+    if response.headers.get("content-encoding"):
+        return None
+    try:
+        size = int(response.headers.get("content-length", ""))
+    except ValueError:
+        return None
+    return size if size >= PARALLEL_DOWNLOAD_MIN_BYTES else None
+
+
+def _download_segments(client: httpx.Client, url: str, part_path: Path, size: int, validator: Optional[str]) -> None:
+    """Fetch ``url`` as DOWNLOAD_SEGMENTS concurrent byte ranges written in place into ``part_path``."""
+
+    with part_path.open("wb") as handle:
+        handle.truncate(size)
+
+    segment_size = -(-size // DOWNLOAD_SEGMENTS)
+    ranges = [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+
+    def fetch(byte_range: Tuple[int, int]) -> None:
+        first, last = byte_range
+        headers = {"Range": f"bytes={first}-{last}"}
+        if validator:
+            headers["If-Range"] = validator
+        written = 0
+        with client.stream("GET", url, headers=headers) as response:
+            if response.status_code != 206:
+                raise RuntimeError(f"Ranged request for {url} returned HTTP {response.status_code}")
+            with part_path.open("r+b") as handle:
+                handle.seek(first)
+                for chunk in response.iter_bytes(DOWNLOAD_CHUNK_BYTES):
+                    handle.write(chunk)
+                    written += len(chunk)
+        if written != last - first + 1:
+            raise RuntimeError(f"Incomplete segment {first}-{last} for {url}")
+
+    with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+        list(pool.map(fetch, ranges))
+
+
+def _download_file_sync(url: str, target_path: Path, *, file_info: Optional[DatasetFile] = None) -> bool:
+    """Blocking helper used in threads to fetch remote artefacts.
+
+    Revalidates an existing cached copy instead of re-downloading it: the
+    transfer is skipped when the payload digest matches the cached one, or
+    when the server answers a conditional request (ETag / Last-Modified
+    stored in ``<file>.meta.json``) with 304. Returns True if the body was
+    transferred.
+
+    Bodies are streamed into ``<file>.part`` and only renamed onto
+    ``target_path`` once complete and verified against the payload digest,
+    so a file in the cache is never partial. An interrupted transfer is
+    resumed with a Range request guarded by If-Range; large bodies from
+    servers that accept ranges are fetched as parallel segments.
+    """
+
+    with _path_lock(target_path):
+        return _download_locked(url, target_path, file_info)
+
+
+def _download_locked(url: str, target_path: Path, file_info: Optional[DatasetFile]) -> bool:
     target_path.parent.mkdir(parents=True, exist_ok=True)
+    meta = _read_cache_meta(target_path)
+    if meta is not None and _digest_matches(meta, file_info):
+        return False
+
+    headers: Dict[str, str] = {}
+    if meta is not None and meta.get("url") == url:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    part_path, part_meta_path = _part_paths(target_path)
+    part_meta = _read_part_meta(part_path, part_meta_path, url)
+    offset = part_path.stat().st_size if part_meta is not None else 0
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = part_meta.get("etag") or part_meta["last_modified"]
+
+    client = get_artefacts_sync_client()
+    segmented_size: Optional[int] = None
+    with client.stream("GET", url, headers=headers) as response:
+        status = response.status_code
+        if status == 304 and meta is not None:
+            _discard_part(part_path, part_meta_path)
+            return False
+        if status != 416:
+            response.raise_for_status()
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+            if status != 206:
+                # Fresh body (or the server ignored the Range): start the part file over.
+                offset = 0
+                segmented_size = _supports_segments(response)
+                _write_cache_meta(
+                    part_path,
+                    {"url": url, "etag": etag, "last_modified": last_modified, "segmented": segmented_size is not None},
+                )
+            if segmented_size is None:
+                with part_path.open("ab" if offset else "wb") as handle:
+                    for chunk in response.iter_bytes(DOWNLOAD_CHUNK_BYTES):
+                        handle.write(chunk)
+
+    if status == 416:
+        # The partial copy no longer lines up with the remote object.
+        _discard_part(part_path, part_meta_path)
+        return _download_locked(url, target_path, file_info)
+
+    if segmented_size is not None:
+        try:
+            _download_segments(client, url, part_path, segmented_size, etag or last_modified)
+        except Exception:
+            _discard_part(part_path, part_meta_path)
+            raise
+
+    md5, sha256 = _file_digests(part_path)
+    size = part_path.stat().st_size
+    expected_size = file_info.size if file_info is not None else None
+    if (
+        (file_info is not None and file_info.sha256 and file_info.sha256.lower() != sha256)
+        or (file_info is not None and not file_info.sha256 and file_info.md5_hash and file_info.md5_hash != md5)
+        or (expected_size is not None and expected_size != size)
+    ):
+        _discard_part(part_path, part_meta_path)
+        raise ValueError(f"Integrity check failed for {url}")
+
+    os.replace(part_path, target_path)
+    part_meta_path.unlink(missing_ok=True)
+    _write_cache_meta(
+        target_path,
+        {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": size,
+            "md5": md5,
+            "sha256": sha256,
+        },
+    )
+    return True
+
+
+def _load_json_artefact(file_info: DatasetFile, target_path: Path) -> Tuple[dict, int, str]:
+    _download_file_sync(file_info.url, target_path, file_info=file_info)
+    raw = target_path.read_bytes()
+    return json.loads(raw), len(raw), hashlib.sha256(raw).hexdigest()
 
-    with httpx.Client(timeout=120.0) as client:
-        response = client.get(url)
-        response.raise_for_status()
-        target_path.write_bytes(response.content)
 
+async def _download_json(file_info: DatasetFile, target_path: Path) -> Tuple[dict, int, str]:
+    """Fetch a JSON artefact into the local cache; returns the parsed body, its size in bytes and sha256."""
 
-async def _download_json(url: str) -> dict:
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        return response.json()
+    return await asyncio.to_thread(_load_json_artefact, file_info, target_path)
+
+
+async def _download_optional_json(file_info: Optional[DatasetFile], target_path: Path) -> Tuple[dict, int]:
+    """Like _download_json, for artefacts the tools can do without (older datasets lack them)."""
+
+    if file_info is None:
+        return {}, 0
+    try:
+        data, size, _ = await _download_json(file_info, target_path)
+    except Exception as exc:  # noqa: BLE001 - the tools fall back to computing from the log
+        print(f"[!] Could not load {file_info.name}: {exc}")
+        return {}, 0
+    return data, size
 
 
 def _materialize_files(files: Iterable[dict]) -> Tuple[Dict[str, DatasetFile], Dict[str, DatasetFile]]:
@@ -128,13 +423,107 @@ def _materialize_files(files: Iterable[dict]) -> Tuple[Dict[str, DatasetFile], D
         url = item.get("url")
         if not (file_type and name and url):
             continue
-        dataset_file = DatasetFile(type=file_type, name=name, url=url)
+        size = item.get("size")
+        dataset_file = DatasetFile(
+            type=file_type,
+            name=name,
+            url=url,
+            md5_hash=item.get("md5Hash") or item.get("md5"),
+            sha256=item.get("sha256"),
+            size=int(size) if size not in (None, "") else None,
+        )
         files_by_type[file_type] = dataset_file
         files_by_name[name] = dataset_file
         files_by_name[os.path.basename(name)] = dataset_file
     return files_by_type, files_by_name
 
 
+def _artefact_signature(folder: dict, files: Iterable[dict]) -> tuple:
+    """Identity of a dataset version: file URLs plus any version fields in the payload."""
+
+    entries = sorted(
+        (
+            str(item.get("type") or ""),
+            str(item.get("name") or ""),
+            str(item.get("url") or ""),
+            tuple(str(item.get(key, "")) for key in _VERSION_KEYS),
+        )
+        for item in files
+    )
+    return (str(folder.get("uploadedAt", "")), tuple(entries))
+
+
+class DatasetArtefactsCache:
+    """Memory-bounded LRU of loaded artefacts keyed by ``(user_id, dataset_id)``.
+
+    Entries are only returned when the signature of the current dataset payload
+    matches the one they were loaded with, so re-uploads and replaced files
+    are picked up on the next query.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[tuple, DatasetArtefacts]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str], signature: tuple) -> Optional[DatasetArtefacts]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple[str, str], signature: tuple, artefacts: DatasetArtefacts) -> None:
+        with self._lock:
+            self._pop(key)
+            if artefacts.approx_bytes > self.max_bytes:
+                return
+            self._entries[key] = (signature, artefacts)
+            self._total_bytes += artefacts.approx_bytes
+            while self._total_bytes > self.max_bytes and self._entries:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def _pop(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[1].approx_bytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_artefacts_cache = DatasetArtefactsCache(ARTEFACTS_CACHE_MAX_BYTES)
+# Per-dataset load lock and the number of requests holding or awaiting it; dropped when that reaches 0.
+_load_locks: Dict[Tuple[str, str], Tuple[asyncio.Lock, List[int]]] = {}
+
+
+def invalidate_dataset_artefacts(user_id: str, dataset_id: str) -> None:
+    """Drop cached artefacts for a dataset (e.g. after it was modified)."""
+
+    _artefacts_cache.invalidate((user_id, dataset_id))
+
+
+def artefacts_cache_stats() -> dict:
+    return _artefacts_cache.stats()
+
+
 def _determine_prefix(reference_url: str, suggested_folder: Optional[str]) -> Tuple[str, str, str]:
     bucket, path = _parse_gcs_url(reference_url)
     base_dir = path
@@ -155,11 +544,44 @@ async def load_dataset_artefacts(
     *,
     user_id: str,
 ) -> DatasetArtefacts:
+    """Return artefacts for the dataset, reusing the in-process cache when still valid."""
+
     folder = dataset_payload.get("folder") or dataset_payload
     files = folder.get("files", [])
     if not files:
         raise RuntimeError("Dataset payload does not include artefact files")
 
+    key = (user_id, dataset_id)
+    signature = _artefact_signature(folder, files)
+    cached = _artefacts_cache.get(key, signature)
+    if cached is not None:
+        return cached
+
+    lock, users = _load_locks.setdefault(key, (asyncio.Lock(), [0]))
+    users[0] += 1
+    try:
+        async with lock:
+            # Another request may have loaded the same dataset while we waited.
+            cached = _artefacts_cache.get(key, signature)
+            if cached is not None:
+                return cached
+            artefacts = await _load_dataset_artefacts(dataset_id, dataset_payload, folder, files, user_id=user_id)
+            _artefacts_cache.put(key, signature, artefacts)
+            return artefacts
+    finally:
+        users[0] -= 1
+        if not users[0]:
+            del _load_locks[key]
+
+
+async def _load_dataset_artefacts(
+    dataset_id: str,
+    dataset_payload: dict,
+    folder: dict,
+    files: List[dict],
+    *,
+    user_id: str,
+) -> DatasetArtefacts:
     files_by_type, files_by_name = _materialize_files(files)
 
     store_file = files_by_type.get("store")
@@ -168,11 +590,6 @@ async def load_dataset_artefacts(
     if store_file is None or report_file is None:
         raise RuntimeError("Dataset is missing store.json or report.json artefacts")
 
-    store_data, report_data = await asyncio.gather(
-        _download_json(store_file.url),
-        _download_json(report_file.url),
-    )
-
     suggested_chat_logs = None
     chat_logs_info = folder.get("chatLogs") or dataset_payload.get("chatLogs")
     if isinstance(chat_logs_info, dict):
@@ -183,15 +600,18 @@ async def load_dataset_artefacts(
     local_dir = CACHE_ROOT / user_id / dataset_id
     local_dir.mkdir(parents=True, exist_ok=True)
 
-    # Persist store/report locally for debugging purposes
-    (local_dir / "store.json").write_text(json.dumps(store_data, ensure_ascii=False, indent=2), encoding="utf-8")
-    (local_dir / "report.json").write_text(json.dumps(report_data, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    # Ensure cleaned log is cached if available
-    log_file = files_by_type.get("log_cleaned") or files_by_type.get("log_raw")
-    if log_file is not None:
-        await asyncio.to_thread(_download_file_sync, log_file.url, local_dir / os.path.basename(log_file.name))
+    # store.json / report.json are cached on disk and only re-fetched when they changed upstream
+    (store_data, store_bytes, _), (report_data, report_bytes, report_digest) = await asyncio.gather(
+        _download_json(store_file, local_dir / "store.json"),
+        _download_json(report_file, local_dir / "report.json"),
+    )
+    (analytics_data, analytics_bytes), (sketches_data, sketches_bytes) = await asyncio.gather(
+        _download_optional_json(files_by_type.get("analytics"), local_dir / "analytics.json"),
+        _download_optional_json(files_by_type.get("sketches"), local_dir / "sketches.json"),
+    )
 
+    # The event log is materialised lazily by ensure_local_file (worker tools);
+    # report-only questions never wait for it.
     artefacts = DatasetArtefacts(
         dataset_id=dataset_id,
         user_id=user_id,
@@ -203,6 +623,13 @@ async def load_dataset_artefacts(
         gcs_prefix=prefix,
         chat_logs_folder=chat_logs_folder,
         local_dir=local_dir,
+        # Parsed JSON takes several times its serialised size in memory.
+        approx_bytes=4 * (store_bytes + report_bytes + analytics_bytes + sketches_bytes),
+        report_digest=report_digest,
+        analytics=analytics_data,
+        sketches=sketches_data,
     )
+    if PREFETCH_LOG:
+        artefacts.prefetch_log()
 
     return artefacts
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    HTTP2_AVAILABLE = False
+
+USER_SERVICE = "user_service"
+ARTEFACTS = "artefacts"
+
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+_TIMEOUTS = {
+    USER_SERVICE: httpx.Timeout(60.0, connect=10.0),
+    ARTEFACTS: httpx.Timeout(120.0, connect=10.0),
+}
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+_STARTED_KEY = "minerranger_started_at"
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (time until response headers arrive)."""
+
+    def __init__(self, buckets_ms: List[float]):
+        self.buckets_ms = list(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        elapsed_ms = seconds * 1000.0
+        index = bisect.bisect_left(self.buckets_ms, elapsed_ms)
+        with self._lock:
+            self._counts[index] += 1
+            self._total_ms += elapsed_ms
+
+    def _quantile(self, counts: List[int], total: int, q: float) -> Optional[float]:
+        if total == 0:
+            return None
+        rank = q * total
+        running = 0
+        for index, count in enumerate(counts):
+            running += count
+            if running >= rank:
+                return self.buckets_ms[index] if index < len(self.buckets_ms) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total_ms = self._total_ms
+        total = sum(counts)
+        labels = [f"le_{bound}ms" for bound in self.buckets_ms] + ["le_inf"]
+        return {
+            "count": total,
+            "mean_ms": round(total_ms / total, 2) if total else None,
+            "p50_ms": self._quantile(counts, total, 0.50),
+            "p95_ms": self._quantile(counts, total, 0.95),
+            "p99_ms": self._quantile(counts, total, 0.99),
+            "buckets": dict(zip(labels, counts)),
+        }
+
+
+_histograms: Dict[str, LatencyHistogram] = {
+    USER_SERVICE: LatencyHistogram(_BUCKETS_MS),
+    ARTEFACTS: LatencyHistogram(_BUCKETS_MS),
+}
+
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_sync_client: Optional[httpx.Client] = None
+_sync_lock = threading.Lock()
+
+
+def _record(name: str, request: httpx.Request) -> None:
+    started = request.extensions.get(_STARTED_KEY)
+    if started is not None:
+        _histograms[name].observe(time.perf_counter() - started)
+
+
+def _async_hooks(name: str) -> dict:
+    async def on_request(request: httpx.Request) -> None:
+        request.extensions[_STARTED_KEY] = time.perf_counter()
+
+    async def on_response(response: httpx.Response) -> None:
+        _record(name, response.request)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def _sync_hooks(name: str) -> dict:
+    def on_request(request: httpx.Request) -> None:
+        request.extensions[_STARTED_KEY] = time.perf_counter()
+
+    def on_response(response: httpx.Response) -> None:
+        _record(name, response.request)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def get_async_client(name: str) -> httpx.AsyncClient:
+    """Return the shared async client for ``name`` (user_service / artefacts)."""
+
+    client = _async_clients.get(name)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=_LIMITS,
+            timeout=_TIMEOUTS[name],
+            event_hooks=_async_hooks(name),
+        )
+        _async_clients[name] = client
+    return client
+
+
+def get_artefacts_sync_client() -> httpx.Client:
+    """Return the shared blocking client used by artefact downloads in worker threads."""
+
+    global _sync_client
+    with _sync_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(
+                http2=HTTP2_AVAILABLE,
+                limits=_LIMITS,
+                timeout=_TIMEOUTS[ARTEFACTS],
+                event_hooks=_sync_hooks(ARTEFACTS),
+            )
+        return _sync_client
+
+
+def start_http_clients() -> None:
+    """Create the pooled clients eagerly (called on app startup)."""
+
+    get_async_client(USER_SERVICE)
+    get_async_client(ARTEFACTS)
+    get_artefacts_sync_client()
+
+
+async def close_http_clients() -> None:
+    """Close every pooled client (called on app shutdown)."""
+
+    global _sync_client
+    clients = list(_async_clients.values())
+    _async_clients.clear()
+    for client in clients:
+        await client.aclose()
+    with _sync_lock:
+        sync_client, _sync_client = _sync_client, None
+    if sync_client is not None:
+        sync_client.close()
+
+
+def latency_snapshot() -> dict:
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "latency": {name: histogram.snapshot() for name, histogram in _histograms.items()},
+    }
@@ -5,6 +5,8 @@ from .sub_agents.planner_agent import planner_agent
 from .sub_agents.worker_agent import worker_agent
 from .sub_agents.solver_agent import solver_agent
 
+from .blueprint import run_blueprint
+from .sub_agents.worker_agent.tool import get_result_page
 from .tool import semantic_search
 
 import os
@@ -24,26 +26,35 @@ root_agent = LlmAgent(
     1. **Luôn gọi tool `semantic_search` trước tiên**:
         - path = "./chatbot/root_agent/"
         - question = <truy vấn của user>
-        - top_k = 2
+        - top_k = 5
+        - Kết quả là danh sách đoạn trích (section / Q&A / đoạn văn) kèm `score`, đã sắp xếp theo độ tương đồng.
     2. Nếu `semantic_search` tìm thấy câu trả lời:
         - Trả về ngay lập tức cho user.
         - Dừng toàn bộ quy trình, KHÔNG gọi planner_agent, worker_agent hay solver_agent.
     3. Nếu `semantic_search` không có kết quả:
         - Gọi `planner_agent` để lập kế hoạch (blueprint) phân tích truy vấn.
-        - Thực hiện tuần tự từng bước trong blueprint bằng `worker_agent`.
-        - Thu thập kết quả, cùng với truy vấn gốc và blueprint, rồi gửi toàn bộ cho `solver_agent`.
+        - Gọi tool `run_blueprint` MỘT lần với:
+            - path = "./chatbot/root_agent/"
+            - blueprint = <nguyên văn JSON blueprint do planner_agent trả về>
+          Tool này tự thực thi mọi bước (các bước độc lập chạy song song) và trả về evidence của từng #E.
+        - Gửi truy vấn gốc, blueprint và toàn bộ evidence cho `solver_agent` trong MỘT lần gọi.
+        - Chỉ dùng `worker_agent` khi `run_blueprint` báo lỗi không đọc được blueprint.
         - Nhận câu trả lời cuối cùng từ `solver_agent` và trả về cho user.
+    4. Evidence dạng danh sách dài chỉ gồm các dòng đầu (`"truncated": true` kèm `"handle"`).
+       Chỉ khi user yêu cầu rõ danh sách đầy đủ mới gọi `get_result_page(handle, offset, limit)` để lấy thêm.
 
     Ghi nhớ:
     - `semantic_search` luôn được thực hiện đầu tiên.
     - Nếu có kết quả, KHÔNG được làm thêm bước nào khác.
-    - Chỉ khi không có kết quả, mới thực hiện pipeline planner → worker → solver.
+    - Chỉ khi không có kết quả, mới thực hiện pipeline planner → run_blueprint → solver.
     """,
     tools=[
         AgentTool(agent=planner_agent),
         AgentTool(agent=worker_agent),
         AgentTool(agent=solver_agent),
-        semantic_search
+        semantic_search,
+        run_blueprint,
+        get_result_page,
     ]
 )
 
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import inspect
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from chatbot.dataset_context import get_dataset_context
+from process.log_slices import parse_slice_name
+
+from .sub_agents.worker_agent.tool import (
+    basic_statistics,
+    conformance_checking,
+    dataset_dir,
+    duration_percentiles,
+    ensure_logs_path,
+    get_logs,
+    get_result_page,
+    performance_analysis,
+    process_discovery,
+    process_simulation,
+    variant_explorer,
+)
+from .sub_agents.worker_agent.sandbox import ToolCancelled, budget_exceeded, cancel_scope, is_cancelled, sandboxed
+
+BLUEPRINT_MAX_WORKERS = int(os.getenv("BLUEPRINT_MAX_WORKERS", "4"))
+# Evidence longer than this (serialised) is cut before it reaches the solver.
+EVIDENCE_MAX_CHARS = int(os.getenv("BLUEPRINT_EVIDENCE_MAX_CHARS", "20000"))
+
+WORKER_TOOLS: Dict[str, Callable[..., Any]] = {
+    "get_logs": get_logs,
+    "basic_statistics": sandboxed(basic_statistics),
+    "process_discovery": sandboxed(process_discovery),
+    "performance_analysis": sandboxed(performance_analysis),
+    "duration_percentiles": sandboxed(duration_percentiles),
+    "conformance_checking": sandboxed(conformance_checking),
+    "variant_explorer": sandboxed(variant_explorer),
+    "process_simulation": sandboxed(process_simulation),
+    "get_result_page": get_result_page,
+}
+
+_PLACEHOLDER_RE = re.compile(r"#E\d+")
+_LOG_PARAMS = {"logs_name", "filter_logs", "filter_logs_name"}
+_DEFAULT_LOG_INPUTS = {"", "event_log", "log", "logs", "event log"}
+
+
+@dataclass(slots=True)
+class BlueprintStep:
+    placeholder: str
+    plan: str
+    tool: str
+    tool_input: Any
+    depends_on: Set[str] = field(default_factory=set)
+
+
+def _placeholders_in(value: Any) -> Set[str]:
+    if isinstance(value, str):
+        return set(_PLACEHOLDER_RE.findall(value))
+    if isinstance(value, dict):
+        return set().union(*(_placeholders_in(v) for v in value.values())) if value else set()
+    if isinstance(value, (list, tuple)):
+        return set().union(*(_placeholders_in(v) for v in value)) if value else set()
+    return set()
+
+
+def parse_blueprint(blueprint: Any) -> List[BlueprintStep]:
+    """Parse the planner output (JSON list, optionally inside a ```json fence) into steps."""
+
+    if isinstance(blueprint, str):
+        text = blueprint.strip()
+        start, end = text.find("["), text.rfind("]")
+        if start == -1 or end <= start:
+            raise ValueError("Blueprint does not contain a JSON list of steps")
+        blueprint = json.loads(text[start:end + 1])
+    if not isinstance(blueprint, list):
+        raise ValueError("Blueprint must be a list of steps")
+
+    steps: List[BlueprintStep] = []
+    for index, item in enumerate(blueprint, start=1):
+        if not isinstance(item, dict):
+            raise ValueError(f"Blueprint step {index} is not an object")
+        evidence = item.get("evidence") or {}
+        if not isinstance(evidence, dict):
+            raise ValueError(f"Blueprint step {index} has no evidence object")
+        placeholder = str(evidence.get("placeholder") or f"#E{index}").strip()
+        tool_input = evidence.get("tool_input", "event_log")
+        steps.append(
+            BlueprintStep(
+                placeholder=placeholder,
+                plan=str(item.get("plan", "")),
+                tool=str(evidence.get("tool", "")).strip(),
+                tool_input=tool_input,
+                depends_on=_placeholders_in(tool_input) - {placeholder},
+            )
+        )
+
+    known = {step.placeholder for step in steps}
+    for step in steps:
+        # References to steps that do not exist cannot be waited for.
+        step.depends_on &= known
+    return steps
+
+
+def _log_name_from(value: Any, evidence: Dict[str, Any], default: str) -> str:
+    if isinstance(value, str):
+        value = value.strip()
+        if value in evidence:
+            produced = evidence[value]
+            if isinstance(produced, dict) and produced.get("logs_name"):
+                return str(produced["logs_name"])
+            return default
+        if value.lower() in _DEFAULT_LOG_INPUTS:
+            return default
+        if not value.endswith(".xes") and parse_slice_name(value) is None:
+            return default
+        return value
+    if isinstance(value, dict):
+        for key in ("log", "logs", "event_log", *_LOG_PARAMS):
+            if key in value:
+                return _log_name_from(value[key], evidence, default)
+    return default
+
+
+def _tool_kwargs(tool: Callable[..., Any], step: BlueprintStep, evidence: Dict[str, Any], base_dir: Path, default_log: str) -> dict:
+    log_name = _log_name_from(step.tool_input, evidence, default_log)
+    extra = step.tool_input if isinstance(step.tool_input, dict) else {}
+    kwargs: dict = {}
+    for name, parameter in inspect.signature(tool).parameters.items():
+        if name == "path":
+            kwargs[name] = str(base_dir)
+        elif name in _LOG_PARAMS:
+            kwargs[name] = log_name
+        elif name in extra:
+            value = extra[name]
+            kwargs[name] = evidence.get(value, value) if isinstance(value, str) else value
+        elif parameter.default is not inspect.Parameter.empty:
+            kwargs[name] = parameter.default
+        else:
+            raise ValueError(f"{step.tool} needs {name!r} in tool_input")
+    return kwargs
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict(orient="records")
+    if isinstance(value, pd.Series):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _evidence_text(value: Any) -> Any:
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    if len(text) <= EVIDENCE_MAX_CHARS:
+        return value
+    return text[:EVIDENCE_MAX_CHARS] + " ...[truncated]"
+
+
+def execute_blueprint(
+    steps: List[BlueprintStep],
+    *,
+    tools: Optional[Dict[str, Callable[..., Any]]] = None,
+    base_dir: Optional[Path] = None,
+    default_log: str = "",
+    max_workers: int = BLUEPRINT_MAX_WORKERS,
+) -> Dict[str, dict]:
+    """Run the steps, each as soon as the steps it references (#E...) have finished.
+
+    Independent steps run concurrently in a thread pool; every task runs in a
+    copy of the caller's context so the dataset context is visible to tools.
+    Returns ``{placeholder: {"plan", "tool", "status", "elapsed_s", "evidence"}}``;
+    ``status`` is "ok", "error", "budget_exceeded" (the sandbox stopped the
+    tool, see sandbox.py), "skipped", "cancelled" or "missing_tool".
+    """
+
+    tools = WORKER_TOOLS if tools is None else tools
+    base_dir = dataset_dir() if base_dir is None else base_dir
+    evidence: Dict[str, Any] = {}
+    results: Dict[str, dict] = {}
+    pending = {step.placeholder: step for step in steps}
+
+    def run(step: BlueprintStep) -> Any:
+        tool = tools[step.tool]
+        return tool(**_tool_kwargs(tool, step, evidence, base_dir, default_log))
+
+    def finish(step: BlueprintStep, status: str, value: Any, started: float) -> None:
+        evidence[step.placeholder] = value
+        results[step.placeholder] = {
+            "plan": step.plan,
+            "tool": step.tool,
+            "status": status,
+            "elapsed_s": round(time.perf_counter() - started, 3),
+            "evidence": _evidence_text(_jsonable(value)),
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        running: Dict[Future, tuple] = {}
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for placeholder, step in list(pending.items()):
+                    if step.depends_on - results.keys():
+                        continue
+                    del pending[placeholder]
+                    progressed = True
+                    started = time.perf_counter()
+                    failed = [dep for dep in step.depends_on if results[dep]["status"] != "ok"]
+                    if is_cancelled():
+                        finish(step, "cancelled", "Skipped because the request was cancelled.", started)
+                    elif step.tool not in tools:
+                        finish(step, "missing_tool", f"Tool {step.tool} còn thiếu nên chưa xử lí được step này.", started)
+                    elif failed:
+                        finish(step, "skipped", f"Skipped because {', '.join(sorted(failed))} failed.", started)
+                    else:
+                        context = contextvars.copy_context()
+                        running[pool.submit(context.run, run, step)] = (step, started)
+
+            if not running:
+                if pending:
+                    # Remaining steps reference each other in a cycle.
+                    for step in pending.values():
+                        finish(step, "skipped", "Skipped because of a circular #E reference.", time.perf_counter())
+                    pending.clear()
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step, started = running.pop(future)
+                try:
+                    value = future.result()
+                    finish(step, "budget_exceeded" if budget_exceeded(value) else "ok", value, started)
+                except ToolCancelled as exc:
+                    finish(step, "cancelled", str(exc), started)
+                except Exception as exc:  # noqa: BLE001 - reported as evidence
+                    finish(step, "error", f"{type(exc).__name__}: {exc}", started)
+
+    return {step.placeholder: results[step.placeholder] for step in steps}
+
+
+def _default_log_name(base_dir: Path) -> str:
+    """Cleaned log of the active dataset, else the first .xes in ``base_dir``."""
+
+    ctx = get_dataset_context()
+    log_file = getattr(getattr(ctx, "artefacts", None), "log_file", None) if ctx else None
+    if log_file is not None:
+        # Only the name is needed; tools served from analytics.json never fetch the log.
+        return log_file.basename
+    try:
+        path = ensure_logs_path(base_dir, "")
+        if path.is_file():
+            return path.name
+    except FileNotFoundError:
+        pass
+    candidates = sorted(base_dir.glob("*_cleaned.xes")) or sorted(base_dir.glob("*.xes"))
+    return candidates[0].name if candidates else ""
+
+
+def _run_blueprint_sync(path: str, blueprint: str) -> dict:
+    try:
+        steps = parse_blueprint(blueprint)
+    except ValueError as exc:  # also json.JSONDecodeError
+        return {"error": f"Could not read the blueprint: {exc}", "evidence": {}}
+    base_dir = dataset_dir(path)
+    started = time.perf_counter()
+    results = execute_blueprint(steps, base_dir=base_dir, default_log=_default_log_name(base_dir))
+    return {
+        "evidence": results,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+
+
+async def run_blueprint(path: str, blueprint: str) -> dict:
+    """Execute the planner blueprint (JSON list of steps) and return the evidence of every step.
+
+    Steps that do not depend on each other's #E placeholders run in parallel.
+    The result maps each placeholder (#E1, #E2, ...) to its plan, tool,
+    status and evidence; pass it, with the blueprint and the question, to
+    solver_agent in a single call. A blueprint that cannot be parsed gives
+    ``{"error": ..., "evidence": {}}`` instead.
+    """
+
+    # to_thread carries the dataset context (and the cancel event) over to the worker thread.
+    with cancel_scope() as cancelled:
+        try:
+            return await asyncio.to_thread(_run_blueprint_sync, path, blueprint)
+        except asyncio.CancelledError:
+            # The agent run was cancelled (client went away): stop sandboxed tools and pending steps.
+            cancelled.set()
+            raise
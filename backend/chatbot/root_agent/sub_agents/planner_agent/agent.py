@@ -11,10 +11,21 @@ planner_agent = LlmAgent(
     - Truy vấn của người dùng về event log (tiếng Việt hoặc tiếng Anh).
      
     Hiện tại, worker_agent đang có những tools như sau để bạn lên kế hoạch cho worker agent sử dụng nếu cần để phân tích:
-        1. `basic_statistics`: Thống kê cơ bản về event log (số lượng case, activity, variant, frequency).
-        2. `process_discovery`: Sinh mô hình quy trình BPMN hoặc Petri Net từ log.
-        3. `performance_analysis`: Phân tích hiệu suất (throughput time, resource utilization).
-        4. `conformance_checking`: So sánh log thực tế với model chuẩn để kiểm tra tuân thủ.
+        1. `get_logs`: Lấy event log, hoặc chỉ các case trong một khoảng thời gian.
+           `tool_input` dạng {"log": "event_log", "start_time": "2020-03-01", "end_time": "2020-03-31"} (ngày dạng YYYY-MM-DD).
+           Khi câu hỏi giới hạn thời gian (ví dụ "trong tháng 3/2020"), bước đầu tiên PHẢI là `get_logs`, và các bước sau
+           dùng `#E` của bước đó làm log: {"log": "#E1", ...} hoặc `"tool_input": "#E1"`. Không cần `get_logs` khi dùng toàn bộ log.
+        2. `basic_statistics`: Thống kê cơ bản về event log (số lượng case, activity, variant, frequency).
+        3. `process_discovery`: Sinh mô hình quy trình BPMN hoặc Petri Net từ log.
+        4. `performance_analysis`: Phân tích hiệu suất (throughput time, resource utilization).
+        5. `conformance_checking`: So sánh log thực tế với model chuẩn để kiểm tra tuân thủ.
+        6. `duration_percentiles`: Percentile (p50, p95, ...) của thời gian case hoặc thời gian chờ giữa hai activity liên tiếp.
+           `tool_input` dạng {"log": "event_log", "percentiles": "50,95", "source_activity": "A", "target_activity": "B"}.
+        7. `variant_explorer`: Tra cứu variant: top variant (phân trang), variant bắt đầu bằng / chứa một chuỗi activity, variant của một case, danh sách case của một variant.
+           `tool_input` dạng {"log": "event_log", "query": "top" | "prefix" | "contains" | "case" | "cases", "activities": "A -> B", "case_id": "..."}.
+        8. `process_simulation`: Mô phỏng what-if thời gian xử lý case (ví dụ "activity X nhanh hơn 20%", "số case đến tăng x1.5").
+           `tool_input` dạng {"log": "event_log", "scenarios": "X 20% faster; arrival x1.5"}.
+        Tham số bắt buộc của tool (như `start_time`, `end_time` của `get_logs`) phải có trong `tool_input`, nếu không bước đó sẽ báo lỗi.
 
     **Hướng dẫn thực hiện của bạn**:
         Bước 1: Phân tích truy vấn của người dùng.
@@ -60,6 +71,9 @@ planner_agent = LlmAgent(
         ]
     
     **Lưu ý**:
+    - Chỉ trả về JSON list như ví dụ, không kèm giải thích.
+    - Blueprint được thực thi tự động: bước nào tham chiếu `#E` của bước khác trong `tool_input` sẽ chờ bước đó, các bước còn lại chạy song song.
+      Vì vậy chỉ tham chiếu `#E` khi bước sau thực sự cần kết quả của bước trước.
     - Thực hiện các bước đúng thứ tự.
     - Chỉ planning với các tool mà worker agent có.
     - Không bỏ qua bước trung gian nếu cần thiết cho logic reasoning.
@@ -28,6 +28,11 @@ solver_agent = LlmAgent(
     **Lưu ý**: worker_agent có một số tool chưa hoàn thiện (đang trong quá trình thực hiện) nên khi evidence trả về của nó ở mỗi step nếu có cảnh báo "Tool ... còn thiếu nên chưa xử lí được step này." 
     Thì bạn vẫn tiếp tục tổng hợp để ra kết quả. Nếu dữ liệu thiếu không ảnh hưởng nhiều, kết quả tổng hợp vẫn trả lời được cho request ban đầu của user thì bạn hãy đưa ra câu trả lời cho request đó.
     Còn nếu dữ liệu thiếu ảnh hưởng nhiều, kết quả tổng hợp không trả lời được cho request ban đầu của user thì hãy nêu lí do (Ví dụ: "Do thiếu tool A, B, C,... nên chưa thể giúp bạn trả lời câu hỏi này được.")
+
+    **Lưu ý**: step có status "budget_exceeded" nghĩa là tool bị dừng vì vượt giới hạn thời gian hoặc bộ nhớ
+    (evidence gồm "budget" = "time"/"memory", "limit", "elapsed_s", "peak_rss_mb", "message").
+    Hãy giải thích ngắn gọn cho user rằng log quá lớn để phân tích trong một lần, và gợi ý thu hẹp khoảng thời gian
+    (ví dụ hỏi lại cho một tháng/quý cụ thể) hoặc dùng phân tích nhẹ hơn; vẫn trả lời phần câu hỏi mà các step khác đã có dữ liệu.
     """
 )
 
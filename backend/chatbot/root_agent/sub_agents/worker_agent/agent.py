@@ -1,5 +1,6 @@
 from google.adk.agents import LlmAgent
-from .tool import get_logs, basic_statistics, process_discovery, performance_analysis, conformance_checking
+from .tool import get_logs, basic_statistics, process_discovery, performance_analysis, duration_percentiles, conformance_checking, variant_explorer, process_simulation, get_result_page
+from .sandbox import sandboxed_agent_tool
 import pm4py
 
 worker_agent = LlmAgent(
@@ -27,10 +28,11 @@ worker_agent = LlmAgent(
 
     **Tool descriptions for agent**:
         1. get_logs(path, logs_name, start_time, end_time): 
-        Lấy logs từ folder, có thể filter theo thời gian. 
-        Outputs: 
-            - True nếu filter thành công
-            - dict {"info": "Filter logs is exist."} nếu file filter đã tồn tại
+        Lấy logs từ folder, có thể filter theo thời gian (start_time/end_time = "NULL" để lấy toàn bộ logs). 
+        Outputs (dict) gồm:
+            - logs_name: tên logs để truyền cho các tool khác (với filter thời gian có dạng `<log>@<start>__<end>`)
+            - num_events: số events trong logs
+            - num_cases: số cases trong logs
 
         2. basic_statistics(path, filter_logs): 
         Tính thống kê cơ bản của logs. 
@@ -40,18 +42,18 @@ worker_agent = LlmAgent(
             - num_activities: tổng số activities khác nhau
             - num_cases: tổng số cases
             - num_variants: tổng số variants
-            - variants: dict {variant_trace: count} của các variants
+            - variants: top variants theo số case
             - average_activities_per_case: số activities trung bình mỗi case
             - max_activities_per_case: số activities tối đa trong 1 case
             - min_activities_per_case: số activities tối thiểu trong 1 case
-            - activities_frequency: DataFrame thống kê tần suất từng activity
+            - activities_frequency: top activities theo số case
 
         3. process_discovery(path, filter_logs_name): 
         Khám phá quy trình, tạo BPMN và DFG. 
         Outputs (dict) gồm:
             - bpmn_model_image: tên file hình ảnh BPMN
-            - dfg_freq: dict các cặp activity theo tần suất
-            - dfg_discovery: dict các cặp activity theo thời gian trung bình (ngày)
+            - dfg_freq: top cặp activity theo tần suất
+            - dfg_discovery: top cặp activity theo thời gian trung bình (ngày)
 
         4. performance_analysis(path, filter_logs_name): 
         Phân tích hiệu năng logs. 
@@ -62,18 +64,72 @@ worker_agent = LlmAgent(
             - case_arrival_ratio_days: thời gian trung bình giữa 2 case liên tiếp (ngày)
             - case_dispersion_ratio_days: thời gian trung bình giữa thời điểm kết thúc của 2 case liên tiếp (ngày)
 
-        5. conformance_checking(path, filter_logs_name): 
+        5. duration_percentiles(path, filter_logs_name, percentiles, source_activity, target_activity): 
+        Percentile của thời gian case (source_activity = target_activity = "NULL"), hoặc thời gian chờ từ source_activity
+        đến target_activity liền sau (để "NULL" một đầu = gộp mọi cặp bắt đầu / kết thúc bằng activity còn lại).
+        percentiles: chuỗi như "50,90,95,99". Trả lời từ sketch tính sẵn, sai số tương đối khoảng 1%.
+        Outputs (dict) gồm:
+            - metric: "case_duration" hoặc "waiting_time" (kèm pairs_matched: các cặp activity được gộp)
+            - count: số giá trị
+            - percentiles: {"p50": ..., "p95": ...} (ngày)
+            - mean_days, min_days, max_days
+
+        6. conformance_checking(path, filter_logs_name, mode): 
         Kiểm tra mức độ tuân thủ quy trình, phát hiện case không hợp lệ và unwanted activities. 
+        mode:
+            - "fast" (mặc định): so sánh các cặp directly-follows của log với model, trả về ngay cả với log lớn.
+            - "exact": token-based replay, chậm với log lớn; chỉ dùng khi user yêu cầu rõ replay/fitness chính xác.
+            - "background": trả kết quả "fast" và chạy "exact" ở nền; gọi lại với "exact" sau đó sẽ trả ngay.
         Outputs (dict) gồm:
+            - mode: chế độ đã dùng ("exact_status" = "running"/"done" khi mode = "background")
             - num_cases: tổng số case
             - num_unfit_cases: số case không tuân thủ
             - unfit_cases_percentage: phần trăm case không tuân thủ
             - top_k_variants_used: số lượng variant được dùng cho top-K
             - coverage_top_k_variants: tỉ lệ coverage top-K variants
             - min_coverage_variant: tỉ lệ coverage của variant cuối cùng trong top-K
-            - unfit_dfg_freq: dict DFG của các case không tuân thủ
-            - unfit_edges_with_count: list các cặp edge xuất hiện trong unfit DFG mà không có trong DFG tổng
-            - unwanted_activity_stats: list dict các activity không mong muốn với keys {"activity_name", "count", "percentage"}
+            - unfit_dfg_freq: top cặp edge DFG của các case không tuân thủ
+            - unfit_edges_with_count: top cặp edge lệch khỏi model (mode "fast": edge model không cho phép, kèm "cases" = số case có edge đó)
+            - unwanted_activity_stats: top activity không mong muốn với keys {"activity_name", "count", "percentage"}
+
+        Các trường dạng danh sách dài (variants, activities_frequency, dfg_*, temporal_profile_days, unfit_*, unwanted_activity_stats)
+        được rút gọn thành {"total", "top", "truncated", "handle"}: "top" là các dòng lớn nhất, "truncated" = true khi còn dòng bị lược bớt.
+
+        7. variant_explorer(path, filter_logs_name, query, activities, case_id, offset, limit): 
+        Tra cứu variant từ index dựng một lần cho mỗi log (không quét lại log).
+        query:
+            - "top": variant theo tần suất giảm dần, phân trang bằng offset/limit
+            - "prefix": variant bắt đầu bằng activities (ví dụ "A -> B")
+            - "contains": variant chứa activities liên tiếp
+            - "case": variant của case case_id
+            - "cases": danh sách case id có đúng variant activities, phân trang
+        Outputs (dict) gồm:
+            - num_cases, num_variants: của toàn bộ log
+            - matching_variants, matching_cases: số variant / case thỏa query
+            - rows: mỗi dòng {"rank", "variant", "length", "count", "percentage"} (query "cases": danh sách case id)
+            - next_offset: offset của trang tiếp theo (None khi đã hết)
+
+        8. process_simulation(path, filter_logs_name, scenarios, replications, cases_per_replication, percentiles, durations, seed): 
+        Mô phỏng Monte Carlo (what-if) thời gian xử lý case: case đi theo xác suất chuyển của DFG, thời gian mỗi bước lấy mẫu
+        từ sketch thời gian chờ (durations = "sketch", mặc định) hoặc từ temporal profile (durations = "temporal_profile").
+        scenarios: các kịch bản cách nhau bởi ";", các thay đổi trong một kịch bản nối bằng "&",
+        ví dụ "Approve 20% faster; arrival x1.5; Check x0.5 & arrival -10%". Kịch bản "baseline" luôn được mô phỏng trước.
+        Outputs (dict) gồm:
+            - observed_mean_days: thời gian case trung bình thực tế của log (để so với baseline)
+            - scenarios: mỗi kịch bản {"scenario", "mean_days", "mean_days_ci95", "percentiles", "percentiles_ci95",
+              "change_vs_baseline_pct", "arrivals_per_day", "work_in_progress", "congestion", "truncated_cases"}
+              (ci95: khoảng tin cậy 95% qua các lần lặp; congestion: activity chậm lại khi số case tăng)
+
+        9. get_result_page(handle, offset, limit): 
+        Lấy thêm dữ liệu của một trường bị rút gọn (chỉ khi user thực sự cần danh sách đầy đủ).
+        Outputs (dict) gồm: total, offset, rows, next_offset (None khi đã hết).
     """,
-    tools = [get_logs, basic_statistics, process_discovery, performance_analysis, conformance_checking]
+    tools = [
+        get_logs,
+        *(
+            sandboxed_agent_tool(tool)
+            for tool in (basic_statistics, process_discovery, performance_analysis, duration_percentiles, conformance_checking, variant_explorer, process_simulation)
+        ),
+        get_result_page,
+    ]
 )
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import ast
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from chatbot.dataset_context import get_dataset_context
+
+# Rows of each ranked field (variants, DFG edges, ...) returned inline by the worker tools.
+TOOL_OUTPUT_TOP_K = int(os.getenv("WORKER_TOOL_OUTPUT_TOP_K", "15"))
+# Largest page get_result_page returns.
+TOOL_OUTPUT_PAGE_SIZE = int(os.getenv("WORKER_TOOL_OUTPUT_PAGE_SIZE", "50"))
+_MAX_HANDLES = int(os.getenv("WORKER_TOOL_OUTPUT_MAX_HANDLES", "256"))
+
+_pages: "OrderedDict[str, Tuple[Optional[tuple], List[dict]]]" = OrderedDict()
+_pages_lock = threading.Lock()
+
+
+def _dataset_key() -> Optional[tuple]:
+    ctx = get_dataset_context()
+    artefacts = getattr(ctx, "artefacts", None) if ctx else None
+    if artefacts is None:
+        return None
+    return getattr(artefacts, "user_id", None), getattr(artefacts, "dataset_id", None)
+
+
+def _as_tuple(key: Any) -> Any:
+    # Keys read back from JSON (analytics.json) are str(tuple).
+    if isinstance(key, str) and key.startswith("("):
+        try:
+            return ast.literal_eval(key)
+        except (ValueError, SyntaxError):
+            return key
+    return key
+
+
+def label(key: Any) -> str:
+    """``('A', 'B')`` -> ``"A -> B"``; other keys as str."""
+
+    key = _as_tuple(key)
+    if isinstance(key, (tuple, list)):
+        return " -> ".join(str(part) for part in key)
+    return str(key)
+
+
+def as_count(value: Any) -> int:
+    """Variant values are either counts or the list of traces having the variant."""
+
+    if isinstance(value, (int, float)):
+        return int(value)
+    return len(value)
+
+
+def _remember(rows: List[dict], handle: Optional[str] = None) -> str:
+    handle = handle or f"page:{uuid.uuid4().hex[:12]}"
+    with _pages_lock:
+        _pages[handle] = (_dataset_key(), rows)
+        while len(_pages) > _MAX_HANDLES:
+            _pages.popitem(last=False)
+    return handle
+
+
+def page_handles() -> set:
+    with _pages_lock:
+        return set(_pages)
+
+
+def export_pages(handles: set) -> Dict[str, List[dict]]:
+    """Rows behind ``handles``, for tool calls run in another process (see sandbox.py)."""
+
+    with _pages_lock:
+        return {handle: _pages[handle][1] for handle in handles if handle in _pages}
+
+
+def adopt_pages(pages: Dict[str, List[dict]]) -> None:
+    """Make handles returned by another process resolvable here, for the current dataset."""
+
+    for handle, rows in pages.items():
+        _remember(rows, handle)
+
+
+def compact_rows(rows: List[dict], *, sort_by: Optional[str] = None, top_k: Optional[int] = None) -> dict:
+    """Top ``top_k`` rows (largest ``sort_by`` first) plus totals and a paging handle when truncated."""
+
+    top_k = TOOL_OUTPUT_TOP_K if top_k is None else top_k
+    if sort_by is not None:
+        rows = sorted(rows, key=lambda row: row.get(sort_by) or 0, reverse=True)
+    truncated = len(rows) > top_k
+    return {
+        "total": len(rows),
+        "top": rows[:top_k],
+        "truncated": truncated,
+        "handle": _remember(rows) if truncated else None,
+    }
+
+
+def compact_mapping(
+    mapping: Any,
+    row: Callable[[Any, Any], dict],
+    *,
+    sort_by: str,
+    top_k: Optional[int] = None,
+) -> dict:
+    """``compact_rows`` over ``row(key, value)`` for every item of a dict (e.g. a DFG)."""
+
+    items = mapping.items() if isinstance(mapping, dict) else []
+    return compact_rows([row(key, value) for key, value in items], sort_by=sort_by, top_k=top_k)
+
+
+def records(frame: Any) -> List[dict]:
+    if isinstance(frame, pd.DataFrame):
+        return frame.to_dict(orient="records")
+    return list(frame or [])
+
+
+def get_result_page(handle: str, offset: int = 0, limit: int = TOOL_OUTPUT_PAGE_SIZE) -> dict:
+    """Return rows ``offset .. offset + limit`` of a truncated tool output.
+
+    Use only when the user explicitly needs more than the top rows a tool
+    returned; ``handle`` is the value of its ``"handle"`` field.
+    """
+
+    with _pages_lock:
+        entry = _pages.get(str(handle).strip())
+        if entry is not None:
+            _pages.move_to_end(str(handle).strip())
+    if entry is None or entry[0] != _dataset_key():
+        raise ValueError(f"Unknown or expired result handle: {handle}")
+    rows = entry[1]
+    offset = max(0, int(offset))
+    limit = min(max(1, int(limit)), TOOL_OUTPUT_PAGE_SIZE)
+    page = rows[offset:offset + limit]
+    return {
+        "total": len(rows),
+        "offset": offset,
+        "rows": page,
+        "next_offset": offset + len(page) if offset + len(page) < len(rows) else None,
+    }
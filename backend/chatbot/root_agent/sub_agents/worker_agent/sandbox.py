@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import functools
+import importlib
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import psutil
+
+from chatbot.dataset_context import activate_dataset_context, get_dataset_context, reset_dataset_context
+
+from .paging import adopt_pages, export_pages, page_handles
+
+# Heavy worker tools run in child processes so a runaway call cannot starve the API process.
+TOOL_SANDBOX_ENABLED = os.getenv("WORKER_TOOL_SANDBOX", "1").lower() not in ("0", "false", "no")
+SANDBOXED_TOOLS = frozenset(
+    name.strip()
+    # conformance_checking sandboxes its fast check only (see conformance_footprints).
+    for name in os.getenv("WORKER_TOOL_SANDBOXED", "process_discovery,conformance_footprints,process_simulation").split(",")
+    if name.strip()
+)
+TOOL_SANDBOX_WORKERS = int(os.getenv("WORKER_TOOL_SANDBOX_WORKERS", "2"))
+# Per-call budgets: wall-clock seconds and resident memory of the worker process.
+TOOL_TIME_LIMIT_S = float(os.getenv("WORKER_TOOL_TIME_LIMIT_S", "180"))
+TOOL_MEMORY_LIMIT_MB = int(os.getenv("WORKER_TOOL_MEMORY_LIMIT_MB", "4096"))
+# Workers whose memory stays above this share of the budget after a call are replaced.
+_RECYCLE_FRACTION = 0.5
+_POLL_INTERVAL_S = 0.1
+_WORKER_START_TIMEOUT_S = float(os.getenv("WORKER_TOOL_START_TIMEOUT_S", "120"))
+# Token replay (conformance_checking "exact"/"background") has workers and budgets of its own:
+# it takes far longer than an interactive call and must not hold up the tool workers.
+REPLAY_SANDBOX_WORKERS = int(os.getenv("WORKER_TOOL_REPLAY_WORKERS", "2"))
+REPLAY_TIME_LIMIT_S = float(os.getenv("WORKER_TOOL_REPLAY_TIME_LIMIT_S", "900"))
+REPLAY_MEMORY_LIMIT_MB = int(os.getenv("WORKER_TOOL_REPLAY_MEMORY_LIMIT_MB", str(TOOL_MEMORY_LIMIT_MB)))
+
+_cancel_event: ContextVar[Optional[threading.Event]] = ContextVar("tool_cancel_event", default=None)
+# Set in worker processes: they are daemonic and cannot start a sandbox of their own.
+_in_worker = False
+
+
+class ToolCancelled(Exception):
+    """The request that started the tool call went away; the worker was stopped."""
+
+
+@contextmanager
+def cancel_scope() -> Iterator[threading.Event]:
+    """Sandboxed calls made in this context (and in threads copying it) stop once the event is set."""
+
+    event = threading.Event()
+    token = _cancel_event.set(event)
+    try:
+        yield event
+    finally:
+        _cancel_event.reset(token)
+
+
+def is_cancelled() -> bool:
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def budget_exceeded(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("status") == "budget_exceeded"
+
+
+# ---------------------------------------------------------------- child side
+
+def _resolve(module_name: str, qualname: str) -> Callable[..., Any]:
+    target: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    # The module attribute may itself be a sandboxed wrapper.
+    return getattr(target, "__wrapped__", target)
+
+
+def _portable_error(exc: BaseException) -> BaseException:
+    try:
+        pickle.dumps(exc)
+        return exc
+    except Exception:  # noqa: BLE001 - fall back to the message
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+def _generated_files(artefacts: Any) -> set:
+    files = getattr(artefacts, "files_by_name", None) or {}
+    return {name for name, info in files.items() if str(getattr(info, "type", "")).startswith("generated:")}
+
+
+def _worker_main(conn: Any) -> None:
+    """Child process loop: run one tool call at a time inside the dataset context sent with it."""
+
+    global _in_worker
+    _in_worker = True
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            module_name, qualname, kwargs, artefacts = conn.recv()
+        except (EOFError, OSError):
+            return
+        token = activate_dataset_context(artefacts) if artefacts is not None else None
+        pages_before = page_handles()
+        files_before = _generated_files(artefacts)
+        try:
+            result = _resolve(module_name, qualname)(**kwargs)
+            generated = [
+                artefacts.files_by_name[name].url
+                for name in sorted(_generated_files(artefacts) - files_before)
+            ]
+            reply: Tuple[Any, ...] = ("ok", result, export_pages(page_handles() - pages_before), generated)
+        except BaseException as exc:  # noqa: BLE001 - re-raised in the parent
+            reply = ("error", _portable_error(exc))
+        finally:
+            if token is not None:
+                reset_dataset_context(token)
+        try:
+            conn.send(reply)
+        except Exception as exc:  # noqa: BLE001 - e.g. an unpicklable result
+            conn.send(("error", RuntimeError(f"Tool result could not be returned: {exc}")))
+
+
+# --------------------------------------------------------------- parent side
+
+class _Worker:
+    def __init__(self, context: Any):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), name="worker-tool-sandbox", daemon=True)
+        self.process.start()
+        child_conn.close()
+        try:
+            if not self.conn.poll(_WORKER_START_TIMEOUT_S):
+                raise EOFError
+            self.conn.recv()
+        except (EOFError, OSError):
+            self.kill()
+            raise RuntimeError("Tool sandbox worker did not start.") from None
+        self.handle = psutil.Process(self.process.pid)
+
+    def rss_bytes(self) -> int:
+        try:
+            return self.handle.memory_info().rss
+        except psutil.Error:
+            return 0
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        finally:
+            self.conn.close()
+
+
+class ToolSandbox:
+    """Pool of worker processes running tool calls under wall-clock and RSS budgets.
+
+    A call that exceeds a budget (or whose request is cancelled) has its
+    worker killed and replaced; the pool itself keeps serving other calls.
+    Workers live across calls, so their log and model caches are reused.
+    """
+
+    def __init__(
+        self,
+        workers: int = TOOL_SANDBOX_WORKERS,
+        *,
+        time_limit_s: float = TOOL_TIME_LIMIT_S,
+        memory_limit_mb: int = TOOL_MEMORY_LIMIT_MB,
+    ):
+        self.time_limit_s = time_limit_s
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(max(1, workers))
+        self._idle: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self) -> _Worker:
+        while not self._slots.acquire(timeout=_POLL_INTERVAL_S):
+            if is_cancelled():
+                raise ToolCancelled("Request cancelled while waiting for a tool worker.")
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    return worker
+                worker.kill()
+        try:
+            return _Worker(self._context)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, worker: _Worker, *, healthy: bool) -> None:
+        if healthy and worker.alive() and worker.rss_bytes() < self.memory_limit_bytes * _RECYCLE_FRACTION:
+            with self._lock:
+                if not self._closed:
+                    self._idle.append(worker)
+                    worker = None
+        if worker is not None:
+            worker.kill()
+        self._slots.release()
+
+    def run(self, func: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        """Run ``func(**kwargs)`` in a worker; returns its result or a ``budget_exceeded`` report."""
+
+        name = getattr(func, "__name__", str(func))
+        artefacts = _portable_artefacts()
+        worker = self._acquire()
+        healthy = False
+        started = time.perf_counter()
+        peak_rss = 0
+        try:
+            worker.conn.send((func.__module__, func.__qualname__, kwargs, artefacts))
+            while not worker.conn.poll(_POLL_INTERVAL_S):
+                elapsed = time.perf_counter() - started
+                peak_rss = max(peak_rss, worker.rss_bytes())
+                if is_cancelled():
+                    raise ToolCancelled(f"{name} cancelled after {elapsed:.1f} s.")
+                if elapsed > self.time_limit_s:
+                    return _budget_report(name, "time", self.time_limit_s, elapsed, peak_rss)
+                if peak_rss > self.memory_limit_bytes:
+                    return _budget_report(name, "memory", self.memory_limit_bytes / 2**20, elapsed, peak_rss)
+                if not worker.alive():
+                    # Killed from outside (e.g. the kernel OOM killer).
+                    return _budget_report(name, "memory", self.memory_limit_bytes / 2**20, elapsed, peak_rss)
+            try:
+                reply = worker.conn.recv()
+            except EOFError:
+                return _budget_report(name, "memory", self.memory_limit_bytes / 2**20, time.perf_counter() - started, peak_rss)
+            healthy = True
+        finally:
+            self._release(worker, healthy=healthy)
+
+        if reply[0] == "error":
+            raise reply[1]
+        _, result, pages, generated = reply
+        adopt_pages(pages)
+        _register_generated(generated)
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
+
+
+def _portable_artefacts() -> Any:
+    """The active dataset artefacts without the vector store, with the event log already local."""
+
+    ctx = get_dataset_context()
+    artefacts = getattr(ctx, "artefacts", None) if ctx else None
+    if artefacts is None:
+        return None
+    log_file = artefacts.log_file
+    if log_file is not None:
+        # Fetched once here rather than by every worker.
+        artefacts.ensure_local_file(log_file.name, file_type=log_file.type)
+    return dataclasses.replace(artefacts, store={})
+
+
+def _register_generated(paths: List[str]) -> None:
+    ctx = get_dataset_context()
+    artefacts = getattr(ctx, "artefacts", None) if ctx else None
+    if artefacts is not None:
+        for path in paths:
+            artefacts.register_local_file(path)
+
+
+def _budget_report(name: str, budget: str, limit: float, elapsed_s: float, peak_rss: int) -> dict:
+    unit = "s" if budget == "time" else "MB"
+    return {
+        "status": "budget_exceeded",
+        "tool": name,
+        "budget": budget,
+        "limit": f"{limit:g} {unit}",
+        "elapsed_s": round(elapsed_s, 1),
+        "peak_rss_mb": round(peak_rss / 2**20, 1),
+        "message": (
+            f"{name} was stopped because it exceeded its {budget} budget ({limit:g} {unit}). "
+            "The log is too large for this analysis in one call; a shorter time window "
+            "(get_logs with start_time/end_time) or a lighter option usually fits."
+        ),
+    }
+
+
+_sandbox: Optional[ToolSandbox] = None
+_replay_sandbox: Optional[ToolSandbox] = None
+_sandbox_lock = threading.Lock()
+
+
+def get_tool_sandbox() -> ToolSandbox:
+    global _sandbox
+    with _sandbox_lock:
+        if _sandbox is None:
+            _sandbox = ToolSandbox()
+        return _sandbox
+
+
+def get_replay_sandbox() -> ToolSandbox:
+    global _replay_sandbox
+    with _sandbox_lock:
+        if _replay_sandbox is None:
+            _replay_sandbox = ToolSandbox(
+                REPLAY_SANDBOX_WORKERS,
+                time_limit_s=REPLAY_TIME_LIMIT_S,
+                memory_limit_mb=REPLAY_MEMORY_LIMIT_MB,
+            )
+        return _replay_sandbox
+
+
+def shutdown_tool_sandbox() -> None:
+    global _sandbox, _replay_sandbox
+    with _sandbox_lock:
+        sandboxes = (_sandbox, _replay_sandbox)
+        _sandbox = _replay_sandbox = None
+    for sandbox in sandboxes:
+        if sandbox is not None:
+            sandbox.shutdown()
+
+
+def sandboxed(tool: Callable[..., Any]) -> Callable[..., Any]:
+    """``tool`` for thread callers (the blueprint runner): runs in the sandbox when configured to."""
+
+    if not TOOL_SANDBOX_ENABLED or tool.__name__ not in SANDBOXED_TOOLS:
+        return tool
+
+    @functools.wraps(tool)
+    def wrapper(**kwargs: Any) -> Any:
+        if _in_worker:
+            return tool(**kwargs)
+        return get_tool_sandbox().run(tool, kwargs)
+
+    return wrapper
+
+
+def run_replay(replay: Callable[..., Any], **kwargs: Any) -> Any:
+    """``replay(**kwargs)`` in the replay sandbox; a ``budget_exceeded`` report when it runs over."""
+
+    if not TOOL_SANDBOX_ENABLED or _in_worker:
+        return replay(**kwargs)
+    return get_replay_sandbox().run(replay, kwargs)
+
+
+def sandboxed_agent_tool(tool: Callable[..., Any]) -> Callable[..., Any]:
+    """``tool`` for the ADK agent: awaited off the event loop, and cancelled with the agent run.
+
+    Tools not sandboxed themselves run on a thread too, since they may
+    sandbox part of their work (conformance_checking does).
+    """
+
+    if not TOOL_SANDBOX_ENABLED:
+        return tool
+    call = sandboxed(tool)
+
+    @functools.wraps(tool)
+    async def wrapper(**kwargs: Any) -> Any:
+        with cancel_scope() as cancelled:
+            try:
+                return await asyncio.to_thread(call, **kwargs)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+    return wrapper
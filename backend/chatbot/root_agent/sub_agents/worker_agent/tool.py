@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import contextvars
+import functools
 import json
 import os
-import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 
 import google.generativeai as genai
 import numpy as np
@@ -20,7 +25,6 @@ from pm4py.statistics.end_activities.log import get as end_activities_get
 from pm4py.statistics.start_activities.log import get as start_activities_get
 from pm4py.statistics.traces.generic.log import case_arrival
 from pm4py.statistics.traces.generic.pandas import case_statistics
-from pm4py.statistics.variants.log import get as variants_get
 from pm4py.visualization.bpmn import visualizer as bpmn_visualizer
 from pm4py.visualization.dfg import visualizer as dfg_visualization
 from pm4py.visualization.dotted_chart import visualizer as dotted_chart_visualizer
@@ -28,9 +32,45 @@ from pm4py.visualization.heuristics_net import visualizer as hn_visualizer
 from pm4py.visualization.petri_net import visualizer as petri_net_visualizer
 
 from chatbot.dataset_context import get_dataset_context
-
-
-def _dataset_dir(path: Optional[str] = None) -> Path:
+from process.log_analytics import basic_statistics_of, discovery_dfgs_of, performance_of
+from process.log_cache import get_event_log, get_event_log_with
+from process.log_slices import SLICE_SEPARATOR, get_log_slice, is_slice_cached, parse_slice_name, slice_name
+from process.footprint_conformance import ModelRelations, check_footprints
+from process.model_cache import (
+    MODELS_ARCHIVE,
+    MODELS_DIR,
+    derived_fingerprint,
+    discover_models,
+    file_fingerprint,
+    unpack_models,
+)
+from process.quantile_sketch import LogSketches, parse_percentiles
+from process.simulation import (
+    SIMULATION_MAX_TRACES,
+    EdgeDurations,
+    SimulationModel,
+    cached_simulation_model,
+    parse_scenarios,
+    simulate_throughput_times,
+)
+from process.variant_index import VariantIndex, cached_variant_index
+
+from .paging import TOOL_OUTPUT_PAGE_SIZE, TOOL_OUTPUT_TOP_K, as_count, compact_mapping, compact_rows, get_result_page, label, records
+from .sandbox import ToolCancelled, budget_exceeded, cancel_scope, is_cancelled, run_replay, sandboxed
+
+CONFORMANCE_MODES = ("fast", "exact", "background")
+# Exact token-replay results (or replays in progress) kept per log fingerprint.
+_EXACT_REPLAY_CACHE_SIZE = 8
+_REPLAY_POLL_S = 0.1
+
+_unpacked_archives: set = set()
+_unpacked_archives_lock = threading.Lock()
+_replay_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="token-replay")
+_exact_replays: "OrderedDict[str, Future]" = OrderedDict()
+_exact_replays_lock = threading.Lock()
+
+
+def dataset_dir(path: Optional[str] = None) -> Path:
     ctx = get_dataset_context()
     artefacts = getattr(ctx, "artefacts", None) if ctx else None
     if artefacts is not None:
@@ -52,7 +92,7 @@ def _ensure_report() -> Optional[dict]:
     return None
 
 
-def _ensure_logs_path(base_dir: Path, logs_name: str) -> Path:
+def ensure_logs_path(base_dir: Path, logs_name: str) -> Path:
     ctx = get_dataset_context()
     artefacts = getattr(ctx, "artefacts", None) if ctx else None
     if artefacts is not None:
@@ -70,6 +110,80 @@ def _ensure_logs_path(base_dir: Path, logs_name: str) -> Path:
     return path
 
 
+def _read_event_log(base_dir: Path, logs_name: str) -> pd.DataFrame:
+    """Parsed log (or time-window slice returned by get_logs) from the shared in-memory caches."""
+
+    window = parse_slice_name(logs_name)
+    if window is not None:
+        source_name, start_dt, end_dt = window
+        return get_log_slice(ensure_logs_path(base_dir, source_name), start_dt, end_dt)
+    return get_event_log(ensure_logs_path(base_dir, logs_name))
+
+
+def _full_log_analytics(logs_name, section: str) -> Optional[dict]:
+    """Precomputed result of ``section`` when ``logs_name`` stands for the whole dataset log.
+
+    The report stage stores these in analytics.json, so questions about the
+    full log are answered without fetching or parsing it. Time-window slices
+    and datasets without the sidecar return None and are computed.
+    """
+
+    ctx = get_dataset_context()
+    artefacts = getattr(ctx, "artefacts", None) if ctx else None
+    analytics = getattr(artefacts, "analytics", None)
+    if not analytics or not isinstance(logs_name, str) or parse_slice_name(logs_name) is not None:
+        return None
+    # With a dataset context every non-slice log name resolves to the cleaned log (see ensure_logs_path).
+    if "log_cleaned" not in artefacts.files_by_type:
+        return None
+    result = analytics.get(section)
+    return dict(result) if isinstance(result, dict) else None
+
+
+def _log_fingerprint(base_dir: Path, logs_name: str) -> str:
+    """Content fingerprint of a log (or time-window slice), used to key cached models.
+
+    The artefact's sha256 is used when known, so a cache hit never fetches the log.
+    """
+
+    window = parse_slice_name(logs_name)
+    source_name = window[0] if window is not None else logs_name
+    ctx = get_dataset_context()
+    artefacts = getattr(ctx, "artefacts", None) if ctx else None
+    log_file = artefacts.log_file if artefacts is not None else None
+    fingerprint = getattr(log_file, "sha256", None) or file_fingerprint(ensure_logs_path(base_dir, source_name))
+    if window is not None:
+        fingerprint = derived_fingerprint(fingerprint, logs_name.rsplit(SLICE_SEPARATOR, 1)[1])
+    return fingerprint
+
+
+def _models_dir(base_dir: Path) -> Path:
+    """Model cache of the dataset, seeded from its models.zip artefact (mined at ingest) on first use."""
+
+    models_dir = base_dir / MODELS_DIR
+    ctx = get_dataset_context()
+    artefacts = getattr(ctx, "artefacts", None) if ctx else None
+    if artefacts is not None and "models" in artefacts.files_by_type:
+        try:
+            archive = artefacts.ensure_local_file(MODELS_ARCHIVE, file_type="models")
+            stat = archive.stat()
+            marker = (str(archive), stat.st_mtime_ns, stat.st_size)
+            with _unpacked_archives_lock:
+                if marker not in _unpacked_archives:
+                    unpack_models(archive, models_dir)
+                    _unpacked_archives.add(marker)
+        except Exception as exc:  # noqa: BLE001 - models are mined instead
+            print(f"[!] Could not use {MODELS_ARCHIVE}: {exc}")
+    return models_dir
+
+
+def _log_stem(logs_name: str) -> str:
+    window = parse_slice_name(logs_name)
+    if window is not None:
+        return f"{window[0].split('.')[0]}_{logs_name.rsplit(SLICE_SEPARATOR, 1)[1]}"
+    return logs_name.split('.')[0]
+
+
 def _register_generated_file(path: Path) -> None:
     ctx = get_dataset_context()
     artefacts = getattr(ctx, "artefacts", None) if ctx else None
@@ -79,110 +193,103 @@ def _register_generated_file(path: Path) -> None:
 
 # =================== FILTER LOGS WITH TIME RANGE ===================
 
+def _time_window(base_dir: Path, start_time: str, end_time: str) -> Tuple[datetime, datetime]:
+    start_dt = parser.parse(start_time).replace(tzinfo=None)
+    end_dt = parser.parse(end_time).replace(tzinfo=None)
+    if start_dt >= end_dt:
+        raise ValueError("Start time must be smaller than End time.")
+
+    report_data = _ensure_report()
+    if report_data is None:
+        report_path = base_dir / "report.json"
+        with report_path.open("r", encoding="utf-8") as f_report:
+            report_data = json.load(f_report)
+
+    dataset_range = report_data.get("dataset_overview", {}).get("date_range", {})
+    min_dt = parser.parse(dataset_range.get("start_time"))
+    max_dt = parser.parse(dataset_range.get("end_time"))
+    min_dt = min_dt.replace(tzinfo=None)
+    max_dt = max_dt.replace(tzinfo=None)
+    if start_dt < min_dt or end_dt > max_dt:
+        raise ValueError("Range time to filter is out of event logs.")
+    return start_dt, end_dt
+
+
 def check_exist_logs(path, logs_name, start_time, end_time):
-    """Check if a time-filtered log already exists."""
+    """Check if the time-window slice is already materialised in memory."""
 
-    base_dir = _dataset_dir(path)
-    start_str = re.sub(r"[: ]", "-", start_time)
-    end_str = re.sub(r"[: ]", "-", end_time)
-    file_name = f"{start_str}__{end_str}.xes"
-    out_path = base_dir / file_name
-    return out_path.exists()
+    base_dir = dataset_dir(path)
+    try:
+        logs_path = ensure_logs_path(base_dir, logs_name)
+    except FileNotFoundError:
+        return False
+    start_dt = parser.parse(start_time).replace(tzinfo=None)
+    end_dt = parser.parse(end_time).replace(tzinfo=None)
+    return is_slice_cached(logs_path, start_dt, end_dt)
 
 
 def get_logs(path, logs_name, start_time, end_time):
-    """Fetch logs for the dataset and optionally filter by time range."""
+    """Fetch logs for the dataset and optionally select the cases of a time range.
+
+    Returns ``{"logs_name", "num_events", "num_cases"}``; ``logs_name`` is
+    the log itself, or a time-window handle (``<log>@<start>__<end>``) that
+    the other tools accept in place of a file name. Nothing is written to disk.
+    """
 
-    base_dir = _dataset_dir(path)
+    base_dir = dataset_dir(path)
     try:
-        logs_path = _ensure_logs_path(base_dir, logs_name)
+        logs_path = ensure_logs_path(base_dir, logs_name)
     except FileNotFoundError as exc:
         raise ValueError(str(exc)) from exc
 
-    try:
-        if start_time == "NULL" or end_time == "NULL":
-            return pm4py.read_xes(str(logs_path))
-
-        start_dt = parser.parse(start_time).replace(tzinfo=None)
-        end_dt = parser.parse(end_time).replace(tzinfo=None)
-        if start_dt >= end_dt:
-            raise ValueError("Start time must be smaller than End time.")
-
-        report_data = _ensure_report()
-        if report_data is None:
-            report_path = base_dir / "report.json"
-            with report_path.open("r", encoding="utf-8") as f_report:
-                report_data = json.load(f_report)
-
-        dataset_range = report_data.get("dataset_overview", {}).get("date_range", {})
-        min_dt = parser.parse(dataset_range.get("start_time"))
-        max_dt = parser.parse(dataset_range.get("end_time"))
-        min_dt = min_dt.replace(tzinfo=None)
-        max_dt = max_dt.replace(tzinfo=None)
-        if start_dt < min_dt or end_dt > max_dt:
-            raise ValueError("Range time to filter is out of event logs.")
-
-        logs = pm4py.read_xes(str(logs_path))
-        filter_logs = pm4py.filter_time_range(
-            logs, start_dt, end_dt, mode="traces_intersecting"
-        )
+    if start_time == "NULL" or end_time == "NULL":
+        name = logs_path.name
+        logs = get_event_log(logs_path)
+    else:
+        start_dt, end_dt = _time_window(base_dir, start_time, end_time)
+        name = slice_name(logs_path.name, start_dt, end_dt)
+        logs = get_log_slice(logs_path, start_dt, end_dt)
 
-        start_str = re.sub(r"[: ]", "-", start_time)
-        end_str = re.sub(r"[: ]", "-", end_time)
-        file_name = f"{start_str}__{end_str}.xes"
-        out_path = base_dir / file_name
-        pm4py.write_xes(filter_logs, str(out_path))
-        _register_generated_file(out_path)
-        return True
-
-    except Exception as exc:  # noqa: BLE001
-        raise exc
+    return {
+        "logs_name": name,
+        "num_events": int(logs.shape[0]),
+        "num_cases": int(logs["case:concept:name"].nunique()),
+    }
 
 
 # =================== BASIC STATISTICS ===================
 
 def _load_event_log(filter_logs: Union[str, object], base_dir: Path):
     if isinstance(filter_logs, str):
-        target = base_dir / filter_logs
-        if not target.exists():
-            raise FileNotFoundError(f"Filtered log not found: {target}")
-        return pm4py.read_xes(str(target))
+        return _read_event_log(base_dir, filter_logs)
     return filter_logs
 
 
 def basic_statistics(path, filter_logs):
     """Compute basic statistics of the event log."""
 
-    base_dir = _dataset_dir(path)
-    logs = _load_event_log(filter_logs, base_dir)
-    print("Load clean dataset.")
-    df_logs = pm4py.convert_to_dataframe(logs)
-    num_events = df_logs.shape[0]
-    num_activities = df_logs['concept:name'].nunique()
-    num_cases = df_logs['case:concept:name'].nunique()
-    variants = variants_get.get_variants(df_logs)
-    num_variants = len(variants)
-
-    activities_per_case = df_logs.groupby("case:concept:name")["concept:name"].nunique()
-    average_activities_per_case = round(activities_per_case.mean())
-    max_activities_per_case = activities_per_case.max()
-    min_activities_per_case = activities_per_case.min()
-
-    unique_case_activities = df_logs[['case:concept:name', 'concept:name']].drop_duplicates()
-    activities_frequency = unique_case_activities['concept:name'].value_counts().reset_index()
-
-    return {
-        "logs_name": getattr(filter_logs, "name", ""),
-        "num_events": num_events,
-        "num_activities": num_activities,
-        "num_cases": num_cases,
-        "num_variants": num_variants,
-        "variants": variants,
-        "average_activities_per_case": average_activities_per_case,
-        "max_activities_per_case": max_activities_per_case,
-        "min_activities_per_case": min_activities_per_case,
-        "activities_frequency": activities_frequency,
-    }
+    logs_name = filter_logs if isinstance(filter_logs, str) else getattr(filter_logs, "name", "")
+    result = _full_log_analytics(filter_logs, "basic_statistics")
+    if result is None:
+        base_dir = dataset_dir(path)
+        logs = _load_event_log(filter_logs, base_dir)
+        print("Load clean dataset.")
+        df_logs = pm4py.convert_to_dataframe(logs)
+        result = basic_statistics_of(df_logs)
+
+    result["variants"] = compact_mapping(
+        result["variants"],
+        lambda variant, count: {"variant": label(variant), "count": as_count(count)},
+        sort_by="count",
+    )
+    result["activities_frequency"] = compact_rows(
+        [
+            {"activity": row.get("concept:name"), "count": row.get("count")}
+            for row in records(result["activities_frequency"])
+        ],
+        sort_by="count",
+    )
+    return {"logs_name": logs_name, **result}
 
 
 # =================== PROCESS DISCOVERY ===================
@@ -190,27 +297,31 @@ def basic_statistics(path, filter_logs):
 def process_discovery(path, filter_logs_name):
     """Run process discovery on the event log."""
 
-    base_dir = _dataset_dir(path)
-    log_path = base_dir / filter_logs_name
-    logs = pm4py.read_xes(str(log_path))
-
-    tree = pm4py.discover_process_tree_inductive(logs)
-    bpmn_graph = pm4py.convert_to_bpmn(tree)
+    base_dir = dataset_dir(path)
+    models = discover_models(
+        _models_dir(base_dir),
+        _log_fingerprint(base_dir, filter_logs_name),
+        lambda: _read_event_log(base_dir, filter_logs_name),
+    )
+    bpmn_graph = models.bpmn
 
-    img_name = filter_logs_name.split('.')[0] + '_bpmn_model.png'
+    img_name = _log_stem(filter_logs_name) + '_bpmn_model.png'
     gviz = bpmn_visualizer.apply(bpmn_graph)
     output_path = base_dir / img_name
     bpmn_visualizer.save(gviz, str(output_path))
     _register_generated_file(output_path)
 
-    dfg_freq = dfg_discovery.apply(logs, variant=dfg_discovery.Variants.FREQUENCY)
-    dfg_perf = dfg_discovery.apply(logs, variant=dfg_discovery.Variants.PERFORMANCE)
-    dfg_perf = {k: round(v / 86400, 2) for k, v in dfg_perf.items()}
-
+    dfgs = _full_log_analytics(filter_logs_name, "process_discovery")
+    if dfgs is None:
+        dfgs = discovery_dfgs_of(_read_event_log(base_dir, filter_logs_name))
     return {
         "bpmn_model_image": img_name,
-        "dfg_freq": dfg_freq,
-        "dfg_discovery": dfg_perf,
+        "dfg_freq": compact_mapping(
+            dfgs["dfg_freq"], lambda edge, count: {"edge": label(edge), "count": count}, sort_by="count"
+        ),
+        "dfg_discovery": compact_mapping(
+            dfgs["dfg_discovery"], lambda edge, days: {"edge": label(edge), "mean_days": days}, sort_by="mean_days"
+        ),
     }
 
 
@@ -219,83 +330,125 @@ def process_discovery(path, filter_logs_name):
 def performance_analysis(path, filter_logs_name):
     """Analyse performance metrics for the event log."""
 
-    base_dir = _dataset_dir(path)
-    log_path = base_dir / filter_logs_name
-    logs = pm4py.read_xes(str(log_path))
-
-    all_case_durations = pm4py.get_all_case_durations(logs)
-    all_case_durations = [round(duration / (24 * 3600), 2) for duration in all_case_durations]
-
-    max_case_duration = max(all_case_durations)
-    mean_case_duration = round(np.mean(all_case_durations), 2)
-    min_case_duration = min(all_case_durations)
+    result = _full_log_analytics(filter_logs_name, "performance_analysis")
+    if result is None:
+        base_dir = dataset_dir(path)
+        logs = _read_event_log(base_dir, filter_logs_name)
+        result = performance_of(logs)
 
-    case_arrival_ratio = pm4py.get_case_arrival_average(logs)
-    case_arrival_ratio = round(case_arrival_ratio / (24 * 3600), 2)
-
-    case_dispersion_ratio = round(
-        case_arrival.get_case_dispersion_avg(
-            logs, parameters={case_arrival.Parameters.TIMESTAMP_KEY: "time:timestamp"}
-        ) / (24 * 3600),
-        2,
+    result["temporal_profile_days"] = compact_mapping(
+        result["temporal_profile_days"],
+        lambda pair, stats: {"pair": label(pair), "mean_days": stats[0], "std_days": stats[1]},
+        sort_by="mean_days",
     )
+    return result
 
-    temporal_profile = temporal_profile_discovery.apply(logs)
-    temporal_profile_days = {
-        k: (round(v[0] / 86400, 2), round(v[1] / 86400, 2)) for k, v in temporal_profile.items()
-    }
-    return {
-        "max_case_duration_days": max_case_duration,
-        "mean_case_duration_days": mean_case_duration,
-        "min_case_duration_days": min_case_duration,
-        "case_arrival_ratio_days": case_arrival_ratio,
-        "case_dispersion_ratio_days": case_dispersion_ratio,
-        "temporal_profile_days": temporal_profile_days,
-    }
 
+# =================== DURATION PERCENTILES ===================
 
-# =================== CONFORMANCE CHECKING ===================
+def _log_sketches(base_dir: Path, logs_name: str) -> LogSketches:
+    """Sketches of sketches.json for the whole dataset log; otherwise built from the (cached) frame."""
+
+    ctx = get_dataset_context()
+    artefacts = getattr(ctx, "artefacts", None) if ctx else None
+    sketches = getattr(artefacts, "sketches", None)
+    if parse_slice_name(logs_name) is not None:
+        return LogSketches.from_frame(_read_event_log(base_dir, logs_name))
+    if sketches and "log_cleaned" in artefacts.files_by_type:
+        return LogSketches.from_dict(sketches)
+    _, log_sketches = get_event_log_with(ensure_logs_path(base_dir, logs_name), "log_sketches", LogSketches.from_frame)
+    return log_sketches
+
+
+def _optional_activity(name) -> Optional[str]:
+    if name is None or not str(name).strip() or str(name).strip() == "NULL":
+        return None
+    return str(name).strip()
+
+
+def duration_percentiles(
+    path,
+    filter_logs_name,
+    percentiles: str = "50,90,95,99",
+    source_activity: str = "NULL",
+    target_activity: str = "NULL",
+):
+    """Percentiles of case durations, or of waiting times between activities, in days.
+
+    With both activities "NULL" the case durations are used. Otherwise the
+    waiting time from ``source_activity`` to the directly following
+    ``target_activity``; leaving one of them "NULL" merges every pair
+    starting (or ending) with the other. Answered from precomputed sketches
+    with a relative error of about 1%.
+    """
+
+    base_dir = dataset_dir(path)
+    log_sketches = _log_sketches(base_dir, filter_logs_name)
+    requested = parse_percentiles(percentiles) or [50.0, 90.0, 95.0, 99.0]
+    source = _optional_activity(source_activity)
+    target = _optional_activity(target_activity)
+
+    result = {"logs_name": filter_logs_name}
+    if source is None and target is None:
+        sketch = log_sketches.case_durations
+        result["metric"] = "case_duration"
+    else:
+        pairs, sketch = log_sketches.waiting_times(source, target)
+        result.update(
+            {
+                "metric": "waiting_time",
+                "source_activity": source,
+                "target_activity": target,
+                "pairs_matched": compact_rows(
+                    [{"edge": label(pair), "count": log_sketches.pairs[pair].count} for pair in pairs],
+                    sort_by="count",
+                ),
+            }
+        )
 
-def conformance_checking(path, filter_logs_name):
-    """Evaluate conformance of the event log against the discovered model."""
-
-    base_dir = _dataset_dir(path)
-    log_path = base_dir / filter_logs_name
-    logs = pm4py.read_xes(str(log_path))
-    num_cases = len(logs)
-    variants = variants_get.get_variants(logs)
-    num_variants = len(variants)
-
-    def get_k_variants(variants_with_frequency, num_cases, num_variants, min_k=10, coverage_threshold=0.85):
-        coverage = 0
-        k = 0
-        min_coverage = 0
-        if num_variants <= min_k:
-            return num_variants, 1.0, 0
-        for variant in variants_with_frequency:
-            percentage = variant[1] / num_cases
-            coverage += percentage
-            k += 1
-            if k > min_k and coverage >= coverage_threshold:
-                min_coverage = percentage
-                break
-        return k, coverage, min_coverage
-
-    variants_with_frequency = variants_get.get_variants_sorted_by_count(variants)
-    k_variants, coverage_variants, min_coverage_variants = get_k_variants(
-        variants_with_frequency, num_cases, num_variants
+    def days(seconds):
+        return None if seconds is None else round(seconds / 86400, 4)
+
+    result.update(
+        {
+            "count": sketch.count,
+            "unit": "days",
+            "percentiles": {f"p{percent:g}": days(sketch.quantile(percent / 100)) for percent in requested},
+            "mean_days": days(sketch.mean),
+            "min_days": days(sketch.min) if sketch.count else None,
+            "max_days": days(sketch.max) if sketch.count else None,
+            "relative_error": log_sketches.alpha,
+        }
     )
+    return result
+
 
-    filtered_logs = pm4py.filter_variants_top_k(logs, k_variants)
-    net, initial_marking, final_marking = pm4py.discover_petri_net_inductive(filtered_logs)
+# =================== CONFORMANCE CHECKING ===================
 
+def _top_k_variants(variants_with_frequency, num_cases, num_variants, min_k=10, coverage_threshold=0.85):
+    coverage = 0
+    k = 0
+    min_coverage = 0
+    if num_variants <= min_k:
+        return num_variants, 1.0, 0
+    for variant in variants_with_frequency:
+        percentage = variant[1] / num_cases
+        coverage += percentage
+        k += 1
+        if k > min_k and coverage >= coverage_threshold:
+            min_coverage = percentage
+            break
+    return k, coverage, min_coverage
+
+
+def _token_replay(logs, models, num_cases, num_variants):
     parameters_tbr = {
         token_based_replay.Variants.TOKEN_REPLAY.value.Parameters.DISABLE_VARIANTS: True,
         token_based_replay.Variants.TOKEN_REPLAY.value.Parameters.ENABLE_PLTR_FITNESS: True,
     }
 
     replayed_traces, place_fitness, trans_fitness, unwanted_activities = token_based_replay.apply(
-        logs, net, initial_marking, final_marking, parameters=parameters_tbr
+        logs, models.net, models.initial_marking, models.final_marking, parameters=parameters_tbr
     )
 
     num_unfit_cases = sum(1 for t in replayed_traces if t["trace_fitness"] < 1.0)
@@ -327,16 +480,432 @@ def conformance_checking(path, filter_logs_name):
         )
 
     return {
-        "num_cases": num_cases,
         "num_unfit_cases": num_unfit_cases,
         "unfit_cases_percentage": unfit_cases_percentage,
+        "unfit_dfg_freq": unfit_dfg_freq,
+        "unfit_edges_with_count": [{"edge": label(edge), "count": count} for edge, count in unfit_edges_with_count],
+        "unwanted_activity_stats": unwanted_activity_stats,
+    }
+
+
+def _footprint_check(logs, models, num_cases):
+    checked = check_footprints(logs, ModelRelations.from_tree(models.tree))
+    num_unfit_cases = checked["num_unfit_cases"]
+    return {
+        "num_unfit_cases": num_unfit_cases,
+        "unfit_cases_percentage": round((num_unfit_cases / num_cases) * 100 if num_cases > 0 else 0, 2),
+        "unfit_dfg_freq": checked["unfit_dfg_freq"],
+        "unfit_edges_with_count": [
+            {"edge": label(row["edge"]), "count": row["count"], "cases": row["cases"]}
+            for row in checked["deviating_edges"]
+        ],
+        "unwanted_activity_stats": [
+            {
+                "activity_name": name,
+                "count": cases,
+                "percentage": round((cases / num_cases) * 100 if num_cases > 0 else 0, 2),
+            }
+            for name, cases in checked["unknown_activities"]
+        ],
+    }
+
+
+def _conformance_inputs(base_dir: Path, filter_logs_name):
+    """The log, its models, case and variant counts and the top-k variant coverage."""
+
+    logs = _read_event_log(base_dir, filter_logs_name)
+    num_cases = logs['case:concept:name'].nunique()
+
+    # Variant counts straight from the frame; same counts (hence the same k) as the pipeline's.
+    variants_with_frequency = sorted(
+        ((variant, as_count(count)) for variant, count in pm4py.get_variants(logs).items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    num_variants = len(variants_with_frequency)
+    top_k = _top_k_variants(variants_with_frequency, num_cases, num_variants)
+
+    models = discover_models(
+        _models_dir(base_dir),
+        _log_fingerprint(base_dir, filter_logs_name),
+        lambda: logs,
+        k=top_k[0],
+        num_variants=num_variants,
+    )
+    return logs, models, num_cases, num_variants, top_k
+
+
+def _conformance_result(mode: str, num_cases, top_k, checked) -> dict:
+    k_variants, coverage_variants, min_coverage_variants = top_k
+    return {
+        "mode": mode,
+        "num_cases": num_cases,
+        "num_unfit_cases": checked["num_unfit_cases"],
+        "unfit_cases_percentage": checked["unfit_cases_percentage"],
         "top_k_variants_used": k_variants,
         "coverage_top_k_variants": coverage_variants,
         "min_coverage_variant": min_coverage_variants,
-        "unfit_dfg_freq": unfit_dfg_freq,
-        "unfit_edges_with_count": unfit_edges_with_count,
-        "unwanted_activity_stats": unwanted_activity_stats,
+        "unfit_dfg_freq": compact_mapping(
+            checked["unfit_dfg_freq"], lambda edge, count: {"edge": label(edge), "count": count}, sort_by="count"
+        ),
+        "unfit_edges_with_count": compact_rows(checked["unfit_edges_with_count"], sort_by="count"),
+        "unwanted_activity_stats": compact_rows(checked["unwanted_activity_stats"], sort_by="count"),
+    }
+
+
+def exact_replay(path, filter_logs_name):
+    """Token replay of the log against its model; conformance_checking runs it in the replay sandbox."""
+
+    base_dir = dataset_dir(path)
+    logs, models, num_cases, num_variants, top_k = _conformance_inputs(base_dir, filter_logs_name)
+    return num_cases, top_k, _token_replay(logs, models, num_cases, num_variants)
+
+
+def _detached(replay):
+    # A background replay outlives the request that started it.
+    with cancel_scope():
+        return replay()
+
+
+def _exact_replay_future(key, replay, run_here: bool = False) -> Future:
+    """The exact replay for ``key``, started on the replay thread unless cached.
+
+    With ``run_here`` the replay runs on the calling thread instead, so an
+    "exact" request never queues behind background replays of other logs;
+    a replay of the same log already running is waited for. Failed replays
+    and replays stopped by their budget are started again.
+    """
+
+    owned = False
+    with _exact_replays_lock:
+        future = _exact_replays.get(key)
+        if future is not None and run_here and future.cancel():
+            future = None
+        if (
+            future is None
+            or future.cancelled()
+            or (future.done() and (future.exception() is not None or budget_exceeded(future.result())))
+        ):
+            if run_here:
+                future = Future()
+                future.set_running_or_notify_cancel()
+                owned = True
+            else:
+                future = _replay_pool.submit(contextvars.copy_context().run, _detached, replay)
+            _exact_replays[key] = future
+        _exact_replays.move_to_end(key)
+        while len(_exact_replays) > _EXACT_REPLAY_CACHE_SIZE:
+            _exact_replays.popitem(last=False)
+
+    if owned:
+        try:
+            future.set_result(replay())
+        except BaseException as exc:
+            future.set_exception(exc)
+    return future
+
+
+def _await_replay(future: Future):
+    while not wait([future], timeout=_REPLAY_POLL_S).done:
+        if is_cancelled():
+            raise ToolCancelled("Request cancelled while waiting for the token replay.")
+    return future.result()
+
+
+def conformance_footprints(path, filter_logs_name):
+    """The "fast" conformance check; the part of conformance_checking that runs in the tool sandbox."""
+
+    base_dir = dataset_dir(path)
+    logs, models, num_cases, _, top_k = _conformance_inputs(base_dir, filter_logs_name)
+    return _conformance_result("fast", num_cases, top_k, _footprint_check(logs, models, num_cases))
+
+
+def conformance_checking(path, filter_logs_name, mode: str = "fast"):
+    """Evaluate conformance of the event log against the discovered model.
+
+    mode "fast" (default) compares the log's directly-follows pairs with the
+    relations the model allows and reports deviating edges with their
+    occurrence and case counts. "exact" runs token-based replay (slow on
+    large logs; only when the user asks for replay fitness). "background"
+    answers like "fast" and starts the exact replay so a later "exact" call
+    returns immediately.
+
+    The fast check runs in the tool sandbox, token replay in the replay
+    sandbox under budgets of its own; replay results are cached in this
+    process. Background replays hold one replay worker at a time, so an
+    "exact" call does not queue behind them.
+    """
+
+    mode = (mode or "fast").strip().lower()
+    if mode not in CONFORMANCE_MODES:
+        mode = "fast"
+
+    if mode in ("exact", "background"):
+        fingerprint = _log_fingerprint(dataset_dir(path), filter_logs_name)
+        replay = functools.partial(run_replay, exact_replay, path=path, filter_logs_name=filter_logs_name)
+
+    if mode == "exact":
+        replayed = _await_replay(_exact_replay_future(fingerprint, replay, run_here=True))
+        if budget_exceeded(replayed):
+            return replayed
+        num_cases, top_k, checked = replayed
+        return _conformance_result("exact", num_cases, top_k, checked)
+
+    result = sandboxed(conformance_footprints)(path=path, filter_logs_name=filter_logs_name)
+    if mode == "background" and not budget_exceeded(result):
+        future = _exact_replay_future(fingerprint, replay)
+        result["mode"] = "background"
+        result["exact_status"] = "done" if future.done() else "running"
+    return result
+
+
+# =================== VARIANT EXPLORER ===================
+
+VARIANT_QUERIES = ("top", "prefix", "contains", "case", "cases")
+
+
+def _variant_index(base_dir: Path, logs_name: str) -> VariantIndex:
+    if parse_slice_name(logs_name) is None:
+        _, index = get_event_log_with(ensure_logs_path(base_dir, logs_name), "variant_index", VariantIndex.from_frame)
+        return index
+    return cached_variant_index(
+        _log_fingerprint(base_dir, logs_name),
+        lambda: _read_event_log(base_dir, logs_name),
+    )
+
+
+def _activity_sequence(activities) -> list:
+    """``"A -> B"`` (also ``→`` or ``,`` separated) or a list of activity names."""
+
+    if isinstance(activities, (list, tuple)):
+        return [str(activity).strip() for activity in activities]
+    if not isinstance(activities, str) or activities.strip() in ("", "NULL"):
+        return []
+    for separator in ("->", "→"):
+        activities = activities.replace(separator, ",")
+    return [activity.strip() for activity in activities.split(",") if activity.strip()]
+
+
+def _variant_row(index: VariantIndex, variant_id: int) -> dict:
+    count = int(index.counts[variant_id])
+    return {
+        "rank": variant_id + 1,
+        "variant": " -> ".join(index.decode(variant_id)),
+        "length": len(index.variants[variant_id]),
+        "count": count,
+        "percentage": round(count / index.num_cases * 100, 2) if index.num_cases else 0,
+    }
+
+
+def _page_end(offset: int, page: list, total: int) -> Optional[int]:
+    return offset + len(page) if offset + len(page) < total else None
+
+
+def variant_explorer(
+    path,
+    filter_logs_name,
+    query: str = "top",
+    activities: str = "NULL",
+    case_id: str = "NULL",
+    offset: int = 0,
+    limit: int = TOOL_OUTPUT_TOP_K,
+):
+    """Explore the variants of the event log from an index built once per log.
+
+    query:
+      - "top": variants by frequency, paged with ``offset``/``limit``.
+      - "prefix": variants starting with ``activities`` (e.g. "A -> B").
+      - "contains": variants where ``activities`` occur consecutively.
+      - "case": the variant of case ``case_id``.
+      - "cases": ids of the cases having exactly the variant ``activities``, paged.
+    """
+
+    query = (query or "top").strip().lower()
+    if query not in VARIANT_QUERIES:
+        raise ValueError(f"Unknown query {query!r}; expected one of {', '.join(VARIANT_QUERIES)}.")
+    offset = max(0, int(offset))
+    limit = min(max(1, int(limit)), TOOL_OUTPUT_PAGE_SIZE)
+
+    base_dir = dataset_dir(path)
+    index = _variant_index(base_dir, filter_logs_name)
+    result = {
+        "logs_name": filter_logs_name,
+        "query": query,
+        "num_cases": index.num_cases,
+        "num_variants": index.num_variants,
+    }
+
+    if query == "case":
+        variant_id = index.variant_of_case(case_id)
+        if variant_id is None:
+            raise ValueError(f"Case {case_id!r} is not in {filter_logs_name}.")
+        return {**result, "case_id": case_id, **_variant_row(index, variant_id)}
+
+    sequence = _activity_sequence(activities)
+    if query != "top" and not sequence:
+        raise ValueError(f"Query {query!r} needs activities, e.g. \"A -> B\".")
+    codes = index.encode(sequence)
+    if codes is None:
+        unknown = [activity for activity in sequence if index.encode([activity]) is None]
+        return {**result, "activities": sequence, "unknown_activities": unknown, "matching_cases": 0, "rows": []}
+
+    if query == "cases":
+        variant_id = index.variant_of(codes)
+        if variant_id is None:
+            return {**result, "activities": sequence, "matching_cases": 0, "rows": []}
+        page = index.cases_of(variant_id, offset, limit)
+        return {
+            **result,
+            **_variant_row(index, variant_id),
+            "offset": offset,
+            "rows": page,
+            "next_offset": _page_end(offset, page, int(index.counts[variant_id])),
+        }
+
+    if query == "top":
+        matching = np.arange(index.num_variants)
+        matching_cases = index.num_cases
+    elif query == "prefix":
+        matching = index.with_prefix(codes)
+        matching_cases = index.prefix_cases(codes)
+    else:
+        matching = index.containing(codes)
+        matching_cases = int(index.counts[matching].sum())
+    page = [_variant_row(index, int(variant_id)) for variant_id in matching[offset:offset + limit]]
+    return {
+        **result,
+        "activities": sequence,
+        "matching_variants": int(len(matching)),
+        "matching_cases": int(matching_cases),
+        "offset": offset,
+        "rows": page,
+        "next_offset": _page_end(offset, page, len(matching)),
     }
 
 
 # =================== SIMULATOR ===================
+
+SIMULATION_DURATIONS = ("sketch", "temporal_profile")
+# Bounds of one simulation call; replications are reduced to stay under SIMULATION_MAX_TRACES.
+_MAX_REPLICATIONS = 10_000
+_MAX_CASES_PER_REPLICATION = 10_000
+
+
+def _simulation_model(base_dir: Path, logs_name: str) -> SimulationModel:
+    if parse_slice_name(logs_name) is None:
+        _, model = get_event_log_with(ensure_logs_path(base_dir, logs_name), "simulation_model", SimulationModel.from_frame)
+        return model
+    return cached_simulation_model(
+        _log_fingerprint(base_dir, logs_name),
+        lambda: _read_event_log(base_dir, logs_name),
+    )
+
+
+def _edge_durations(base_dir: Path, logs_name: str, model: SimulationModel, durations: str) -> EdgeDurations:
+    if durations == "temporal_profile":
+        if parse_slice_name(logs_name) is None:
+            _, profile = get_event_log_with(
+                ensure_logs_path(base_dir, logs_name), "temporal_profile", temporal_profile_discovery.apply
+            )
+        else:
+            profile = temporal_profile_discovery.apply(_read_event_log(base_dir, logs_name))
+        return EdgeDurations.from_temporal_profile(model.edges, profile)
+    return EdgeDurations.from_sketches(model.edges, _log_sketches(base_dir, logs_name))
+
+
+def process_simulation(
+    path,
+    filter_logs_name,
+    scenarios: str = "NULL",
+    replications: int = 1000,
+    cases_per_replication: int = 100,
+    percentiles: str = "50,90,95",
+    durations: str = "sketch",
+    seed: int = 0,
+):
+    """Monte Carlo what-if simulation of case throughput times, in days.
+
+    Cases follow the directly-follows graph of the log (start, transition
+    and end probabilities) and every step takes a duration sampled from the
+    waiting-time sketch of that pair ("sketch") or from a log-normal fitted
+    to its temporal profile ("temporal_profile"). ``scenarios`` are separated
+    by ";" and their changes by "&", e.g. "Approve 20% faster; arrival x1.5".
+    A faster or slower activity scales the time it takes to reach it; an
+    arrival-rate change slows activities down by the load elasticity seen in
+    the log (how much longer they take on busier days). The baseline is
+    always simulated first. In the tool sandbox (the default) the simulation
+    runs in the worker itself, under its time and memory budgets.
+    """
+
+    durations = (durations or "sketch").strip().lower()
+    if durations not in SIMULATION_DURATIONS:
+        durations = "sketch"
+    cases = min(max(1, int(cases_per_replication)), _MAX_CASES_PER_REPLICATION)
+    replications = min(max(1, int(replications)), _MAX_REPLICATIONS, max(1, SIMULATION_MAX_TRACES // cases))
+    requested = parse_percentiles(percentiles) or [50.0, 90.0, 95.0]
+
+    base_dir = dataset_dir(path)
+    model = _simulation_model(base_dir, filter_logs_name)
+    parsed = parse_scenarios(scenarios, model.activities)
+    times = simulate_throughput_times(
+        model,
+        _edge_durations(base_dir, filter_logs_name, model, durations),
+        parsed,
+        replications,
+        cases,
+        seed=int(seed),
+    ) / 86400
+
+    def days(value):
+        return None if value is None or not np.isfinite(value) else round(float(value), 4)
+
+    rows = []
+    baseline_mean = None
+    for scenario, scenario_times in zip(parsed, times):
+        # Spread over replications gives the 95% interval of each estimate.
+        replication_means = np.nanmean(scenario_times, axis=1)
+        replication_percentiles = np.nanpercentile(scenario_times, requested, axis=1)
+        mean = float(np.nanmean(scenario_times))
+        baseline_mean = mean if baseline_mean is None else baseline_mean
+        arrivals = model.arrivals_per_day * scenario.arrival_factor if model.arrivals_per_day else None
+        rows.append(
+            {
+                "scenario": scenario.name,
+                "mean_days": days(mean),
+                "mean_days_ci95": [days(v) for v in np.nanpercentile(replication_means, [2.5, 97.5])],
+                "percentiles": {
+                    f"p{percent:g}": days(value)
+                    for percent, value in zip(requested, np.nanpercentile(scenario_times, requested))
+                },
+                "percentiles_ci95": {
+                    f"p{percent:g}": [days(v) for v in np.nanpercentile(values, [2.5, 97.5])]
+                    for percent, values in zip(requested, replication_percentiles)
+                },
+                "change_vs_baseline_pct": round((mean / baseline_mean - 1) * 100, 2) if baseline_mean else None,
+                "arrivals_per_day": round(arrivals, 4) if arrivals else None,
+                # Little's law: cases in progress = arrival rate x throughput time.
+                "work_in_progress": round(arrivals * mean, 1) if arrivals else None,
+                "congestion": compact_rows(
+                    [
+                        {"activity": activity, "factor": round(float(factor), 3)}
+                        for activity, factor in zip(model.activities, scenario.congestion(model))
+                        if abs(factor - 1) >= 0.01
+                    ],
+                    sort_by="factor",
+                ),
+                "truncated_cases": int(np.isnan(scenario_times).sum()),
+            }
+        )
+
+    observed = _log_sketches(base_dir, filter_logs_name).case_durations
+    return {
+        "logs_name": filter_logs_name,
+        "durations": durations,
+        "replications": replications,
+        "cases_per_replication": cases,
+        "unit": "days",
+        "observed_mean_days": days(observed.mean / 86400) if observed.count else None,
+        "num_activities": len(model.activities),
+        "num_edges": len(model.edges),
+        "scenarios": rows,
+    }
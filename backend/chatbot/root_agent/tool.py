@@ -1,14 +1,16 @@
 from __future__ import annotations
 
 import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, Tuple
 import logging
 
-import numpy as np
 from google import genai
 
 from chatbot.dataset_context import get_dataset_context
+from chatbot.vector_index import get_vector_index
 
 MODULE_DIR = Path(__file__).resolve().parent
 
@@ -16,12 +18,33 @@ logger = logging.getLogger(__name__)
 
 _client = genai.Client()
 
+# Recently embedded texts; repeated questions skip the embed_content round-trip.
+_EMBEDDING_CACHE_SIZE = 1024
+_embedding_cache: "OrderedDict[str, list]" = OrderedDict()
+_embedding_lock = threading.Lock()
+
 
 def get_embedding(text: str):
     """Generate embedding vector for the provided text."""
 
     if not text or not text.strip():
         return []
+    key = text.strip()
+    with _embedding_lock:
+        cached = _embedding_cache.get(key)
+        if cached is not None:
+            _embedding_cache.move_to_end(key)
+            return cached
+    values = _embed_uncached(key)
+    if values:
+        with _embedding_lock:
+            _embedding_cache[key] = values
+            while len(_embedding_cache) > _EMBEDDING_CACHE_SIZE:
+                _embedding_cache.popitem(last=False)
+    return values
+
+
+def _embed_uncached(text: str):
     try:
         result = _client.models.embed_content(
             model="gemini-embedding-001",
@@ -40,40 +63,6 @@ def get_embedding(text: str):
     return values
 
 
-def cosine_similarity(vec1, vec2):
-    """Compute cosine similarity between two vectors."""
-
-    if not vec1 or not vec2:
-        return 0.0
-    v1 = np.array(vec1)
-    v2 = np.array(vec2)
-    denominator = float(np.linalg.norm(v1) * np.linalg.norm(v2))
-    if denominator == 0:
-        return 0.0
-    return float(np.dot(v1, v2) / denominator)
-
-
-def _scored_fields(store: Dict[str, Iterable[float]], query_embedding: List[float]) -> List[Tuple[str, float]]:
-    mapping = [
-        ("description", "description"),
-        ("dataset_overview", "dataset_overview"),
-        ("basic_statistics", "basic_statistics"),
-        ("process_discovery", "process_discovery"),
-        ("performance_analysis", "performance_analysis"),
-        ("conformance_checking", "conformance_checking"),
-        ("enhancement", "enhancement"),
-    ]
-    scored: List[Tuple[str, float]] = []
-    for store_key, report_key in mapping:
-        vector = store.get(store_key)
-        if not vector:
-            continue
-        score = cosine_similarity(query_embedding, vector)
-        scored.append((report_key, score))
-    scored.sort(key=lambda item: item[1], reverse=True)
-    return scored
-
-
 def _fallback_store_and_report(base_dir: Path) -> Tuple[dict, dict]:
     store_path = base_dir / "store.json"
     report_path = base_dir / "report.json"
@@ -86,8 +75,8 @@ def _fallback_store_and_report(base_dir: Path) -> Tuple[dict, dict]:
     return store, report
 
 
-def semantic_search(path: str, question: str, top_k: int = 2):
-    """Return report sections with the highest semantic similarity to the question."""
+def semantic_search(path: str, question: str, top_k: int = 5):
+    """Return the report snippets (section summaries, Q&A pairs, paragraphs) closest to the question."""
 
     dataset_ctx = get_dataset_context()
     store: Dict[str, Iterable[float]]
@@ -104,15 +93,9 @@ def semantic_search(path: str, question: str, top_k: int = 2):
         store, report = _fallback_store_and_report(base_dir)
 
     query_embedding = get_embedding(question)
-    scored = _scored_fields(store, query_embedding)
-    if not scored:
-        return ({},) * max(1, top_k)
-
-    top_sections = []
-    for field_name, _ in scored[: max(1, top_k)]:
-        top_sections.append(report.get(field_name, {}))
-
-    while len(top_sections) < top_k:
-        top_sections.append({})
-
-    return tuple(top_sections)
+    index = get_vector_index(store, report)
+    hits = index.search(query_embedding, top_k)
+    return [
+        {"kind": entry.kind, "section": entry.section, "score": round(score, 4), "text": entry.text}
+        for entry, score in hits
+    ]
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from process.generate_store import SECTION_KEYS, split_paragraphs
+
+_INDEX_CACHE_SIZE = 16
+
+
+@dataclass(slots=True)
+class IndexEntry:
+    kind: str  # "section" | "qa" | "chunk"
+    section: str
+    text: str
+
+
+def _scalar_text(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _section_snippet(section: Any) -> str:
+    """Scalar metrics plus insights of a section, without chart payloads."""
+
+    if not isinstance(section, dict):
+        return " ".join(split_paragraphs(_scalar_text(section)))
+    lines = [
+        f"{key}: {value}"
+        for key, value in section.items()
+        if key != "insights" and isinstance(value, (str, int, float)) and value != ""
+    ]
+    lines.extend(split_paragraphs(section.get("insights", "")))
+    return "\n".join(lines)
+
+
+class VectorIndex:
+    """Row-normalised float32 matrix over section, Q&A question and paragraph vectors."""
+
+    def __init__(self, vectors: Sequence[Sequence[float]], entries: List[IndexEntry]):
+        self.entries = entries
+        if not entries:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = matrix / norms
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_store(cls, store: dict, report: dict) -> "VectorIndex":
+        vectors: List[Sequence[float]] = []
+        entries: List[IndexEntry] = []
+        dimension: Optional[int] = None
+
+        def add(vector: Any, entry: IndexEntry) -> None:
+            nonlocal dimension
+            if not vector or not entry.text:
+                return
+            if dimension is None:
+                dimension = len(vector)
+            elif len(vector) != dimension:
+                return
+            vectors.append(vector)
+            entries.append(entry)
+
+        for key in ("description", *SECTION_KEYS):
+            add(store.get(key), IndexEntry("section", key, _section_snippet(report.get(key))))
+
+        qa_report = report.get("Q&A") or {}
+        for question, vectors_by_field in (store.get("Q&A") or {}).items():
+            if not isinstance(vectors_by_field, dict):
+                continue
+            answer = qa_report.get(question, {}) if isinstance(qa_report, dict) else {}
+            answer_text = _scalar_text(answer.get("Answer", "")) if isinstance(answer, dict) else ""
+            add(vectors_by_field.get("Question"), IndexEntry("qa", "Q&A", f"Q: {question}\nA: {answer_text}"))
+
+        for chunk in store.get("chunks") or []:
+            if isinstance(chunk, dict):
+                add(chunk.get("vector"), IndexEntry("chunk", chunk.get("section", ""), chunk.get("text", "")))
+
+        return cls(vectors, entries)
+
+    def search(self, query_vector: Sequence[float], top_k: int) -> List[Tuple[IndexEntry, float]]:
+        if not len(self) or not query_vector or len(query_vector) != self.matrix.shape[1]:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0:
+            return []
+        scores = self.matrix @ (query / norm)
+        top_k = min(max(1, top_k), len(scores))
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [(self.entries[i], float(scores[i])) for i in ranked]
+
+
+_index_cache: "OrderedDict[int, Tuple[dict, dict, VectorIndex]]" = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def get_vector_index(store: dict, report: dict) -> VectorIndex:
+    """Return the index for this (store, report) pair, building it once per loaded artefact."""
+
+    key = id(store)
+    with _index_lock:
+        cached = _index_cache.get(key)
+        if cached is not None and cached[0] is store and cached[1] is report:
+            _index_cache.move_to_end(key)
+            return cached[2]
+
+    index = VectorIndex.from_store(store, report)
+    with _index_lock:
+        # Keep references to store/report so their ids cannot be reused while cached.
+        _index_cache[key] = (store, report, index)
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
@@ -1,14 +1,15 @@
 import asyncio
 import contextlib
+import hashlib
 import json
 import os
 import shutil
 import sys
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-import httpx
 import jwt
 from fastapi import (
     FastAPI,
@@ -21,9 +22,10 @@ from fastapi import (
     WebSocket,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
 from dotenv import load_dotenv
 
@@ -32,9 +34,13 @@ load_dotenv(dotenv_path=dotenv_path, override=False)
 
 try:
     from chatbot.root_agent.agent import root_agent
+    from chatbot.root_agent.tool import get_embedding
+    from chatbot.root_agent.sub_agents.worker_agent.sandbox import shutdown_tool_sandbox
     ROOT_AGENT_LOAD_ERROR: Optional[Exception] = None
 except (ModuleNotFoundError, ImportError) as exc:
     root_agent = None  # type: ignore[assignment]
+    get_embedding = None  # type: ignore[assignment]
+    shutdown_tool_sandbox = None  # type: ignore[assignment]
     ROOT_AGENT_LOAD_ERROR = exc
 else:
     ROOT_AGENT_LOAD_ERROR = None
@@ -51,12 +57,32 @@ else:
     RUNNER_IMPORT_ERROR = None
 
 from process.WebSocketLogger import WebSocketLogger
-from process.generate_cleaned import clean_and_save_logs
-from process.generate_json import gen_report
-from process.generate_store import build_store
-from chatbot.chat_sessions import ChatHistoryManager
+from process.generate_cleaned import is_supported_log_file, strip_log_extension
+from process.log_analytics import ANALYTICS_FILE
+from process.log_cache import log_cache_stats
+from process.model_cache import MODELS_ARCHIVE
+from process.pipeline import run_pipeline
+from process.quantile_sketch import SKETCHES_FILE
+from process.simulation import shutdown_simulation_pool
+from chatbot.answer_cache import (
+    answer_cache_stats,
+    invalidate_answers,
+    lookup_exact_answer,
+    lookup_similar_answer,
+    store_answer,
+)
+from chatbot.agent_runtime import AgentRuntime
+from chatbot.chat_sessions import ChatHistoryManager, ChatSession
 from chatbot.dataset_context import dataset_context
-from chatbot.dataset_loader import load_dataset_artefacts
+from chatbot.dataset_loader import invalidate_dataset_artefacts, load_dataset_artefacts
+from chatbot.http_clients import (
+    ARTEFACTS,
+    USER_SERVICE,
+    close_http_clients,
+    get_async_client,
+    latency_snapshot,
+    start_http_clients,
+)
 # from process.__init__ import GEMINI_API_KEY
 GEMINI_API_KEY= os.getenv("GEMINI_API_KEY")
 # ===================== App config =====================
@@ -70,7 +96,21 @@ os.makedirs(UPLOAD_ROOT, exist_ok=True)
 if not os.path.exists(STATIC_DIR):
     raise RuntimeError(f"Static folder does not exist: {STATIC_DIR}")
 
-app = FastAPI()
+@contextlib.asynccontextmanager
+async def lifespan(_: FastAPI):
+    start_http_clients()
+    try:
+        yield
+    finally:
+        if _agent_runtime is not None:
+            await _agent_runtime.close()
+        if shutdown_tool_sandbox is not None:
+            shutdown_tool_sandbox()
+        shutdown_simulation_pool()
+        await close_http_clients()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -93,6 +133,8 @@ USER_SERVICE_BASE_URL = os.getenv(
 DATA_FOLDERS_ENDPOINT = f"{USER_SERVICE_BASE_URL}/data-folders"
 
 AUTH_HEADER = "Authorization"
+# How often /api/chatbot/query checks whether its client is still connected.
+DISCONNECT_POLL_S = float(os.getenv("CHATBOT_DISCONNECT_POLL_S", "1.0"))
 
 # ===================== In-memory job tracking =====================
 
@@ -104,6 +146,7 @@ class JobInfo(BaseModel):
     original_filename: str
     created_at: str
     note: Optional[str] = ""
+    impute_missing: bool = False
 
 
 JOB_REGISTRY: Dict[str, JobInfo] = {}
@@ -111,11 +154,7 @@ JOB_REGISTRY: Dict[str, JobInfo] = {}
 # ===================== Helpers =====================
 
 def get_folder_name(filename: str) -> str:
-    if filename.endswith(".xes.gz"):
-        return filename[:-7]
-    if filename.endswith(".xes"):
-        return filename[:-4]
-    return os.path.splitext(filename)[0]
+    return strip_log_extension(filename)
 
 def extract_token(request: Request) -> str:
     auth_header = request.headers.get(AUTH_HEADER)
@@ -154,6 +193,16 @@ def merge_chat_logs_metadata(existing: Optional[dict], session_entry: dict, *, f
         "folder": target_folder,
         "sessions": sessions,
     }
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def build_dataset_payload(job_id: str, job: JobInfo, cleaned_filename: Optional[str], store_filename: Optional[str]) -> dict:
     folder = job.directory
 
@@ -163,10 +212,13 @@ def build_dataset_payload(job_id: str, job: JobInfo, cleaned_filename: Optional[
         path = os.path.join(folder, filename)
         if not os.path.exists(path):
             return None
+        # size / sha256 let the chatbot verify (and skip) cached downloads of this file.
         return {
             "type": file_type,
             "name": filename,
             "path": path,
+            "size": os.path.getsize(path),
+            "sha256": file_sha256(path),
         }
 
     files = []
@@ -187,6 +239,14 @@ def build_dataset_payload(job_id: str, job: JobInfo, cleaned_filename: Optional[
     if report_entry:
         files.append(report_entry)
 
+    analytics_entry = file_entry("analytics", ANALYTICS_FILE)
+    if analytics_entry:
+        files.append(analytics_entry)
+
+    sketches_entry = file_entry("sketches", SKETCHES_FILE)
+    if sketches_entry:
+        files.append(sketches_entry)
+
     if store_filename:
         store_entry = file_entry("store", store_filename)
         if store_entry:
@@ -205,6 +265,10 @@ def build_dataset_payload(job_id: str, job: JobInfo, cleaned_filename: Optional[
     if bpmn_entry:
         files.append(bpmn_entry)
 
+    models_entry = file_entry("models", MODELS_ARCHIVE)
+    if models_entry:
+        files.append(models_entry)
+
     if not files:
         raise RuntimeError("No artefacts generated for upload")
 
@@ -251,13 +315,19 @@ def patch_report_media(report_data: dict, url_mapping: Dict[str, str]) -> None:
 
 async def request_user_service(method: str, url: str, token: str, payload: Optional[dict] = None) -> dict:
     headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.request(method, url, headers=headers, json=payload)
+    response = await get_async_client(USER_SERVICE).request(method, url, headers=headers, json=payload)
     if response.status_code >= 400:
         detail = response.json().get("message") if response.headers.get("content-type", "").startswith("application/json") else response.text
         raise HTTPException(status_code=response.status_code, detail=detail or "User service error")
     return response.json()
 
+
+def forget_dataset(user_id: str, dataset_id: str) -> None:
+    """Drop the cached answers and artefacts of a dataset that was replaced or deleted."""
+
+    invalidate_answers(user_id, dataset_id)
+    invalidate_dataset_artefacts(user_id, dataset_id)
+
 # ===================== APIs =====================
 
 @app.get("/databases")
@@ -282,10 +352,9 @@ async def get_graph(request: Request, db: str = Query(..., description="Data ID"
     if not report_file:
         raise HTTPException(status_code=404, detail="Report not available")
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        report_response = await client.get(report_file["url"])
-        report_response.raise_for_status()
-        report_data = report_response.json()
+    report_response = await get_async_client(ARTEFACTS).get(report_file["url"])
+    report_response.raise_for_status()
+    report_data = report_response.json()
 
     url_mapping = map_file_urls(folder)
     patch_report_media(report_data, url_mapping)
@@ -306,21 +375,21 @@ async def get_stats(request: Request, db: str = Query(..., description="Data ID"
     if not stats_file:
         raise HTTPException(status_code=404, detail="Report not available")
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.get(stats_file["url"])
-        response.raise_for_status()
-        return JSONResponse(content=response.json())
+    response = await get_async_client(ARTEFACTS).get(stats_file["url"])
+    response.raise_for_status()
+    return JSONResponse(content=response.json())
 
 @app.post("/upload")
 async def upload_file(
     request: Request,
     file: UploadFile = File(...),
     note: str = Form(None),
+    impute_missing: bool = Form(False),
 ):
-    if not (file.filename.endswith(".xes") or file.filename.endswith(".xes.gz")):
+    if not is_supported_log_file(file.filename):
         return JSONResponse(
             status_code=400,
-            content={"error": "Only .xes or .xes.gz files are accepted"},
+            content={"error": "Only .xes, .xes.gz, .csv, .csv.gz or .parquet files are accepted"},
         )
 
     token = extract_token(request)
@@ -352,6 +421,7 @@ async def upload_file(
         original_filename=file.filename,
         created_at=datetime.utcnow().isoformat() + "Z",
         note=note or "",
+        impute_missing=impute_missing,
     )
     JOB_REGISTRY[job_id] = job_info
 
@@ -413,37 +483,31 @@ async def ws_upload(ws: WebSocket):
             folder_path = folder_path + os.sep
 
         try:
-            cleaned_filename = await clean_and_save_logs(folder_path, GEMINI_API_KEY)
-            if not cleaned_filename:
-                raise RuntimeError("Unable to preprocess logs")
-        except Exception as e:
-            logger.error(f"Error in clean_and_save_logs: {traceback.format_exc()}")
-            raise
-
-        try:
-            report_success = await gen_report(folder_path, GEMINI_API_KEY)
-            if not report_success:
-                raise RuntimeError("Failed to generate report")
-        except Exception as e:
-            logger.error(f"Error in gen_report: {traceback.format_exc()}")
-            raise
-
-        print("[i] Generating store.json from report")
-        try:
-            store_path = await asyncio.to_thread(build_store, folder_path)
-            store_filename = os.path.basename(store_path)
+            pipeline_state = await run_pipeline(
+                folder_path,
+                GEMINI_API_KEY,
+                impute_missing=job_info.impute_missing,
+            )
+            cleaned_filename = pipeline_state["clean"]["cleaned_file"]
+            store_filename = pipeline_state["store"]
         except Exception as e:
-            logger.error(f"Error building store.json: {traceback.format_exc()}")
+            logger.error(f"Error in processing pipeline: {traceback.format_exc()}")
             raise
 
         try:
-            dataset_payload = build_dataset_payload(job_id, job_info, cleaned_filename, store_filename)
+            dataset_payload = await asyncio.to_thread(
+                build_dataset_payload, job_id, job_info, cleaned_filename, store_filename
+            )
             dataset_record = await request_user_service(
                 "POST",
                 DATA_FOLDERS_ENDPOINT,
                 job_info.token,
                 dataset_payload,
             )
+            saved_id = (dataset_record.get("folder") or {}).get("id")
+            if saved_id:
+                # A dataset saved again under the same id: answers and artefacts of the old version are stale.
+                forget_dataset(job_info.user_id, str(saved_id))
             await ws.send_text(
                 json.dumps({"type": "dataset_saved", "data": dataset_record.get("folder")})
             )
@@ -470,6 +534,22 @@ async def ws_upload(ws: WebSocket):
         shutil.rmtree(job_info.directory, ignore_errors=True)
         await ws.close()
 
+# ===================== Metrics =====================
+
+@app.get("/metrics/answer-cache")
+def get_answer_cache_metrics():
+    return answer_cache_stats()
+
+
+@app.get("/metrics/log-cache")
+def get_log_cache_metrics():
+    return log_cache_stats()
+
+
+@app.get("/metrics/http")
+def get_http_metrics():
+    return latency_snapshot()
+
 # ===================== Sidebar mock API =====================
 
 @app.get("/api/sidebar")
@@ -505,38 +585,25 @@ def _extract_text_from_event(event: Any) -> str:
     return '\n'.join(texts)
 
 
-async def _execute_root_agent(question: str) -> Dict[str, Any]:
+_agent_runtime: Optional[AgentRuntime] = None
+
+
+def get_agent_runtime() -> AgentRuntime:
+    global _agent_runtime
+    if _agent_runtime is None:
+        _agent_runtime = AgentRuntime(root_agent)
+    return _agent_runtime
+
+
+async def _execute_root_agent(question: str, session: ChatSession) -> Dict[str, Any]:
     if root_agent is None:
         raise RuntimeError("Root agent is not initialized")
     if InMemoryRunner is None or genai_types is None:
         raise RuntimeError("google-adk runtime is not available")
 
-    user_id = "web-client"
-    session_id = str(uuid.uuid4())
-    new_message = genai_types.Content(
-        role="user",
-        parts=[genai_types.Part(text=question)],
-    )
-    runner = InMemoryRunner(agent=root_agent)
     events: list[Any] = []
-
-    await runner.session_service.create_session(
-        app_name=runner.app_name, user_id=user_id, session_id=session_id
-    )
-
-    async with runner:
-        session_id = str(uuid.uuid4())
-        await runner.session_service.create_session(
-            app_name=runner.app_name,
-            user_id="web-client",
-            session_id=session_id,
-        )
-        async for event in runner.run_async(
-            user_id="web-client",
-            session_id=session_id,
-            new_message=new_message,
-        ):
-            events.append(event)
+    async for event in get_agent_runtime().events(session, question):
+        events.append(event)
 
     answer = ""
     for event in reversed(events):
@@ -552,6 +619,23 @@ async def _execute_root_agent(question: str) -> Dict[str, Any]:
     }
 
 
+async def _run_while_connected(request: Request, awaitable: Any) -> Any:
+    """Await ``awaitable``, cancelling it (and the sandboxed tools it runs) if the client disconnects."""
+
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_S)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
 def _serialize_agent_result(result: Any) -> Dict[str, Any]:
     if isinstance(result, dict):
         return result
@@ -560,8 +644,7 @@ def _serialize_agent_result(result: Any) -> Dict[str, Any]:
     return {"answer": str(result)}
 
 
-@app.post("/api/chatbot/query")
-async def query_root_chatbot(request: Request, payload: ChatbotQueryRequest):
+def _ensure_chatbot_available() -> None:
     if root_agent is None:
         detail = "Chatbot agent is not available."
         if ROOT_AGENT_LOAD_ERROR is not None:
@@ -573,6 +656,28 @@ async def query_root_chatbot(request: Request, payload: ChatbotQueryRequest):
             detail = f"{detail} ({RUNNER_IMPORT_ERROR})"
         raise HTTPException(status_code=503, detail=detail)
 
+
+@dataclass
+class ChatTurn:
+    """State of one chatbot question shared by the JSON and streaming endpoints."""
+
+    token: str
+    user_id: str
+    dataset_id: str
+    folder_meta: Any
+    artefacts: Any
+    chat_manager: ChatHistoryManager
+    session: ChatSession
+    question: str
+    use_answer_cache: bool = False
+    cache_status: Optional[str] = None
+    cached_answer: Optional[str] = None
+    query_vector: Any = None
+
+
+async def _open_chat_turn(request: Request, payload: ChatbotQueryRequest) -> ChatTurn:
+    _ensure_chatbot_available()
+
     question = payload.question.strip()
     if not question:
         raise HTTPException(status_code=400, detail="Question must not be empty.")
@@ -587,11 +692,17 @@ async def query_root_chatbot(request: Request, payload: ChatbotQueryRequest):
     if not dataset_id:
         raise HTTPException(status_code=400, detail="datasetId is required.")
 
-    dataset_detail = await request_user_service(
-        "GET",
-        f"{DATA_FOLDERS_ENDPOINT}/{dataset_id}",
-        token,
-    )
+    try:
+        dataset_detail = await request_user_service(
+            "GET",
+            f"{DATA_FOLDERS_ENDPOINT}/{dataset_id}",
+            token,
+        )
+    except HTTPException as exc:
+        if exc.status_code == 404:
+            # Deleted in the user service.
+            forget_dataset(user_id, dataset_id)
+        raise
     folder_meta = dataset_detail.get("folder") or dataset_detail
 
     artefacts = await load_dataset_artefacts(dataset_id, dataset_detail, user_id=user_id)
@@ -616,52 +727,210 @@ async def query_root_chatbot(request: Request, payload: ChatbotQueryRequest):
 
     session.append("user", question)
 
-    with dataset_context(artefacts, session):
-        try:
-            result = await _execute_root_agent(question)
-        except HTTPException:
-            raise
-        except Exception as exc:
-            raise HTTPException(status_code=500, detail=f"Chatbot agent error: {exc}") from exc
-
-    response_payload = _serialize_agent_result(result)
-    if not isinstance(response_payload, dict):
-        response_payload = {"answer": response_payload}
-
-    answer_value = response_payload.get("answer")
-    if isinstance(answer_value, str):
-        answer_text = answer_value.strip()
-    else:
-        answer_text = str(answer_value) if answer_value is not None else ""
+    turn = ChatTurn(
+        token=token,
+        user_id=user_id,
+        dataset_id=dataset_id,
+        folder_meta=folder_meta,
+        artefacts=artefacts,
+        chat_manager=chat_manager,
+        session=session,
+        question=question,
+        # Repeated (or near-identical) opening questions on the same report version are answered
+        # from cache; follow-ups depend on the conversation so they always reach the agent.
+        use_answer_cache=session.num_turns() == 1,
+    )
+    if turn.use_answer_cache:
+        cached = lookup_exact_answer(user_id, dataset_id, artefacts.report_digest, question)
+        if cached is not None:
+            turn.cache_status = "exact"
+        else:
+            turn.query_vector = await asyncio.to_thread(get_embedding, question)
+            match = lookup_similar_answer(user_id, dataset_id, artefacts.report_digest, turn.query_vector)
+            if match is not None:
+                cached, _ = match
+                turn.cache_status = "semantic"
+        if cached is not None:
+            turn.cached_answer = cached.answer
+    return turn
+
+
+def _record_answer(turn: ChatTurn, answer_text: str) -> None:
+    turn.session.append("assistant", answer_text)
+    if turn.use_answer_cache and turn.cache_status is None:
+        store_answer(
+            turn.user_id,
+            turn.dataset_id,
+            turn.artefacts.report_digest,
+            turn.question,
+            answer_text,
+            turn.query_vector,
+        )
 
-    session.append("assistant", answer_text)
 
-    await chat_manager.save_session(session)
+async def _persist_chat_turn(turn: ChatTurn) -> dict:
+    await turn.chat_manager.save_session(turn.session)
 
-    session_metadata = chat_manager.session_metadata(session)
+    session_metadata = turn.chat_manager.session_metadata(turn.session)
     dataset_session_entry = {k: v for k, v in session_metadata.items() if k not in {"bucket", "folder"}}
     chat_logs_payload = merge_chat_logs_metadata(
-        folder_meta.get("chatLogs") if isinstance(folder_meta, dict) else None,
+        turn.folder_meta.get("chatLogs") if isinstance(turn.folder_meta, dict) else None,
         dataset_session_entry,
-        folder=artefacts.chat_logs_folder,
+        folder=turn.artefacts.chat_logs_folder,
     )
 
     try:
         await request_user_service(
             "PATCH",
-            f"{DATA_FOLDERS_ENDPOINT}/{dataset_id}",
-            token,
+            f"{DATA_FOLDERS_ENDPOINT}/{turn.dataset_id}",
+            turn.token,
             {"chatLogs": chat_logs_payload},
         )
     except HTTPException:
         pass
+    return session_metadata
+
+
+@app.post("/api/chatbot/query")
+async def query_root_chatbot(request: Request, payload: ChatbotQueryRequest):
+    turn = await _open_chat_turn(request, payload)
+
+    if turn.cached_answer is not None:
+        result = {"answer": turn.cached_answer}
+    else:
+        with dataset_context(turn.artefacts, turn.session):
+            try:
+                result = await _run_while_connected(request, _execute_root_agent(turn.question, turn.session))
+            except HTTPException:
+                raise
+            except Exception as exc:
+                raise HTTPException(status_code=500, detail=f"Chatbot agent error: {exc}") from exc
+
+    response_payload = _serialize_agent_result(result)
+    if not isinstance(response_payload, dict):
+        response_payload = {"answer": response_payload}
+
+    answer_value = response_payload.get("answer")
+    if isinstance(answer_value, str):
+        answer_text = answer_value.strip()
+    else:
+        answer_text = str(answer_value) if answer_value is not None else ""
+
+    _record_answer(turn, answer_text)
+    session_metadata = await _persist_chat_turn(turn)
 
     response_payload["answer"] = answer_text
-    response_payload["sessionId"] = session.session_id
+    response_payload["cache"] = turn.cache_status
+    response_payload["sessionId"] = turn.session.session_id
     response_payload["session"] = session_metadata
     return response_payload
 
 
+_STREAM_END = object()
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _stream_items(event: Any) -> list[tuple[str, dict]]:
+    """Translate an ADK event into SSE (event, data) pairs: tool progress and text."""
+
+    author = getattr(event, "author", None)
+    content = getattr(event, "content", None)
+    if author == "user" or not content or not getattr(content, "parts", None):
+        return []
+    items: list[tuple[str, dict]] = []
+    for part in content.parts:
+        function_call = getattr(part, "function_call", None)
+        function_response = getattr(part, "function_response", None)
+        if function_call is not None:
+            items.append(("tool_call", {"author": author, "name": function_call.name}))
+        elif function_response is not None:
+            items.append(("tool_result", {"author": author, "name": function_response.name}))
+    text = _extract_text_from_event(event)
+    if text:
+        # Partial events carry new tokens; the closing event repeats the full message.
+        kind = "delta" if getattr(event, "partial", False) else "message"
+        items.append((kind, {"author": author, "text": text}))
+    return items
+
+
+@app.post("/api/chatbot/query/stream")
+async def stream_root_chatbot(request: Request, payload: ChatbotQueryRequest):
+    """Server-sent events variant of /api/chatbot/query.
+
+    Emits ``session`` first, then ``tool_call`` / ``tool_result`` / ``delta`` /
+    ``message`` while the agent runs, and ``done`` with the same payload as
+    the JSON endpoint (or ``error``). The chat session is persisted after the
+    stream has closed.
+    """
+
+    turn = await _open_chat_turn(request, payload)
+    completed = False
+
+    async def event_stream():
+        nonlocal completed
+        yield _sse("session", {"sessionId": turn.session.session_id, "cache": turn.cache_status})
+
+        answer_text = turn.cached_answer
+        if answer_text is None:
+            queue: asyncio.Queue = asyncio.Queue()
+
+            async def produce() -> None:
+                try:
+                    events = get_agent_runtime().events(turn.session, turn.question, streaming=True)
+                    async with contextlib.aclosing(events):
+                        async for event in events:
+                            await queue.put(event)
+                    await queue.put(_STREAM_END)
+                except Exception as exc:  # noqa: BLE001 - reported to the client as an error event
+                    await queue.put(exc)
+
+            # The producer task copies the dataset context when it is created.
+            with dataset_context(turn.artefacts, turn.session):
+                producer = asyncio.create_task(produce())
+            answer_text = ""
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is _STREAM_END:
+                        break
+                    if isinstance(item, Exception):
+                        yield _sse("error", {"detail": f"Chatbot agent error: {item}"})
+                        return
+                    for kind, data in _stream_items(item):
+                        if kind == "message":
+                            answer_text = data["text"]
+                        yield _sse(kind, data)
+            finally:
+                producer.cancel()
+
+        answer_text = answer_text.strip()
+        _record_answer(turn, answer_text)
+        completed = True
+        yield _sse(
+            "done",
+            {
+                "answer": answer_text,
+                "cache": turn.cache_status,
+                "sessionId": turn.session.session_id,
+                "session": turn.chat_manager.session_metadata(turn.session),
+            },
+        )
+
+    async def persist() -> None:
+        if completed:
+            await _persist_chat_turn(turn)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(persist),
+    )
+
+
 @app.get("/chats")
 def get_chats():
     return [{"id": cid, "name": f"Chat {cid}"} for cid in chats]
@@ -6,6 +6,8 @@ const dataFileSchema = new mongoose.Schema(
     name: { type: String, required: true, trim: true },
     type: { type: String, required: true, trim: true },
     url: { type: String, required: true, trim: true },
+    size: { type: Number },
+    sha256: { type: String, trim: true },
   },
   { _id: false }
 );
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from pm4py.algo.discovery.footprints import algorithm as footprints_discovery
+
+from .time_index import CASE_KEY, TIMESTAMP_KEY, _epoch_ns_values
+
+ACTIVITY_KEY = "concept:name"
+START = "▶"
+END = "■"
+
+
+@dataclass(slots=True)
+class ModelRelations:
+    """Directly-follows relations a model allows, as a boolean matrix over integer activity codes.
+
+    Codes ``0..n-1`` are the activities, ``n`` is the artificial start and
+    ``n + 1`` the artificial end, so ``allowed[START, a]`` / ``allowed[a, END]``
+    encode the start and end activities.
+    """
+
+    activities: List[str]
+    allowed: np.ndarray
+
+    @property
+    def start(self) -> int:
+        return len(self.activities)
+
+    @property
+    def end(self) -> int:
+        return len(self.activities) + 1
+
+    @classmethod
+    def from_tree(cls, tree: Any) -> "ModelRelations":
+        footprints = footprints_discovery.apply(tree)
+        activities = sorted(str(a) for a in footprints.get("activities", set()))
+        index = {activity: code for code, activity in enumerate(activities)}
+        n = len(activities)
+        allowed = np.zeros((n + 2, n + 2), dtype=bool)
+        # A model footprint lists "sequence" pairs once and "parallel" pairs in both directions.
+        for a, b in set(footprints.get("sequence", set())) | set(footprints.get("parallel", set())):
+            allowed[index[str(a)], index[str(b)]] = True
+        for a in footprints.get("start_activities", set()):
+            allowed[n, index[str(a)]] = True
+        for a in footprints.get("end_activities", set()):
+            allowed[index[str(a)], n + 1] = True
+        if footprints.get("min_trace_length", 1) == 0:
+            allowed[n, n + 1] = True
+        return cls(activities=activities, allowed=allowed)
+
+
+def check_footprints(frame: pd.DataFrame, relations: ModelRelations) -> Dict[str, Any]:
+    """Compare the log's directly-follows pairs with the model's, fully vectorized.
+
+    Returns per deviating edge the number of occurrences and of distinct
+    cases, the cases with at least one deviation, and activities the model
+    does not know.
+    """
+
+    case_codes, case_ids = pd.factorize(frame[CASE_KEY], sort=False)
+    log_codes, log_activities = pd.factorize(frame[ACTIVITY_KEY], sort=False)
+    timestamps = _epoch_ns_values(frame[TIMESTAMP_KEY])
+    # Events without a case or an activity (factorize code -1) take no part in any edge.
+    has_case = (case_codes >= 0) & (log_codes >= 0)
+    case_codes = np.asarray(case_codes[has_case], dtype=np.int64)
+    timestamps = timestamps[has_case]
+    log_codes = log_codes[has_case]
+    log_activities = [str(activity) for activity in log_activities]
+
+    model_index = {activity: code for code, activity in enumerate(relations.activities)}
+    unknown = [activity for activity in log_activities if activity not in model_index]
+    # Activities the model does not contain get codes after START/END, never allowed.
+    vocabulary = {**model_index, **{activity: relations.end + 1 + i for i, activity in enumerate(unknown)}}
+    mapping = np.array([vocabulary[activity] for activity in log_activities], dtype=np.int64)
+    activity_codes = mapping[log_codes] if len(log_codes) else np.zeros(0, dtype=np.int64)
+
+    size = relations.end + 1 + len(unknown)
+    allowed = np.zeros((size, size), dtype=bool)
+    allowed[: relations.allowed.shape[0], : relations.allowed.shape[1]] = relations.allowed
+
+    # Logs are usually grouped by case and sorted by time already; only sort when they are not.
+    same_case = case_codes[1:] == case_codes[:-1]
+    if np.all(case_codes[1:] >= case_codes[:-1]) and np.all(timestamps[1:][same_case] >= timestamps[:-1][same_case]):
+        cases, acts = case_codes, activity_codes
+    else:
+        order = np.lexsort((timestamps, case_codes))
+        cases = case_codes[order]
+        acts = activity_codes[order]
+    num_cases = len(case_ids)
+
+    # Consecutive events of one case, plus START -> first and last -> END of every case.
+    first = np.ones(len(cases), dtype=bool)
+    first[1:] = cases[1:] != cases[:-1]
+    last = np.ones(len(cases), dtype=bool)
+    last[:-1] = cases[1:] != cases[:-1]
+    inner = ~last
+    sources = np.concatenate([acts[:-1][inner[:-1]], np.full(int(first.sum()), relations.start), acts[last]])
+    targets = np.concatenate([acts[1:][inner[:-1]], acts[first], np.full(int(last.sum()), relations.end)])
+    edge_cases = np.concatenate([cases[:-1][inner[:-1]], cases[first], cases[last]])
+
+    deviating = ~allowed[sources, targets]
+    edge_ids = sources[deviating] * size + targets[deviating]
+    occurrences = np.bincount(edge_ids, minlength=size * size)
+    case_edge = np.sort(edge_cases[deviating] * (size * size) + edge_ids)
+    case_edge = case_edge[np.concatenate(([True], case_edge[1:] != case_edge[:-1]))] if case_edge.size else case_edge
+    case_counts = np.bincount(case_edge % (size * size), minlength=size * size)
+
+    unfit = np.zeros(num_cases, dtype=bool)
+    unfit[edge_cases[deviating]] = True
+
+    names = relations.activities + [START, END] + unknown
+    deviations = [
+        {
+            "edge": (names[edge // size], names[edge % size]),
+            "count": int(occurrences[edge]),
+            "cases": int(case_counts[edge]),
+        }
+        for edge in np.flatnonzero(occurrences)
+    ]
+
+    unknown_cases = []
+    for i, activity in enumerate(unknown):
+        code = relations.end + 1 + i
+        unknown_cases.append((activity, int(np.unique(cases[acts == code]).size)))
+
+    # DFG of the unfit cases, without the artificial START/END edges.
+    unfit_edges = unfit[edge_cases] & (sources != relations.start) & (targets != relations.end)
+    unfit_ids = sources[unfit_edges] * size + targets[unfit_edges]
+    unfit_occurrences = np.bincount(unfit_ids, minlength=size * size)
+    unfit_dfg = {
+        (names[edge // size], names[edge % size]): int(unfit_occurrences[edge])
+        for edge in np.flatnonzero(unfit_occurrences)
+    }
+
+    return {
+        "num_cases": int(num_cases),
+        "num_unfit_cases": int(unfit.sum()),
+        "deviating_edges": deviations,
+        "unknown_activities": unknown_cases,
+        "unfit_dfg_freq": unfit_dfg,
+    }
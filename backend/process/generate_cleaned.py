@@ -8,6 +8,21 @@ import os
 import google.generativeai as genai
 from openai import OpenAI
 
+from .manifest import CleaningManifest
+from .time_index import filter_cases_intersecting
+
+try:
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pa_csv = None  # type: ignore[assignment]
+    pa_parquet = None  # type: ignore[assignment]
+
+# Định dạng event logs được chấp nhận khi upload.
+XES_LOG_EXTENSIONS = ('.xes.gz', '.xes')
+TABULAR_LOG_EXTENSIONS = ('.csv.gz', '.csv', '.parquet')
+SUPPORTED_LOG_EXTENSIONS = XES_LOG_EXTENSIONS + TABULAR_LOG_EXTENSIONS
+
 # ================== Helper functions ==================
 # Hàm trích str -> json
 async def extract_json_between_braces(text):
@@ -55,36 +70,97 @@ async def call_perplexity(prompt, PERPLEXITY_API_KEY):
 
     return(response.choices[0].message.content)
 
-# Điền khuyết giá trị thiếu.
-async def impute_groupwise(df, group_col, num_cols, cat_cols):
+# Kiểm tra file có phải event logs được hỗ trợ không.
+def is_supported_log_file(file_name):
+    return file_name.lower().endswith(SUPPORTED_LOG_EXTENSIONS)
+
+# Bỏ phần đuôi định dạng log (.xes, .xes.gz, .csv, .csv.gz, .parquet).
+def strip_log_extension(file_name):
+    lower_name = file_name.lower()
+    for extension in SUPPORTED_LOG_EXTENSIONS:
+        if lower_name.endswith(extension):
+            return file_name[:-len(extension)]
+    return os.path.splitext(file_name)[0]
+
+# Đọc CSV/Parquet bằng pyarrow (đa luồng, theo cột), fallback sang pandas nếu chưa cài pyarrow.
+def read_tabular_log(file_path):
+    lower_path = file_path.lower()
+    if lower_path.endswith('.parquet'):
+        if pa_parquet is not None:
+            table = pa_parquet.read_table(file_path, use_threads=True)
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        return pd.read_parquet(file_path)
+
+    if pa_csv is not None:
+        # pyarrow tự nhận diện nén gzip theo đuôi file (.csv.gz).
+        table = pa_csv.read_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(use_threads=True, block_size=1 << 24),
+        )
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    return pd.read_csv(file_path, compression='infer', low_memory=False)
+
+# Đọc event logs (XES hoặc CSV/Parquet) thành dataframe.
+def read_event_log_frame(file_path):
+    if file_path.lower().endswith(XES_LOG_EXTENSIONS):
+        logs = pm4py.read_xes(file_path)
+        return pm4py.convert_to_dataframe(logs)
+    return read_tabular_log(file_path)
+
+# Chuẩn hóa các cột thời gian (CSV thường lưu timestamp dạng chuỗi).
+def coerce_timestamp_columns(df, columns):
+    for col in columns:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], utc=True, errors='coerce')
+    return df
+
+# Mode (giá trị xuất hiện nhiều nhất) của từng group, không dùng callback Python cho mỗi group.
+# Đếm (group, value) trên categorical rồi lấy idxmax; hòa nhau thì lấy giá trị nhỏ nhất như Series.mode().
+def group_modes(keys, values):
+    observed = values.notna()
+    if not observed.any():
+        return pd.Series(dtype=object)
+    pairs = pd.DataFrame({
+        'key': keys[observed],
+        'value': values[observed].astype('category'),
+    })
+    counts = pairs.groupby(['key', 'value'], observed=True, sort=True).size()
+    mode_index = counts.groupby(level=0, sort=False).idxmax()
+    return pd.Series(
+        [value for _, value in mode_index.to_numpy()],
+        index=mode_index.index,
+    )
+
+# Điền khuyết giá trị thiếu (vectorized).
+#   Cột số: mean trong group, nếu cả group thiếu thì 0.
+#   Cột phân loại: mode trong group, nếu cả group thiếu thì 'Unknown'.
+def impute_groupwise(df, group_col, num_cols, cat_cols):
     df = df.copy()
+    groups = df[group_col]
 
     # ===== Xử lý cột số =====
     for col in num_cols:
-        # Tính mean theo group
-        group_mean = df.groupby(group_col)[col].transform('mean')
-        # Điền thiếu bằng mean trong group
-        df[col] = df[col].fillna(group_mean)
-        # Nếu tất cả cùng thiếu thì fallback = 0
-        df[col] = df[col].fillna(0)
+        if not df[col].isna().any():
+            continue
+        group_mean = df.groupby(group_col, sort=False, observed=True)[col].transform('mean')
+        df[col] = df[col].fillna(group_mean).fillna(0)
 
     # ===== Xử lý cột phân loại =====
     for col in cat_cols:
-        async def fill_mode(series):
-            mode_val = series.mode()
-            if not mode_val.empty:
-                return series.fillna(mode_val.iloc[0])
-            else:
-                return series  # chưa fill nếu không có mode
-        
-        df[col] = df.groupby(group_col)[col].transform(fill_mode)
-        # Fallback nếu toàn NaN trong group
-        df[col] = df[col].fillna('Unknown')
+        missing = df[col].isna()
+        if not missing.any():
+            continue
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and 'Unknown' not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories(['Unknown'])
+        modes = group_modes(groups, df[col])
+        filled = groups[missing].map(modes)
+        df.loc[missing, col] = filled.where(filled.notna(), 'Unknown')
 
     return df
 
 # ================== Main preprocessing pipeline ==================
-async def preprocess_event_logs(input_file_name, description_file_name, GEMINI_API_KEY, path='../data/'):
+#   metadata: dict (tùy chọn) để nhận lại start_end_times và main_column_names đã trích xuất bằng LLM.
+async def preprocess_event_logs(input_file_name, description_file_name, GEMINI_API_KEY, path='../data/', impute_missing=False, metadata=None):
     # Đọc file description
     input_path = os.path.join(path, input_file_name)
     description_path = os.path.join(path, description_file_name)
@@ -123,12 +199,10 @@ async def preprocess_event_logs(input_file_name, description_file_name, GEMINI_A
     start_end_times = await extract_json_between_braces(start_end_times_text)
     print('Trích xuất start_end_times.')
 
-    # Load event logs
-    logs = pm4py.read_xes(path + input_file_name)
+    # Load event logs (XES, CSV hoặc Parquet) và chuyển sang dataframe
+    df_logs = read_event_log_frame(input_path)
     print('Load event logs.')
 
-    # Chuyển event logs sang dataframe
-    df_logs = pm4py.convert_to_dataframe(logs)
     df_columns = df_logs.columns
 
     # Tìm tên cột phù hợp cho Case ID, Activities Name, Timestamp.
@@ -153,6 +227,9 @@ async def preprocess_event_logs(input_file_name, description_file_name, GEMINI_A
     main_column_names_text = await call_gemini(find_columns_name, GEMINI_API_KEY)
     main_column_names = await extract_json_between_braces(main_column_names_text)
     print('Lấy tên cột chính.')
+    if metadata is not None:
+        metadata['start_end_times'] = start_end_times
+        metadata['main_column_names'] = main_column_names
 
     # Bước 1: Kiểm tra có đủ 3 cột chính. (ID, Activity, Timestamp)
     async def check_enough_main_columns(main_column_names):
@@ -174,6 +251,7 @@ async def preprocess_event_logs(input_file_name, description_file_name, GEMINI_A
             main_column_names['activity_column']: 'concept:name',
             main_column_names['timestamp_column']: 'time:timestamp'
         }, inplace=True)
+        df_logs = coerce_timestamp_columns(df_logs, ['time:timestamp'])
 
     elif check_response == 'Enough 4 main columns.':
         df_logs.rename(columns={
@@ -182,6 +260,7 @@ async def preprocess_event_logs(input_file_name, description_file_name, GEMINI_A
             main_column_names['start_timestamp_column']: 'time:start_timestamp',
             main_column_names['end_timestamp_column']: 'time:end_timestamp'
         }, inplace=True)
+        df_logs = coerce_timestamp_columns(df_logs, ['time:start_timestamp', 'time:end_timestamp'])
 
         if 'duration' not in df_logs.columns:
             df_logs['duration'] = df_logs['time:end_timestamp'] - df_logs['time:start_timestamp']
@@ -198,7 +277,11 @@ async def preprocess_event_logs(input_file_name, description_file_name, GEMINI_A
     # Bước 4: Loại bỏ các case không có hoạt động nào nằm trong start_time -> end_time
     print('Bước 4: Loại bỏ các case không có hoạt động nào nằm trong start_time -> end_time')
     if start_end_times['start_time'] != 'NULL' and start_end_times['end_time'] != 'NULL':
-        df_logs = pm4py.filter_time_range(df_logs, start_end_times['start_time'], start_end_times['end_time'], mode='traces_intersecting')
+        if check_response == 'Enough 3 main columns.':
+            time_columns = {'start_key': 'time:timestamp'}
+        else:
+            time_columns = {'start_key': 'time:start_timestamp', 'end_key': 'time:end_timestamp'}
+        df_logs = filter_cases_intersecting(df_logs, start_end_times['start_time'], start_end_times['end_time'], **time_columns)
     else:
         print('Không tìm thấy start_end hoặc time_end. Bỏ qua bước lọc thời gian.')
 
@@ -225,37 +308,42 @@ async def preprocess_event_logs(input_file_name, description_file_name, GEMINI_A
         df_logs = df_logs.drop_duplicates(subset=['case:concept:name', 'concept:name', 'time:start_timestamp', 'time:end_timestamp'], keep='first').copy()
     print('Bước 6: Xóa các bản ghi trùng lặp ở các cột chính.')
 
-    # # Bước 7: Điền khuyết thông tin bị thiếu (ở các cột phụ), theo nguyên tắc.
-    # #   Với các ô bị thiếu, lấy thông tin từ activities cùng case và điền vào.
-    # #   Nếu cả case đều thiếu cột đó, điền 'Unknown' với categorical columns và 0 với numerical columns.
-    # num_cols = df_logs.select_dtypes(include=['number']).columns.tolist()
-    # cat_cols = df_logs.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
-    # df_logs = impute_groupwise(df_logs, 'case:concept:name', num_cols, cat_cols)
-    # print('Bước 7: Điền khuyết thông tin bị thiếu (ở các cột phụ), theo nguyên tắc')
-    # print('Tiền xử lí dữ liệu xong.')
+    # Bước 7 (tùy chọn): Điền khuyết thông tin bị thiếu (ở các cột phụ), theo nguyên tắc.
+    #   Với các ô bị thiếu, lấy thông tin từ activities cùng case và điền vào.
+    #   Nếu cả case đều thiếu cột đó, điền 'Unknown' với categorical columns và 0 với numerical columns.
+    if impute_missing:
+        num_cols = df_logs.select_dtypes(include=['number']).columns.tolist()
+        cat_cols = df_logs.select_dtypes(include=['object', 'string', 'category', 'bool']).columns.tolist()
+        df_logs = impute_groupwise(df_logs, 'case:concept:name', num_cols, cat_cols)
+        print('Bước 7: Điền khuyết thông tin bị thiếu (ở các cột phụ), theo nguyên tắc')
+    print('Tiền xử lí dữ liệu xong.')
 
     return df_logs
 
 from . import prinvohieuhoa
 import traceback
 
-async def clean_and_save_logs(folder_path, GEMINI_API_KEY=None):
+# Trả về CleaningManifest (mapping cột, start/end time, dataframe đã làm sạch) để gen_report dùng lại.
+#   persist_frame=True: lưu thêm bản Parquet của dataframe để bước report chạy ở process khác vẫn không phải đọc lại XES.
+async def clean_and_save_logs(folder_path, GEMINI_API_KEY=None, impute_missing=False, persist_frame=False):
     files = await asyncio.to_thread(os.listdir, folder_path)
 
-    log_file = next((f for f in files if f.endswith('.xes') or f.endswith('.xes.gz')), None)
+    log_file = next((f for f in files if is_supported_log_file(f) and not f.endswith(('_cleaned.xes', '_cleaned.parquet'))), None)
     desc_file = next((f for f in files if f.endswith('.txt')), None)
 
     if log_file is None or desc_file is None:
-        print("[⚠️] Không tìm thấy file log (.xes/.xes.gz) hoặc file mô tả (.txt)")
+        print("[⚠️] Không tìm thấy file log (.xes/.xes.gz/.csv/.csv.gz/.parquet) hoặc file mô tả (.txt)")
         return None
     
     # Nếu preprocess_event_logs là async def:
-    
+    metadata = {}
     clean_df = await preprocess_event_logs(
             input_file_name=log_file,
             description_file_name=desc_file,
             GEMINI_API_KEY=GEMINI_API_KEY,
-            path=folder_path)
+            path=folder_path,
+            impute_missing=impute_missing,
+            metadata=metadata)
       
 
 
@@ -275,16 +363,35 @@ async def clean_and_save_logs(folder_path, GEMINI_API_KEY=None):
     event_log = pm4py.objects.conversion.log.converter.apply(clean_df)
 
     # Đảm bảo chỉ thêm _cleaned 1 lần
-    base_name = log_file.replace('.xes.gz', '').replace('.xes', '')
+    base_name = strip_log_extension(log_file)
     output_file = f"{base_name}_cleaned.xes"
     output_path = os.path.join(folder_path, output_file)
 
     pm4py.write_xes(event_log, output_path)
     print(f"[✅] Logs đã được lưu thành công vào: {output_path}")
-    return output_file
-
-
-
-
 
+    # Dataframe giữ trong bộ nhớ có cùng cấu trúc với việc đọc lại file _cleaned.xes
+    cleaned_frame = await asyncio.to_thread(pm4py.convert_to_dataframe, event_log)
 
+    parquet_file = None
+    if persist_frame:
+        parquet_file = f"{base_name}_cleaned.parquet"
+        try:
+            await asyncio.to_thread(cleaned_frame.to_parquet, os.path.join(folder_path, parquet_file), index=False)
+        except Exception as e:
+            # Cột có kiểu dữ liệu hỗn hợp có thể không ghi được Parquet -> bước report sẽ đọc lại XES.
+            print("[⚠️] Không lưu được bản Parquet:", str(e))
+            parquet_file = None
+
+    return CleaningManifest(
+        folder_path=folder_path,
+        log_file=log_file,
+        cleaned_file=output_file,
+        description_file=desc_file,
+        column_mapping=metadata.get('main_column_names', {}),
+        time_bounds={k: str(v) for k, v in metadata.get('start_end_times', {}).items()},
+        parquet_file=parquet_file,
+        num_events=int(cleaned_frame.shape[0]),
+        num_cases=int(cleaned_frame['case:concept:name'].nunique()),
+        frame=cleaned_frame,
+    )
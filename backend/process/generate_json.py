@@ -30,7 +30,11 @@ import seaborn as sns
 import os
 from tqdm.auto import tqdm
 
-async def analysis_event_logs(input_file_name, description_file_name, GEMINI_API_KEY, path):
+from .log_analytics import write_log_analytics
+from .quantile_sketch import write_log_sketches
+from .model_cache import MODELS_ARCHIVE, MODELS_DIR, discover_models, file_fingerprint, pack_models
+
+async def analysis_event_logs(input_file_name, description_file_name, GEMINI_API_KEY, path, start_end_times=None, df_logs=None):
     # ================== Helper functions ==================
     # Hàm trích str -> json
     async def extract_json_between_braces(text):
@@ -86,16 +90,23 @@ async def analysis_event_logs(input_file_name, description_file_name, GEMINI_API
 
         Lưu ý: Chỉ trả về JSON. Không cần giải thích, không in thêm chữ nào khác. Nếu không tìm thấy, để giá trị là 'NULL'.
     """
-    start_end_times_text = await call_gemini(find_start_end_times, GEMINI_API_KEY)
-    start_end_times = await extract_json_between_braces(start_end_times_text)
-    print('Trích xuất start_end_times.')
+    if start_end_times is None:
+        start_end_times_text = await call_gemini(find_start_end_times, GEMINI_API_KEY)
+        start_end_times = await extract_json_between_braces(start_end_times_text)
+        print('Trích xuất start_end_times.')
+    else:
+        print('Dùng lại start_end_times từ bước làm sạch.')
     progress_bar.update(1)
     progress_bar.set_postfix_str("Loading logs")
 
     # ================== LOAD DATASET ==================
-    logs = pm4py.read_xes(input_file_name)
-    print('Load clean dataset.')
-    df_logs = pm4py.convert_to_dataframe(logs)
+    if df_logs is None:
+        logs = pm4py.read_xes(input_file_name)
+        print('Load clean dataset.')
+        df_logs = pm4py.convert_to_dataframe(logs)
+    else:
+        logs = df_logs
+        print('Dùng lại dataframe đã làm sạch (không đọc lại XES).')
     progress_bar.update(1)
     progress_bar.set_postfix_str("Basic statistics")
 
@@ -218,8 +229,15 @@ async def analysis_event_logs(input_file_name, description_file_name, GEMINI_API
     print('2. Process Discovery.')
     filtered_logs = pm4py.filter_variants_top_k(logs, k_variants)
 
-    tree = pm4py.discover_process_tree_inductive(filtered_logs)
-    bpmn_graph = pm4py.convert_to_bpmn(tree)
+    # Mô hình top-k (report + conformance) và mô hình toàn bộ log (process_discovery của chatbot)
+    # được lưu theo fingerprint của log để chatbot không phải khai phá lại.
+    log_fingerprint = file_fingerprint(input_file_name)
+    models_dir = path + MODELS_DIR
+    report_models = discover_models(models_dir, log_fingerprint, lambda: logs, k=k_variants, num_variants=num_variants)
+    discover_models(models_dir, log_fingerprint, lambda: logs, k=None)
+
+    tree = report_models.tree
+    bpmn_graph = report_models.bpmn
     pm4py.write_bpmn(bpmn_graph, path + "bpmn_model.bpmn")
 
     dfg_freq = dfg_discovery.apply(filtered_logs, variant=dfg_discovery.Variants.FREQUENCY)
@@ -374,7 +392,7 @@ async def analysis_event_logs(input_file_name, description_file_name, GEMINI_API
     
     # ================== CONFORMANCE CHECKING ==================
     print('4. Conformance Checking.')
-    net, initial_marking, final_marking = pm4py.discover_petri_net_inductive(filtered_logs)
+    net, initial_marking, final_marking = report_models.net, report_models.initial_marking, report_models.final_marking
     parameters_tbr = {
         token_based_replay.Variants.TOKEN_REPLAY.value.Parameters.DISABLE_VARIANTS: True,
         token_based_replay.Variants.TOKEN_REPLAY.value.Parameters.ENABLE_PLTR_FITNESS: True
@@ -641,6 +659,11 @@ async def analysis_event_logs(input_file_name, description_file_name, GEMINI_API
     # Cuối cùng: dump ra JSON
     with open(path + "report.json", "w", encoding="utf-8") as f:
         json.dump(await safe_json(report), f, indent=4, ensure_ascii=False)
+    # Kết quả của các worker tools trên toàn bộ log, để chatbot trả lời mà không cần đọc lại log.
+    write_log_analytics(path, df_logs, os.path.basename(input_file_name))
+    # Sketch percentile của thời gian chờ giữa các cặp activity và thời gian case.
+    write_log_sketches(path, df_logs)
+    pack_models(models_dir, path + MODELS_ARCHIVE)
     progress_bar.update(1)
     progress_bar.set_postfix_str("Completed")
     progress_bar.close()
@@ -649,15 +672,25 @@ async def analysis_event_logs(input_file_name, description_file_name, GEMINI_API
 
 from . import prinvohieuhoa
 import traceback
-async def gen_report(folder_path,  GEMINI_API_KEY):
+#   manifest: CleaningManifest trả về từ clean_and_save_logs (tùy chọn).
+async def gen_report(folder_path,  GEMINI_API_KEY, manifest=None):
     print(f"[ℹ️] Bắt đầu tạo report cho folder: {folder_path}")
 
-    # Liệt kê file trong folder
-    files = os.listdir(folder_path)
-    print("[ℹ️] File trong folder:", files)
+    start_end_times = None
+    df_logs = None
+    if manifest is not None:
+        log_file = manifest.cleaned_file
+        desc_file = manifest.description_file
+        if manifest.time_bounds.get('start_time') and manifest.time_bounds.get('end_time'):
+            start_end_times = manifest.time_bounds
+        df_logs = manifest.load_frame()
+    else:
+        # Liệt kê file trong folder
+        files = os.listdir(folder_path)
+        print("[ℹ️] File trong folder:", files)
 
-    log_file = next((f for f in files if f.endswith('_cleaned.xes')), None)
-    desc_file = next((f for f in files if f.endswith('.txt')), None)
+        log_file = next((f for f in files if f.endswith('_cleaned.xes')), None)
+        desc_file = next((f for f in files if f.endswith('.txt')), None)
 
     if log_file is None or desc_file is None:
         print("[⚠️] Không tìm thấy file log (_cleaned.xes) hoặc file mô tả (.txt)")
@@ -670,7 +703,14 @@ async def gen_report(folder_path,  GEMINI_API_KEY):
     print(f"[ℹ️] Desc file: {desc_file_path}")
 
     try:
-        create_report = await analysis_event_logs(log_file_path, desc_file_path, GEMINI_API_KEY, folder_path)
+        create_report = await analysis_event_logs(
+            log_file_path,
+            desc_file_path,
+            GEMINI_API_KEY,
+            folder_path,
+            start_end_times=start_end_times,
+            df_logs=df_logs,
+        )
     except Exception as e:
         print("[⚠️] Lỗi trong quá trình phân tích và tạo báo cáo:", str(e))
         traceback.print_exc()
@@ -681,4 +721,4 @@ async def gen_report(folder_path,  GEMINI_API_KEY):
         return True
 
     print("[⚠️] Report không được tạo")
-    return False
\ No newline at end of file
+    return False
@@ -1,6 +1,6 @@
 import json
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Tuple
 
 from google import genai
 from tqdm.auto import tqdm
@@ -9,6 +9,21 @@ from .__init__ import GEMINI_API_KEY as DEFAULT_GEMINI_API_KEY
 
 API_KEY = os.getenv("GEMINI_API_KEY", DEFAULT_GEMINI_API_KEY)
 
+# The report prompts mark paragraph breaks with this token.
+PARAGRAPH_SEPARATOR = "|||"
+# Max texts per embed_content call.
+EMBED_BATCH_SIZE = 100
+
+# Report sections embedded one vector each (store.json also holds a "description" vector).
+SECTION_KEYS = (
+    "dataset_overview",
+    "basic_statistics",
+    "process_discovery",
+    "performance_analysis",
+    "conformance_checking",
+    "enhancement",
+)
+
 _client: genai.Client | None = None
 
 def _get_client() -> genai.Client:
@@ -38,6 +53,34 @@ def get_embedding(text: str) -> list[float]:
     )
     return result.embeddings[0].values
 
+def get_embeddings(texts: List[str]) -> List[list[float]]:
+    """Embed many texts with one request per EMBED_BATCH_SIZE items."""
+    client = _get_client()
+    vectors: List[list[float]] = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        result = client.models.embed_content(
+            model="gemini-embedding-001",
+            contents=texts[start:start + EMBED_BATCH_SIZE],
+        )
+        vectors.extend(embedding.values for embedding in result.embeddings)
+    return vectors
+
+def split_paragraphs(text: Any) -> List[str]:
+    return [part.strip() for part in str(text or "").split(PARAGRAPH_SEPARATOR) if part.strip()]
+
+def iter_paragraphs(report: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+    """Yield (section, paragraph) for every `insights` / chart `insight` text of the report."""
+    for key in SECTION_KEYS:
+        section = report.get(key)
+        if not isinstance(section, dict):
+            continue
+        for paragraph in split_paragraphs(section.get("insights")):
+            yield key, paragraph
+        for value in section.values():
+            if isinstance(value, dict) and isinstance(value.get("insight"), str):
+                for paragraph in split_paragraphs(value["insight"]):
+                    yield key, paragraph
+
 def build_store(folder_path: str) -> str:
     if not folder_path:
         raise ValueError("folder_path must be provided")
@@ -46,16 +89,7 @@ def build_store(folder_path: str) -> str:
     if not os.path.isfile(report_path):
         raise FileNotFoundError(f"report.json not found in {folder_path}")
 
-    section_keys = [
-        "dataset_overview",
-        "basic_statistics",
-        "process_discovery",
-        "performance_analysis",
-        "conformance_checking",
-        "enhancement",
-    ]
-
-    progress_bar = tqdm(total=len(section_keys) + 4, desc="Building store", unit="step")
+    progress_bar = tqdm(total=len(SECTION_KEYS) + 5, desc="Building store", unit="step")
     try:
         progress_bar.set_postfix_str("Reading report")
         with open(report_path, "r", encoding="utf-8") as f:
@@ -65,17 +99,13 @@ def build_store(folder_path: str) -> str:
         progress_bar.set_postfix_str("Embedding description")
         store: Dict[str, Any] = {
             "description": get_embedding(_text_from_value(report.get("description"))),
-            "dataset_overview": [],
-            "basic_statistics": [],
-            "process_discovery": [],
-            "performance_analysis": [],
-            "conformance_checking": [],
-            "enhancement": [],
+            **{key: [] for key in SECTION_KEYS},
             "Q&A": {},
+            "chunks": [],
         }
         progress_bar.update(1)
 
-        for key in section_keys:
+        for key in SECTION_KEYS:
             progress_bar.set_postfix_str(f"Processing {key.replace('_', ' ')}")
             section = report.get(key) or {}
             if key == "dataset_overview":
@@ -103,6 +133,16 @@ def build_store(folder_path: str) -> str:
                 }
         progress_bar.update(1)
 
+        # Paragraph-level entries so semantic_search can return snippets instead of whole sections.
+        progress_bar.set_postfix_str("Embedding paragraphs")
+        paragraphs = list(iter_paragraphs(report))
+        vectors = get_embeddings([text for _, text in paragraphs]) if paragraphs else []
+        store["chunks"] = [
+            {"section": section, "text": text, "vector": vector}
+            for (section, text), vector in zip(paragraphs, vectors)
+        ]
+        progress_bar.update(1)
+
         store_path = os.path.join(folder_path, "store.json")
         progress_bar.set_postfix_str("Saving store")
         with open(store_path, "w", encoding="utf-8") as f:
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pm4py
+from pm4py.algo.discovery.dfg import algorithm as dfg_discovery
+from pm4py.algo.discovery.temporal_profile import algorithm as temporal_profile_discovery
+from pm4py.statistics.traces.generic.log import case_arrival
+from pm4py.statistics.variants.log import get as variants_get
+
+# Full-log results of the worker tools, written next to report.json by the report stage.
+ANALYTICS_FILE = "analytics.json"
+
+
+def basic_statistics_of(df_logs: pd.DataFrame) -> dict:
+    num_events = df_logs.shape[0]
+    num_activities = df_logs['concept:name'].nunique()
+    num_cases = df_logs['case:concept:name'].nunique()
+    variants = variants_get.get_variants(df_logs)
+    num_variants = len(variants)
+    # pm4py maps each variant to its traces; only the count is reported.
+    variants = {
+        variant: traces if isinstance(traces, (int, float)) else len(traces)
+        for variant, traces in variants.items()
+    }
+
+    activities_per_case = df_logs.groupby("case:concept:name")["concept:name"].nunique()
+    average_activities_per_case = round(activities_per_case.mean())
+    max_activities_per_case = activities_per_case.max()
+    min_activities_per_case = activities_per_case.min()
+
+    unique_case_activities = df_logs[['case:concept:name', 'concept:name']].drop_duplicates()
+    activities_frequency = unique_case_activities['concept:name'].value_counts().reset_index()
+
+    return {
+        "num_events": num_events,
+        "num_activities": num_activities,
+        "num_cases": num_cases,
+        "num_variants": num_variants,
+        "variants": variants,
+        "average_activities_per_case": average_activities_per_case,
+        "max_activities_per_case": max_activities_per_case,
+        "min_activities_per_case": min_activities_per_case,
+        "activities_frequency": activities_frequency,
+    }
+
+
+def discovery_dfgs_of(logs: Any) -> dict:
+    dfg_freq = dfg_discovery.apply(logs, variant=dfg_discovery.Variants.FREQUENCY)
+    dfg_perf = dfg_discovery.apply(logs, variant=dfg_discovery.Variants.PERFORMANCE)
+    dfg_perf = {k: round(v / 86400, 2) for k, v in dfg_perf.items()}
+    return {
+        "dfg_freq": dfg_freq,
+        "dfg_discovery": dfg_perf,
+    }
+
+
+def performance_of(logs: Any) -> dict:
+    all_case_durations = pm4py.get_all_case_durations(logs)
+    all_case_durations = [round(duration / (24 * 3600), 2) for duration in all_case_durations]
+
+    max_case_duration = max(all_case_durations)
+    mean_case_duration = round(np.mean(all_case_durations), 2)
+    min_case_duration = min(all_case_durations)
+
+    case_arrival_ratio = pm4py.get_case_arrival_average(logs)
+    case_arrival_ratio = round(case_arrival_ratio / (24 * 3600), 2)
+
+    case_dispersion_ratio = round(
+        case_arrival.get_case_dispersion_avg(
+            logs, parameters={case_arrival.Parameters.TIMESTAMP_KEY: "time:timestamp"}
+        ) / (24 * 3600),
+        2,
+    )
+
+    temporal_profile = temporal_profile_discovery.apply(logs)
+    temporal_profile_days = {
+        k: (round(v[0] / 86400, 2), round(v[1] / 86400, 2)) for k, v in temporal_profile.items()
+    }
+    return {
+        "max_case_duration_days": max_case_duration,
+        "mean_case_duration_days": mean_case_duration,
+        "min_case_duration_days": min_case_duration,
+        "case_arrival_ratio_days": case_arrival_ratio,
+        "case_dispersion_ratio_days": case_dispersion_ratio,
+        "temporal_profile_days": temporal_profile_days,
+    }
+
+
+def to_json_safe(value: Any) -> Any:
+    """Same conventions as report.json: tuple keys become ``str(key)``, frames become records."""
+
+    if isinstance(value, pd.DataFrame):
+        return to_json_safe(value.to_dict(orient="records"))
+    if isinstance(value, dict):
+        return {str(k): to_json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_safe(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def build_log_analytics(df_logs: pd.DataFrame, log_name: str) -> dict:
+    """Everything basic_statistics / process_discovery / performance_analysis return for the whole log."""
+
+    return to_json_safe(
+        {
+            "log_name": log_name,
+            "basic_statistics": basic_statistics_of(df_logs),
+            "process_discovery": discovery_dfgs_of(df_logs),
+            "performance_analysis": performance_of(df_logs),
+        }
+    )
+
+
+def write_log_analytics(folder_path: str, df_logs: pd.DataFrame, log_name: str) -> str:
+    analytics_path = os.path.join(folder_path, ANALYTICS_FILE)
+    with open(analytics_path, "w", encoding="utf-8") as f:
+        json.dump(build_log_analytics(df_logs, log_name), f, ensure_ascii=False)
+    return analytics_path
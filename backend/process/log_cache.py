@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from .generate_cleaned import read_event_log_frame
+
+PARSED_LOG_CACHE_MAX_BYTES = int(os.getenv("PARSED_LOG_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+CacheKey = Tuple[str, int, int]
+
+
+@dataclass(slots=True)
+class _Entry:
+    frame: pd.DataFrame
+    nbytes: int
+    # Structures derived from the frame (time index, ...), built on demand and evicted with it.
+    derived: Dict[str, Any] = field(default_factory=dict)
+
+
+def _file_key(path: Union[str, Path]) -> CacheKey:
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    return str(resolved), stat.st_mtime_ns, stat.st_size
+
+
+def _frame_nbytes(frame: pd.DataFrame) -> int:
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def read_only_view(frame: pd.DataFrame) -> pd.DataFrame:
+    """Shallow copy sharing the cached column data.
+
+    Adding, dropping or renaming columns on the view leaves the cached frame
+    untouched; callers must not write values in place.
+    """
+
+    return frame.copy(deep=False)
+
+
+class ParsedLogCache:
+    """Process-wide LRU of parsed event logs keyed by (path, mtime, size), bounded by bytes held.
+
+    A file is parsed once per version even when several tools ask for it at
+    the same time (single-flight per key). A changed file gets a new key and
+    replaces the entry of its previous version.
+    """
+
+    def __init__(self, max_bytes: int = PARSED_LOG_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[CacheKey, threading.Lock] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _lookup(self, key: CacheKey) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _entry(self, path: Union[str, Path]) -> _Entry:
+        key = _file_key(path)
+        entry = self._lookup(key)
+        if entry is not None:
+            with self._lock:
+                self._hits += 1
+            return entry
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                with self._lock:
+                    self._hits += 1
+                return entry
+            frame = read_event_log_frame(key[0])
+            entry = _Entry(frame=frame, nbytes=_frame_nbytes(frame))
+            with self._lock:
+                self._misses += 1
+                self._key_locks.pop(key, None)
+                # Older versions of the same file can no longer be requested.
+                for stale in [other for other in self._entries if other[0] == key[0]]:
+                    self._bytes -= self._entries.pop(stale).nbytes
+                if entry.nbytes <= self.max_bytes:
+                    self._entries[key] = entry
+                    self._bytes += entry.nbytes
+                    self._evict()
+            return entry
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self._evictions += 1
+
+    def get(self, path: Union[str, Path]) -> pd.DataFrame:
+        """Return a read-only view of the parsed log at ``path``."""
+
+        return read_only_view(self._entry(path).frame)
+
+    def get_derived(self, path: Union[str, Path], name: str, builder: Callable[[pd.DataFrame], Any]) -> Tuple[pd.DataFrame, Any]:
+        """Return (view, derived) where ``derived = builder(frame)`` is computed once per cached log."""
+
+        entry = self._entry(path)
+        derived = entry.derived.get(name)
+        if derived is None:
+            derived = builder(entry.frame)
+            entry.derived[name] = derived
+        return read_only_view(entry.frame), derived
+
+    def invalidate(self, path: Optional[Union[str, Path]] = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            resolved = str(Path(path).resolve())
+            for key in [key for key in self._entries if key[0] == resolved]:
+                self._bytes -= self._entries.pop(key).nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "evictions": self._evictions,
+            }
+
+
+_parsed_logs = ParsedLogCache()
+
+
+def get_event_log(path: Union[str, Path]) -> pd.DataFrame:
+    """Parsed event log at ``path`` as a read-only DataFrame view, shared across tools."""
+
+    return _parsed_logs.get(path)
+
+
+def get_event_log_with(path: Union[str, Path], name: str, builder: Callable[[pd.DataFrame], Any]) -> Tuple[pd.DataFrame, Any]:
+    return _parsed_logs.get_derived(path, name, builder)
+
+
+def invalidate_event_log(path: Optional[Union[str, Path]] = None) -> None:
+    _parsed_logs.invalidate(path)
+
+
+def log_cache_stats() -> dict:
+    return _parsed_logs.stats()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import pandas as pd
+
+from .log_cache import get_event_log_with, read_only_view
+from .time_index import CaseWindowIndex, to_epoch_ns
+
+# Time-window slices kept materialised; older ones are rebuilt from the window index on demand.
+LOG_SLICE_CACHE_SIZE = int(os.getenv("LOG_SLICE_CACHE_SIZE", "8"))
+
+SLICE_SEPARATOR = "@"
+_SLICE_TIME_FORMAT = "%Y%m%dT%H%M%S"
+_SLICE_NAME_RE = re.compile(rf"^(?P<source>.+){SLICE_SEPARATOR}(?P<start>\d{{8}}T\d{{6}})__(?P<end>\d{{8}}T\d{{6}})$")
+
+SliceKey = Tuple[str, int, int, int, int]
+
+_slices: "OrderedDict[SliceKey, pd.DataFrame]" = OrderedDict()
+_slices_lock = threading.Lock()
+
+
+def slice_name(source_name: str, start: datetime, end: datetime) -> str:
+    """Handle for the cases of ``source_name`` intersecting ``(start, end)``, e.g. ``log.xes@20200101T000000__20200201T000000``."""
+
+    return f"{source_name}{SLICE_SEPARATOR}{start:{_SLICE_TIME_FORMAT}}__{end:{_SLICE_TIME_FORMAT}}"
+
+
+def parse_slice_name(name: str) -> Optional[Tuple[str, datetime, datetime]]:
+    match = _SLICE_NAME_RE.match(name.strip())
+    if match is None:
+        return None
+    return (
+        match.group("source"),
+        datetime.strptime(match.group("start"), _SLICE_TIME_FORMAT),
+        datetime.strptime(match.group("end"), _SLICE_TIME_FORMAT),
+    )
+
+
+def _window_index(source_path: Union[str, Path]) -> Tuple[pd.DataFrame, CaseWindowIndex]:
+    return get_event_log_with(source_path, "case_window_index", CaseWindowIndex.from_frame)
+
+
+def get_log_slice(source_path: Union[str, Path], start: datetime, end: datetime) -> pd.DataFrame:
+    """Events of the cases intersecting ``(start, end)`` as a read-only frame, without writing any file."""
+
+    resolved = Path(source_path).resolve()
+    stat = resolved.stat()
+    key = (str(resolved), stat.st_mtime_ns, stat.st_size, to_epoch_ns(start), to_epoch_ns(end))
+    with _slices_lock:
+        cached = _slices.get(key)
+        if cached is not None:
+            _slices.move_to_end(key)
+            return read_only_view(cached)
+
+    frame, index = _window_index(resolved)
+    window = frame.take(index.event_rows(start, end))
+    with _slices_lock:
+        _slices[key] = window
+        while len(_slices) > LOG_SLICE_CACHE_SIZE:
+            _slices.popitem(last=False)
+    return read_only_view(window)
+
+
+def is_slice_cached(source_path: Union[str, Path], start: datetime, end: datetime) -> bool:
+    resolved = Path(source_path).resolve()
+    if not resolved.exists():
+        return False
+    stat = resolved.stat()
+    key = (str(resolved), stat.st_mtime_ns, stat.st_size, to_epoch_ns(start), to_epoch_ns(end))
+    with _slices_lock:
+        return key in _slices
+
+
+def log_slice_stats() -> dict:
+    with _slices_lock:
+        return {
+            "entries": len(_slices),
+            "max_entries": LOG_SLICE_CACHE_SIZE,
+            "events": sum(len(window) for window in _slices.values()),
+        }
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import pm4py
+
+
+@dataclass(slots=True)
+class CleaningManifest:
+    """Metadata handed from ``clean_and_save_logs`` to ``gen_report``.
+
+    Carries what the cleaning stage already resolved (column mapping and the
+    start/end time extracted from the description) plus a handle to the
+    cleaned frame, so the report stage neither re-asks the LLM nor re-parses
+    the ``_cleaned.xes`` it just wrote. ``frame`` lives only in memory; the
+    JSON form produced by ``to_dict`` points at the optional Parquet copy.
+    """
+
+    folder_path: str
+    log_file: str
+    cleaned_file: str
+    description_file: str
+    column_mapping: Dict[str, str] = field(default_factory=dict)
+    time_bounds: Dict[str, str] = field(default_factory=dict)
+    parquet_file: Optional[str] = None
+    num_events: int = 0
+    num_cases: int = 0
+    frame: Optional[pd.DataFrame] = field(default=None, repr=False, compare=False)
+
+    @property
+    def cleaned_path(self) -> str:
+        return os.path.join(self.folder_path, self.cleaned_file)
+
+    def load_frame(self) -> pd.DataFrame:
+        """Return the cleaned event frame: memory first, then Parquet, then XES."""
+
+        if self.frame is not None:
+            return self.frame
+        if self.parquet_file:
+            parquet_path = os.path.join(self.folder_path, self.parquet_file)
+            if os.path.exists(parquet_path):
+                self.frame = pd.read_parquet(parquet_path)
+                return self.frame
+        self.frame = pm4py.convert_to_dataframe(pm4py.read_xes(self.cleaned_path))
+        return self.frame
+
+    def release_frame(self) -> None:
+        self.frame = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "log_file": self.log_file,
+            "cleaned_file": self.cleaned_file,
+            "description_file": self.description_file,
+            "column_mapping": dict(self.column_mapping),
+            "time_bounds": dict(self.time_bounds),
+            "parquet_file": self.parquet_file,
+            "num_events": self.num_events,
+            "num_cases": self.num_cases,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any], folder_path: str) -> "CleaningManifest":
+        return cls(
+            folder_path=folder_path,
+            log_file=payload.get("log_file", ""),
+            cleaned_file=payload["cleaned_file"],
+            description_file=payload.get("description_file", ""),
+            column_mapping=dict(payload.get("column_mapping") or {}),
+            time_bounds=dict(payload.get("time_bounds") or {}),
+            parquet_file=payload.get("parquet_file"),
+            num_events=int(payload.get("num_events") or 0),
+            num_cases=int(payload.get("num_cases") or 0),
+        )
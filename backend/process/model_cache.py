@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import pm4py
+
+# Discovered models live in <dataset dir>/models/<fingerprint>_k<k>/ and are shipped as models.zip.
+MODELS_DIR = "models"
+MODELS_ARCHIVE = "models.zip"
+# Model directories kept on disk per dataset; the least recently used are removed.
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", "32"))
+_MEMORY_ENTRIES = 16
+
+_TREE_FILE = "tree.ptml"
+_NET_FILE = "net.pnml"
+_BPMN_FILE = "model.bpmn"
+
+PathLike = Union[str, Path]
+
+
+@dataclass(slots=True)
+class DiscoveredModel:
+    tree: Any
+    net: Any
+    initial_marking: Any
+    final_marking: Any
+    bpmn: Any
+
+
+_loaded: "OrderedDict[str, DiscoveredModel]" = OrderedDict()
+_loaded_lock = threading.Lock()
+_file_digests: Dict[Tuple[str, int, int], str] = {}
+_key_locks: Dict[str, threading.Lock] = {}
+
+
+def file_fingerprint(path: PathLike) -> str:
+    """sha256 of a log file, memoised per (path, mtime, size)."""
+
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    key = (str(resolved), stat.st_mtime_ns, stat.st_size)
+    digest = _file_digests.get(key)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with resolved.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        _file_digests[key] = digest
+    return digest
+
+
+def derived_fingerprint(fingerprint: str, detail: str) -> str:
+    """Fingerprint of a log derived from another one (e.g. a time window)."""
+
+    return hashlib.sha256(f"{fingerprint}|{detail}".encode("utf-8")).hexdigest()
+
+
+def model_key(fingerprint: str, k: Optional[int], num_variants: Optional[int] = None) -> str:
+    """``k`` is the top-k variant cut-off; None (or k covering every variant) means the whole log."""
+
+    if k is None or (num_variants is not None and k >= num_variants):
+        return f"{fingerprint[:32]}_kall"
+    return f"{fingerprint[:32]}_k{int(k)}"
+
+
+def save_models(models_dir: PathLike, key: str, model: DiscoveredModel) -> Path:
+    models_dir = Path(models_dir)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    target = models_dir / key
+    staging = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=models_dir))
+    try:
+        pm4py.write_ptml(model.tree, str(staging / _TREE_FILE))
+        pm4py.write_pnml(model.net, model.initial_marking, model.final_marking, str(staging / _NET_FILE))
+        pm4py.write_bpmn(model.bpmn, str(staging / _BPMN_FILE))
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        os.replace(staging, target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    _prune(models_dir)
+    return target
+
+
+def load_models(models_dir: PathLike, key: str) -> Optional[DiscoveredModel]:
+    target = Path(models_dir) / key
+    if not all((target / name).is_file() for name in (_TREE_FILE, _NET_FILE, _BPMN_FILE)):
+        return None
+    net, initial_marking, final_marking = pm4py.read_pnml(str(target / _NET_FILE))
+    model = DiscoveredModel(
+        tree=pm4py.read_ptml(str(target / _TREE_FILE)),
+        net=net,
+        initial_marking=initial_marking,
+        final_marking=final_marking,
+        bpmn=pm4py.read_bpmn(str(target / _BPMN_FILE)),
+    )
+    # Recently used models survive _prune.
+    os.utime(target)
+    return model
+
+
+def mine_models(logs: Any, k: Optional[int]) -> DiscoveredModel:
+    """Inductive miner on the top-``k`` variants; the Petri net and BPMN are conversions of the tree."""
+
+    if k is not None:
+        logs = pm4py.filter_variants_top_k(logs, k)
+    tree = pm4py.discover_process_tree_inductive(logs)
+    net, initial_marking, final_marking = pm4py.convert_to_petri_net(tree)
+    return DiscoveredModel(
+        tree=tree,
+        net=net,
+        initial_marking=initial_marking,
+        final_marking=final_marking,
+        bpmn=pm4py.convert_to_bpmn(tree),
+    )
+
+
+def discover_models(
+    models_dir: PathLike,
+    fingerprint: str,
+    load_logs: Callable[[], Any],
+    *,
+    k: Optional[int] = None,
+    num_variants: Optional[int] = None,
+) -> DiscoveredModel:
+    """Models of the log identified by ``fingerprint``, mined (from ``load_logs()``) only when not cached.
+
+    A changed log has a different fingerprint, so it never reuses models of
+    its previous version; those age out of the on-disk LRU.
+    """
+
+    key = model_key(fingerprint, k, num_variants)
+    memory_key = f"{Path(models_dir).resolve()}/{key}"
+    with _loaded_lock:
+        model = _loaded.get(memory_key)
+        if model is not None:
+            _loaded.move_to_end(memory_key)
+            return model
+        key_lock = _key_locks.setdefault(memory_key, threading.Lock())
+
+    with key_lock:
+        with _loaded_lock:
+            model = _loaded.get(memory_key)
+        if model is None:
+            model = load_models(models_dir, key)
+            if model is None:
+                model = mine_models(load_logs(), None if key.endswith("_kall") else k)
+                save_models(models_dir, key, model)
+        with _loaded_lock:
+            _loaded[memory_key] = model
+            _loaded.move_to_end(memory_key)
+            while len(_loaded) > _MEMORY_ENTRIES:
+                _loaded.popitem(last=False)
+            _key_locks.pop(memory_key, None)
+    return model
+
+
+def _prune(models_dir: Path) -> None:
+    entries = sorted(
+        (path for path in models_dir.iterdir() if path.is_dir() and not path.name.startswith(".")),
+        key=lambda path: path.stat().st_mtime_ns,
+    )
+    for stale in entries[:-MODEL_CACHE_MAX_ENTRIES]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def pack_models(models_dir: PathLike, archive_path: PathLike) -> Optional[Path]:
+    """Zip every model directory (for upload as the dataset's ``models`` artefact)."""
+
+    models_dir = Path(models_dir)
+    if not models_dir.is_dir():
+        return None
+    archive_path = Path(archive_path)
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for path in sorted(models_dir.rglob("*")):
+            if path.is_file() and not any(part.startswith(".") for part in path.relative_to(models_dir).parts):
+                archive.write(path, path.relative_to(models_dir).as_posix())
+    return archive_path
+
+
+def unpack_models(archive_path: PathLike, models_dir: PathLike) -> None:
+    """Extract model directories that are not on disk yet (keys are content-addressed)."""
+
+    models_dir = Path(models_dir)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    root = models_dir.resolve()
+    with zipfile.ZipFile(archive_path) as archive:
+        for member in archive.namelist():
+            target = (models_dir / member).resolve()
+            if root not in target.parents or target.exists():
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with archive.open(member) as source, target.open("wb") as sink:
+                shutil.copyfileobj(source, sink)
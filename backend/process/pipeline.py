@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+from .generate_cleaned import clean_and_save_logs
+from .generate_json import gen_report
+from .generate_store import build_store
+from .manifest import CleaningManifest
+
+# Các bước của pipeline xử lí 1 event log: clean -> report -> store.
+PIPELINE_STAGES = ('clean', 'report', 'store')
+
+
+# Chạy pipeline trên 1 folder (chứa đúng 1 file log và 1 file mô tả .txt).
+#   state: dict các bước đã hoàn thành ({stage: output}); bước nào đã có thì bỏ qua để chạy tiếp (resume).
+#   on_stage_done(stage, state): callback sau mỗi bước, dùng để lưu state ra file.
+#   persist_frame: lưu dataframe đã làm sạch ra Parquet để lần resume sau không phải đọc lại XES.
+# state['clean'] là CleaningManifest dạng dict; bước report dùng lại manifest thay vì hỏi lại LLM và đọc lại log.
+async def run_pipeline(folder_path, GEMINI_API_KEY=None, impute_missing=False, state=None, on_stage_done=None, persist_frame=False):
+    if not folder_path.endswith(os.sep):
+        folder_path = folder_path + os.sep
+    state = {} if state is None else state
+
+    async def stage_done(stage, output):
+        state[stage] = output
+        if on_stage_done is not None:
+            await asyncio.to_thread(on_stage_done, stage, state)
+
+    if 'clean' not in state:
+        manifest = await clean_and_save_logs(
+            folder_path,
+            GEMINI_API_KEY,
+            impute_missing=impute_missing,
+            persist_frame=persist_frame,
+        )
+        if manifest is None:
+            raise RuntimeError("Unable to preprocess logs")
+        await stage_done('clean', manifest.to_dict())
+    else:
+        manifest = CleaningManifest.from_dict(state['clean'], folder_path)
+
+    if 'report' not in state:
+        try:
+            report_success = await gen_report(folder_path, GEMINI_API_KEY, manifest=manifest)
+        finally:
+            manifest.release_frame()
+        if not report_success:
+            raise RuntimeError("Failed to generate report")
+        await stage_done('report', 'report.json')
+
+    if 'store' not in state:
+        print("[i] Generating store.json from report")
+        store_path = await asyncio.to_thread(build_store, folder_path)
+        await stage_done('store', os.path.basename(store_path))
+
+    return state
@@ -0,0 +1,396 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .quantile_sketch import LogSketches
+from .time_index import CASE_KEY, TIMESTAMP_KEY, _INT64_MIN, _epoch_ns_values
+
+ACTIVITY_KEY = "concept:name"
+# Processes the replications are spread over (1 = simulate in the calling process).
+SIMULATION_WORKERS = int(os.getenv("SIMULATION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Upper bound on replications x cases of one call.
+SIMULATION_MAX_TRACES = int(os.getenv("SIMULATION_MAX_TRACES", "2000000"))
+# Simulation models of time-window slices kept in memory (full logs live with their parsed frame).
+SIMULATION_MODEL_CACHE_SIZE = int(os.getenv("SIMULATION_MODEL_CACHE_SIZE", "8"))
+
+# Traces simulated per task; fixed so results do not depend on the number of workers.
+_CHUNK_TRACES = 25_000
+# Smaller jobs are not worth shipping to the pool.
+_MIN_POOL_TRACES = 2 * _CHUNK_TRACES
+# Points of the inverse CDF each edge duration is sampled from.
+_QUANTILE_POINTS = 200
+_QUANTILE_GRID = (np.arange(_QUANTILE_POINTS) + 0.5) / _QUANTILE_POINTS
+# Load elasticities are fitted on activities with at least this many timed occurrences, and capped.
+_MIN_ELASTICITY_EVENTS = 30
+_MAX_ELASTICITY = 2.0
+_DAY_NS = 86_400 * 10**9
+
+_models: "OrderedDict[str, SimulationModel]" = OrderedDict()
+_models_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class SimulationModel:
+    """Routing and load of an event log, as a Markov chain over its directly-follows graph.
+
+    ``transitions[a]`` are the probabilities of moving from activity ``a`` to
+    each activity, the last column being the end of the case. ``edges``
+    lists the observed directly-follows pairs; ``edge_ids[a, b]`` is the
+    position of ``(a, b)`` in it (-1 if never observed).
+    ``load_elasticity[a]`` is how the time to reach ``a`` grows with its
+    daily volume (time ~ volume ** elasticity), fitted on the log itself;
+    0 means busier days are not slower.
+    """
+
+    activities: List[str]
+    start_probabilities: np.ndarray
+    transitions: np.ndarray
+    edges: List[Tuple[str, str]]
+    edge_ids: np.ndarray
+    arrivals_per_day: Optional[float]
+    load_elasticity: np.ndarray
+    num_cases: int
+    max_length: int
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "SimulationModel":
+        case_codes, _ = pd.factorize(frame[CASE_KEY], sort=False)
+        activity_codes, activities = pd.factorize(frame[ACTIVITY_KEY].astype(str), sort=False)
+        timestamps = _epoch_ns_values(frame[TIMESTAMP_KEY])
+        keep = (case_codes >= 0) & (activity_codes >= 0) & (timestamps != _INT64_MIN)
+        case_codes = np.asarray(case_codes[keep], dtype=np.int64)
+        activity_codes = np.asarray(activity_codes[keep], dtype=np.int64)
+        timestamps = timestamps[keep]
+        if not case_codes.size:
+            raise ValueError("The log has no events with a case id, an activity and a timestamp.")
+
+        # Same event order as the DFG and the sketches: by case, then time.
+        order = np.lexsort((timestamps, case_codes))
+        case_codes, activity_codes, timestamps = case_codes[order], activity_codes[order], timestamps[order]
+        same_case = case_codes[1:] == case_codes[:-1]
+        first = np.ones(case_codes.size, dtype=bool)
+        first[1:] = ~same_case
+        last = np.ones(case_codes.size, dtype=bool)
+        last[:-1] = ~same_case
+
+        n = len(activities)
+        starts = np.bincount(activity_codes[first], minlength=n).astype(np.float64)
+        counts = np.zeros((n, n + 1), dtype=np.float64)
+        np.add.at(counts, (activity_codes[:-1][same_case], activity_codes[1:][same_case]), 1)
+        np.add.at(counts, (activity_codes[last], n), 1)
+
+        sources, targets = np.nonzero(counts[:, :n])
+        edge_ids = np.full((n, n), -1, dtype=np.int64)
+        edge_ids[sources, targets] = np.arange(sources.size)
+
+        case_starts = np.sort(timestamps[first])
+        span_days = (case_starts[-1] - case_starts[0]) / _DAY_NS
+        arrivals_per_day = (case_starts.size - 1) / span_days if span_days > 0 else None
+
+        bounds = np.flatnonzero(first).tolist() + [case_codes.size]
+        return cls(
+            activities=[str(activity) for activity in activities],
+            start_probabilities=starts / starts.sum(),
+            transitions=counts / counts.sum(axis=1, keepdims=True),
+            edges=[(str(activities[a]), str(activities[b])) for a, b in zip(sources.tolist(), targets.tolist())],
+            edge_ids=edge_ids,
+            arrivals_per_day=arrivals_per_day,
+            load_elasticity=_load_elasticity(activity_codes, timestamps, first, n),
+            num_cases=int(case_starts.size),
+            max_length=int(np.diff(bounds).max()),
+        )
+
+    @property
+    def edge_targets(self) -> np.ndarray:
+        targets = np.empty(len(self.edges), dtype=np.int64)
+        rows, cols = np.nonzero(self.edge_ids >= 0)
+        targets[self.edge_ids[rows, cols]] = cols
+        return targets
+
+
+def _load_elasticity(activity_codes: np.ndarray, timestamps: np.ndarray, first: np.ndarray, n: int) -> np.ndarray:
+    """Per activity, the slope of log(time to reach it) over log(its volume that day)."""
+
+    days = (timestamps - timestamps.min()) // _DAY_NS
+    _, day_slots, volumes = np.unique(activity_codes * (int(days.max()) + 1) + days, return_inverse=True, return_counts=True)
+    waits = np.zeros(timestamps.size, dtype=np.float64)
+    waits[1:] = (timestamps[1:] - timestamps[:-1]) / 1e9
+    timed = ~first & (waits >= 1.0)
+    codes = activity_codes[timed]
+    x = np.log(volumes[day_slots.ravel()][timed].astype(np.float64))
+    y = np.log(waits[timed])
+
+    def total(values=None):
+        return np.bincount(codes, weights=values, minlength=n)
+
+    count, sx, sy = total(), total(x), total(y)
+    variance = count * total(x * x) - sx * sx
+    fitted = (count >= _MIN_ELASTICITY_EVENTS) & (variance > 1e-9 * np.maximum(count, 1) ** 2)
+    elasticity = np.zeros(n, dtype=np.float64)
+    elasticity[fitted] = (count * total(x * y) - sx * sy)[fitted] / variance[fitted]
+    # Quieter days being slower is not a congestion effect; treat it as none.
+    return np.clip(elasticity, 0.0, _MAX_ELASTICITY)
+
+
+@dataclass(slots=True)
+class EdgeDurations:
+    """Inverse CDF of the duration (seconds) of every edge: ``grid[e]`` at quantiles ``_QUANTILE_GRID``.
+
+    The duration of an edge ``(a, b)`` is the time from ``a`` to the
+    directly following ``b``, i.e. the time it takes to get ``b`` done.
+    """
+
+    source: str
+    grid: np.ndarray
+
+    @classmethod
+    def from_sketches(cls, edges: Sequence[Tuple[str, str]], sketches: LogSketches) -> "EdgeDurations":
+        grid = np.zeros((len(edges), _QUANTILE_POINTS), dtype=np.float64)
+        for position, edge in enumerate(edges):
+            sketch = sketches.pairs.get(edge)
+            if sketch is not None and sketch.count:
+                grid[position] = [sketch.quantile(q) for q in _QUANTILE_GRID]
+        return cls(source="sketch", grid=grid)
+
+    @classmethod
+    def from_temporal_profile(cls, edges: Sequence[Tuple[str, str]], profile: Dict[Tuple[str, str], Tuple[float, float]]) -> "EdgeDurations":
+        """Log-normal durations matching the mean and standard deviation of each pair."""
+
+        moments = np.array([profile.get(edge, (0.0, 0.0)) for edge in edges], dtype=np.float64).reshape(-1, 2)
+        mean = np.maximum(moments[:, 0], 0.0)
+        std = np.maximum(moments[:, 1], 0.0)
+        positive = mean > 0
+        sigma2 = np.zeros_like(mean)
+        sigma2[positive] = np.log1p((std[positive] / mean[positive]) ** 2)
+        mu = np.where(positive, np.log(np.where(positive, mean, 1.0)) - sigma2 / 2, 0.0)
+        z = np.array([NormalDist().inv_cdf(q) for q in _QUANTILE_GRID])
+        grid = np.where(positive[:, None], np.exp(mu[:, None] + np.sqrt(sigma2)[:, None] * z[None, :]), 0.0)
+        return cls(source="temporal_profile", grid=grid)
+
+
+@dataclass(slots=True)
+class Scenario:
+    """A what-if: case arrival rate and activity durations scaled by factors (1.0 = as observed)."""
+
+    name: str
+    arrival_factor: float = 1.0
+    duration_factors: Dict[str, float] = field(default_factory=dict)
+
+    def edge_scales(self, model: SimulationModel) -> np.ndarray:
+        """Factor applied to each edge duration: the activity's own change times its congestion."""
+
+        speed = np.ones(len(model.activities))
+        for position, activity in enumerate(model.activities):
+            speed[position] = self.duration_factors.get(activity, 1.0)
+        return (speed * self.congestion(model))[model.edge_targets]
+
+    def congestion(self, model: SimulationModel) -> np.ndarray:
+        """Per activity, how much longer it takes to reach at the scenario's arrival rate."""
+
+        return self.arrival_factor ** model.load_elasticity
+
+
+_CHANGE_RE = re.compile(
+    r"^(?P<target>.+?)\s*(?:"
+    r"[x×*]\s*(?P<factor>\d+(?:\.\d+)?)"
+    r"|(?P<percent>[+-]?\d+(?:\.\d+)?)\s*%\s*(?P<direction>faster|slower|more|less)?"
+    r")$",
+    re.IGNORECASE,
+)
+_ARRIVAL_TARGETS = {"arrival", "arrivals", "arrival rate", "arrival_rate", "cases", "demand"}
+
+
+def _parse_change(text: str, activities: Dict[str, str]) -> Tuple[Optional[str], float]:
+    match = _CHANGE_RE.match(text.strip())
+    if match is None:
+        raise ValueError(
+            f"Cannot read scenario change {text!r}; use e.g. \"Approve x0.8\", \"Approve 20% faster\" or \"arrival x1.5\"."
+        )
+    target = match.group("target").strip().strip("\"'")
+    is_arrival = target.lower() in _ARRIVAL_TARGETS
+    if match.group("factor") is not None:
+        factor = float(match.group("factor"))
+    else:
+        percent = float(match.group("percent")) / 100
+        direction = (match.group("direction") or "").lower()
+        if direction:
+            # Faster work means shorter durations, but a faster arrival rate means more cases.
+            grows = direction in ("slower", "more") if not is_arrival else direction in ("faster", "more")
+            percent = abs(percent) if grows else -abs(percent)
+        elif not match.group("percent").startswith(("+", "-")):
+            raise ValueError(f"Say whether {text!r} is faster or slower (or use +/-).")
+        factor = 1 + percent
+    if factor <= 0:
+        raise ValueError(f"Scenario change {text!r} gives a non-positive factor.")
+    if is_arrival:
+        return None, factor
+    activity = activities.get(target.lower())
+    if activity is None:
+        raise ValueError(f"Activity {target!r} is not in the log.")
+    return activity, factor
+
+
+def parse_scenarios(scenarios: Any, activities: Sequence[str]) -> List[Scenario]:
+    """Baseline plus the scenarios of ``"A 20% faster; arrival x1.5 & B x0.5"`` (or a list of such strings).
+
+    Scenarios are separated by ``;`` (or given as list items) and the changes
+    within one scenario by ``&``.
+    """
+
+    if isinstance(scenarios, str):
+        items = [] if scenarios.strip() in ("", "NULL") else scenarios.split(";")
+    else:
+        items = [str(item) for item in (scenarios or [])]
+    by_name = {activity.lower(): activity for activity in activities}
+
+    parsed = [Scenario(name="baseline")]
+    for item in items:
+        if not item.strip():
+            continue
+        scenario = Scenario(name=" & ".join(part.strip() for part in item.split("&") if part.strip()))
+        for part in item.split("&"):
+            if not part.strip():
+                continue
+            activity, factor = _parse_change(part, by_name)
+            if activity is None:
+                scenario.arrival_factor *= factor
+            else:
+                scenario.duration_factors[activity] = scenario.duration_factors.get(activity, 1.0) * factor
+        parsed.append(scenario)
+    return parsed
+
+
+def _simulate_chunk(
+    start_probabilities: np.ndarray,
+    transitions: np.ndarray,
+    edge_ids: np.ndarray,
+    grid: np.ndarray,
+    edge_scales: np.ndarray,
+    num_traces: int,
+    max_steps: int,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    """Throughput times (seconds) of ``num_traces`` simulated cases under every scenario.
+
+    Returns a ``(scenarios, num_traces)`` array, NaN for cases still running
+    after ``max_steps`` activities. Scenarios share the sampled routes and
+    duration quantiles (common random numbers), so their differences come
+    from the scenarios only.
+    """
+
+    rng = np.random.default_rng(seed)
+    n = len(start_probabilities)
+    start_cdf = np.cumsum(start_probabilities)
+    start_cdf[-1] = 1.0
+    step_cdf = np.cumsum(transitions, axis=1)
+    step_cdf[:, -1] = 1.0
+    # Row a lives in [a, a + 1], so one searchsorted samples the next step of every case.
+    flat_cdf = (step_cdf + np.arange(n)[:, None]).ravel()
+    last_point = grid.shape[1] - 1
+
+    state = np.searchsorted(start_cdf, rng.random(num_traces), side="right")
+    active = np.arange(num_traces)
+    totals = np.zeros((edge_scales.shape[0], num_traces), dtype=np.float64)
+    for _ in range(max_steps):
+        if not active.size:
+            break
+        following = np.searchsorted(flat_cdf, state + rng.random(active.size), side="right") - state * (n + 1)
+        following = np.minimum(following, n)
+        moving = following < n
+        state, active, following = state[moving], active[moving], following[moving]
+
+        position = rng.random(active.size) * last_point
+        lower = position.astype(np.int64)
+        upper = np.minimum(lower + 1, last_point)
+        edge = edge_ids[state, following]
+        duration = grid[edge, lower] + (position - lower) * (grid[edge, upper] - grid[edge, lower])
+        totals[:, active] += edge_scales[:, edge] * duration
+        state = following
+    totals[:, active] = np.nan
+    return totals
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_simulation_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def simulate_throughput_times(
+    model: SimulationModel,
+    durations: EdgeDurations,
+    scenarios: Sequence[Scenario],
+    replications: int,
+    cases: int,
+    seed: int = 0,
+) -> np.ndarray:
+    """``(scenarios, replications, cases)`` simulated throughput times in seconds.
+
+    Replications are simulated in fixed-size chunks, spread over the
+    process pool when the job is large enough; each chunk has its own seed
+    derived from ``seed``, so results are reproducible.
+    """
+
+    scales = np.stack([scenario.edge_scales(model) for scenario in scenarios]) if model.edges else np.ones((len(scenarios), 0))
+    # Loops are kept by the step cap; cases running past it are reported as truncated.
+    max_steps = max(4 * model.max_length, model.max_length + 50)
+    per_chunk = max(1, _CHUNK_TRACES // cases)
+    sizes = [min(per_chunk, replications - start) for start in range(0, replications, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    arguments = [
+        (model.start_probabilities, model.transitions, model.edge_ids, durations.grid, scales, size * cases, max_steps, chunk_seed)
+        for size, chunk_seed in zip(sizes, seeds)
+    ]
+
+    # Pool workers are daemonic in the tool sandbox and cannot start processes of their own.
+    use_pool = (
+        SIMULATION_WORKERS > 1
+        and len(arguments) > 1
+        and replications * cases >= _MIN_POOL_TRACES
+        and not multiprocessing.current_process().daemon
+    )
+    if use_pool:
+        pool = _get_pool()
+        chunks = list(pool.map(_simulate_chunk, *zip(*arguments)))
+    else:
+        chunks = [_simulate_chunk(*args) for args in arguments]
+    return np.concatenate([chunk.reshape(len(scenarios), -1, cases) for chunk in chunks], axis=1)
+
+
+def cached_simulation_model(key: str, load_frame: Callable[[], pd.DataFrame]) -> SimulationModel:
+    """Simulation model of a derived log (e.g. a time-window slice) identified by ``key``."""
+
+    with _models_lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            return model
+    model = SimulationModel.from_frame(load_frame())
+    with _models_lock:
+        _models[key] = model
+        while len(_models) > SIMULATION_MODEL_CACHE_SIZE:
+            _models.popitem(last=False)
+    return model
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+CASE_KEY = "case:concept:name"
+TIMESTAMP_KEY = "time:timestamp"
+
+_INT64_MIN = np.iinfo(np.int64).min
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def to_epoch_ns(value: Any) -> int:
+    """Convert a datetime-like bound to int64 nanoseconds since epoch (naive = UTC)."""
+
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return int(timestamp.tz_convert("UTC").value)
+
+
+def _epoch_ns_values(series: pd.Series) -> np.ndarray:
+    timestamps = pd.to_datetime(series, utc=True, errors="coerce")
+    naive = timestamps.dt.tz_localize(None).astype("datetime64[ns]")
+    return naive.to_numpy().view(np.int64)
+
+
+@dataclass(slots=True)
+class CaseTimeIndex:
+    """Per-case min/max timestamps of an event frame as int64 epoch arrays.
+
+    ``case_codes`` maps every event row to its position in ``case_ids``
+    (-1 for rows without a case id). Cases without any valid timestamp get
+    ``starts = INT64_MAX`` and ``ends = INT64_MIN`` so they never match.
+    """
+
+    case_ids: np.ndarray
+    case_codes: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        *,
+        case_key: str = CASE_KEY,
+        start_key: str = TIMESTAMP_KEY,
+        end_key: Optional[str] = None,
+    ) -> "CaseTimeIndex":
+        case_codes, case_ids = pd.factorize(frame[case_key], sort=False)
+        case_codes = np.asarray(case_codes, dtype=np.int64)
+
+        start_values = _epoch_ns_values(frame[start_key])
+        end_values = start_values if end_key is None else _epoch_ns_values(frame[end_key])
+
+        starts = np.full(len(case_ids), _INT64_MAX, dtype=np.int64)
+        ends = np.full(len(case_ids), _INT64_MIN, dtype=np.int64)
+
+        has_case = case_codes >= 0
+        valid_start = has_case & (start_values != _INT64_MIN)
+        valid_end = has_case & (end_values != _INT64_MIN)
+        np.minimum.at(starts, case_codes[valid_start], start_values[valid_start])
+        np.maximum.at(ends, case_codes[valid_end], end_values[valid_end])
+
+        return cls(
+            case_ids=np.asarray(case_ids),
+            case_codes=case_codes,
+            starts=starts,
+            ends=ends,
+        )
+
+    @property
+    def num_cases(self) -> int:
+        return int(self.case_ids.shape[0])
+
+    def case_mask(self, start: Any, end: Any) -> np.ndarray:
+        """Boolean mask over cases intersecting ``(start, end)``.
+
+        Mirrors pm4py's ``traces_intersecting`` mode: a case is kept if it
+        starts or ends strictly inside the window, or spans it entirely.
+        """
+
+        lower = to_epoch_ns(start)
+        upper = to_epoch_ns(end)
+        starts_inside = (self.starts > lower) & (self.starts < upper)
+        ends_inside = (self.ends > lower) & (self.ends < upper)
+        spans_window = (self.starts < lower) & (self.ends > upper)
+        return starts_inside | ends_inside | spans_window
+
+    def event_mask(self, start: Any, end: Any) -> np.ndarray:
+        """Boolean mask over event rows whose case intersects ``(start, end)``."""
+
+        # Trailing False so rows with case code -1 (no case id) are always dropped.
+        case_mask = np.append(self.case_mask(start, end), False)
+        return case_mask[self.case_codes]
+
+
+def filter_cases_intersecting(
+    frame: pd.DataFrame,
+    start: Any,
+    end: Any,
+    *,
+    index: Optional[CaseTimeIndex] = None,
+    case_key: str = CASE_KEY,
+    start_key: str = TIMESTAMP_KEY,
+    end_key: Optional[str] = None,
+) -> pd.DataFrame:
+    """Vectorized replacement for ``pm4py.filter_time_range(..., mode="traces_intersecting")``."""
+
+    if index is None:
+        index = CaseTimeIndex.from_frame(
+            frame, case_key=case_key, start_key=start_key, end_key=end_key
+        )
+    return frame[index.event_mask(start, end)]
+
+
+@dataclass(slots=True)
+class CaseWindowIndex:
+    """Cases sorted by start time plus a case -> event rows lookup, for repeated window queries.
+
+    A window ``(start, end)`` only has to look at the cases starting before
+    ``end`` (a prefix of ``order``) and only touches the rows of the cases
+    it keeps, instead of scanning every event.
+    """
+
+    cases: CaseTimeIndex
+    order: np.ndarray  # case positions sorted by start
+    sorted_starts: np.ndarray
+    row_order: np.ndarray  # event rows grouped by case position
+    row_offsets: np.ndarray  # rows of case i are row_order[row_offsets[i]:row_offsets[i + 1]]
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, **kwargs: Any) -> "CaseWindowIndex":
+        return cls.from_case_index(CaseTimeIndex.from_frame(frame, **kwargs))
+
+    @classmethod
+    def from_case_index(cls, cases: CaseTimeIndex) -> "CaseWindowIndex":
+        order = np.argsort(cases.starts, kind="stable")
+        has_case = cases.case_codes >= 0
+        rows = np.flatnonzero(has_case)
+        row_order = rows[np.argsort(cases.case_codes[rows], kind="stable")]
+        counts = np.bincount(cases.case_codes[rows], minlength=cases.num_cases)
+        row_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return cls(
+            cases=cases,
+            order=order,
+            sorted_starts=cases.starts[order],
+            row_order=row_order,
+            row_offsets=row_offsets,
+        )
+
+    def case_positions(self, start: Any, end: Any) -> np.ndarray:
+        """Positions of the cases intersecting ``(start, end)``, same rule as ``CaseTimeIndex.case_mask``."""
+
+        lower = to_epoch_ns(start)
+        upper = to_epoch_ns(end)
+        # Every intersecting case starts strictly before the upper bound.
+        candidates = self.order[: np.searchsorted(self.sorted_starts, upper, side="left")]
+        starts = self.cases.starts[candidates]
+        ends = self.cases.ends[candidates]
+        keep = (starts > lower) | ((ends > lower) & (ends < upper)) | ((starts < lower) & (ends > upper))
+        return candidates[keep]
+
+    def event_rows(self, start: Any, end: Any) -> np.ndarray:
+        """Sorted event row positions of the cases intersecting ``(start, end)``."""
+
+        positions = self.case_positions(start, end)
+        if positions.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        lengths = self.row_offsets[positions + 1] - self.row_offsets[positions]
+        firsts = self.row_offsets[positions]
+        # Concatenate the row ranges of the selected cases without a Python loop.
+        steps = np.ones(int(lengths.sum()), dtype=np.int64)
+        boundaries = np.cumsum(lengths)[:-1]
+        steps[0] = firsts[0]
+        steps[boundaries] = firsts[1:] - (firsts[:-1] + lengths[:-1] - 1)
+        return np.sort(self.row_order[np.cumsum(steps)])
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .time_index import CASE_KEY
+
+ACTIVITY_KEY = "concept:name"
+# Variant indexes of time-window slices kept in memory (full logs live with their parsed frame).
+VARIANT_INDEX_CACHE_SIZE = int(os.getenv("VARIANT_INDEX_CACHE_SIZE", "8"))
+
+# Activity codes are stored as private-use code points so a variant is a str:
+# prefix / contains queries are plain str operations and never match across activity boundaries.
+_CODE_OFFSET = 0xE000
+
+_indexes: "OrderedDict[str, VariantIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class VariantIndex:
+    """Variants of an event log, built once and queried without rescanning the log.
+
+    Variant ids are ranks: ``0`` is the most frequent variant. Cases of a
+    variant are the postings ``postings[offsets[v]:offsets[v + 1]]`` (case
+    positions into ``case_ids``). The prefix trie stores, per node, the
+    children by activity code, the number of cases having that prefix, the
+    variant ending there (-1 if none) and the range of variants below it in
+    lexicographic order (``sorted_variants[lo:hi]``).
+    """
+
+    activities: List[str]
+    variants: List[str]
+    counts: np.ndarray
+    case_ids: np.ndarray
+    case_variants: np.ndarray
+    postings: np.ndarray
+    offsets: np.ndarray
+    sorted_variants: np.ndarray
+    children: List[Dict[int, int]]
+    prefix_counts: np.ndarray
+    terminal: np.ndarray
+    ranges: np.ndarray
+    _activity_codes: Dict[str, int] = field(default_factory=dict)
+    _case_positions: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "VariantIndex":
+        """Variants in event order within each case, as pm4py reports them."""
+
+        case_codes, case_ids = pd.factorize(frame[CASE_KEY], sort=False)
+        activity_codes, activities = pd.factorize(frame[ACTIVITY_KEY].astype(str), sort=False)
+        keep = (case_codes >= 0) & (activity_codes >= 0)
+        case_codes = np.asarray(case_codes[keep], dtype=np.int64)
+        activity_codes = np.asarray(activity_codes[keep], dtype=np.int64)
+        if case_codes.size and np.any(case_codes[1:] < case_codes[:-1]):
+            order = np.argsort(case_codes, kind="stable")
+            case_codes = case_codes[order]
+            activity_codes = activity_codes[order]
+
+        # One str holding every event; each case's variant is a slice of it.
+        events = (activity_codes + _CODE_OFFSET).astype("<u4").tobytes().decode("utf-32-le")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(case_codes, minlength=len(case_ids))))).tolist()
+        case_strings = [events[bounds[i]:bounds[i + 1]] for i in range(len(case_ids))]
+
+        first_seen, variants = pd.factorize(pd.Series(case_strings, dtype=object), sort=False)
+        counts = np.bincount(first_seen, minlength=len(variants))
+        # Renumber variants by descending frequency (ties keep first appearance).
+        rank_order = np.argsort(-counts, kind="stable")
+        ranks = np.empty_like(rank_order)
+        ranks[rank_order] = np.arange(len(rank_order))
+        case_variants = ranks[first_seen]
+        variants = [variants[i] for i in rank_order]
+        counts = counts[rank_order]
+
+        postings = np.argsort(case_variants, kind="stable")
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        index = cls(
+            activities=[str(activity) for activity in activities],
+            variants=variants,
+            counts=counts,
+            case_ids=np.asarray(case_ids),
+            case_variants=case_variants,
+            postings=postings,
+            offsets=offsets,
+            sorted_variants=np.array(sorted(range(len(variants)), key=variants.__getitem__), dtype=np.int64),
+            children=[],
+            prefix_counts=np.zeros(0, dtype=np.int64),
+            terminal=np.zeros(0, dtype=np.int64),
+            ranges=np.zeros((0, 2), dtype=np.int64),
+        )
+        index._build_trie()
+        index._activity_codes = {activity: code for code, activity in enumerate(index.activities)}
+        index._case_positions = {str(case_id): position for position, case_id in enumerate(index.case_ids)}
+        return index
+
+    def _build_trie(self) -> None:
+        children: List[Dict[int, int]] = [{}]
+        parents = [-1]
+        depths = [0]
+        terminal = [-1]
+        starts = [0]
+        path = [0]
+        previous = ""
+        # Inserting in lexicographic order makes every node's variants a contiguous range,
+        # and each variant only walks past its common prefix with the previous one.
+        for position, variant_id in enumerate(self.sorted_variants.tolist()):
+            variant = self.variants[variant_id]
+            shared = _common_prefix_length(previous, variant)
+            del path[shared + 1:]
+            node = path[-1]
+            for char in variant[shared:]:
+                child = len(children)
+                children[node][ord(char) - _CODE_OFFSET] = child
+                children.append({})
+                parents.append(node)
+                depths.append(depths[node] + 1)
+                terminal.append(-1)
+                starts.append(position)
+                path.append(child)
+                node = child
+            terminal[node] = variant_id
+            previous = variant
+
+        terminal = np.asarray(terminal, dtype=np.int64)
+        parents = np.asarray(parents, dtype=np.int64)
+        depths = np.asarray(depths, dtype=np.int64)
+        is_terminal = terminal >= 0
+        prefix_counts = np.zeros(len(children), dtype=np.int64)
+        prefix_counts[is_terminal] = self.counts[terminal[is_terminal]]
+        ends = np.asarray(starts, dtype=np.int64) + 1
+        # Fold counts and range ends into the parents, deepest level first.
+        by_depth = np.argsort(-depths, kind="stable")
+        level_bounds = np.flatnonzero(np.diff(depths[by_depth])) + 1
+        for level in np.split(by_depth, level_bounds):
+            level = level[parents[level] >= 0]
+            np.add.at(prefix_counts, parents[level], prefix_counts[level])
+            np.maximum.at(ends, parents[level], ends[level])
+
+        self.children = children
+        self.prefix_counts = prefix_counts
+        self.terminal = terminal
+        self.ranges = np.stack([np.asarray(starts, dtype=np.int64), ends], axis=1)
+
+    @property
+    def num_cases(self) -> int:
+        return int(self.case_ids.shape[0])
+
+    @property
+    def num_variants(self) -> int:
+        return len(self.variants)
+
+    def encode(self, activities: Sequence[str]) -> Optional[List[int]]:
+        """Activity codes, or None when an activity does not occur in the log."""
+
+        codes = [self._activity_codes.get(str(activity)) for activity in activities]
+        return None if any(code is None for code in codes) else codes
+
+    def decode(self, variant_id: int) -> List[str]:
+        return [self.activities[ord(char) - _CODE_OFFSET] for char in self.variants[variant_id]]
+
+    def _node(self, codes: Sequence[int]) -> Optional[int]:
+        node = 0
+        for code in codes:
+            node = self.children[node].get(code)
+            if node is None:
+                return None
+        return node
+
+    def with_prefix(self, codes: Sequence[int]) -> np.ndarray:
+        """Ids (i.e. ranks, most frequent first) of the variants starting with ``codes``."""
+
+        node = self._node(codes)
+        if node is None:
+            return np.zeros(0, dtype=np.int64)
+        lo, hi = self.ranges[node]
+        return np.sort(self.sorted_variants[lo:hi])
+
+    def prefix_cases(self, codes: Sequence[int]) -> int:
+        node = self._node(codes)
+        return 0 if node is None else int(self.prefix_counts[node])
+
+    def containing(self, codes: Sequence[int]) -> np.ndarray:
+        """Ids of the variants where ``codes`` occur consecutively."""
+
+        needle = "".join(chr(code + _CODE_OFFSET) for code in codes)
+        return np.asarray([i for i, variant in enumerate(self.variants) if needle in variant], dtype=np.int64)
+
+    def variant_of(self, codes: Sequence[int]) -> Optional[int]:
+        node = self._node(codes)
+        if node is None or self.terminal[node] < 0:
+            return None
+        return int(self.terminal[node])
+
+    def variant_of_case(self, case_id: Any) -> Optional[int]:
+        position = self._case_positions.get(str(case_id))
+        return None if position is None else int(self.case_variants[position])
+
+    def cases_of(self, variant_id: int, offset: int = 0, limit: Optional[int] = None) -> List[Any]:
+        lo, hi = int(self.offsets[variant_id]), int(self.offsets[variant_id + 1])
+        lo = min(hi, lo + max(0, offset))
+        if limit is not None:
+            hi = min(hi, lo + max(0, limit))
+        return self.case_ids[self.postings[lo:hi]].tolist()
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    # Binary search on slice equality: O(log n) comparisons done in C.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def cached_variant_index(key: str, load_frame: Callable[[], pd.DataFrame]) -> VariantIndex:
+    """Variant index of a derived log (e.g. a time-window slice) identified by ``key``."""
+
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = VariantIndex.from_frame(load_frame())
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > VARIANT_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
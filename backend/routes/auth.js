@@ -311,12 +311,15 @@ const SUPPORTED_DATA_TYPES = new Set([
   "description",
   "bpmn",
   "report",
+  "analytics",
+  "sketches",
   "log_raw",
   "log_cleaned",
   "chart_dotted",
   "chart_throughput_time_density",
   "chart_unwanted_activity_stats",
   "store",
+  "models",
 ]);
 
 const ensureArray = (value) => (Array.isArray(value) ? value : []);
@@ -446,6 +449,8 @@ router.post('/data-folders', protect, async (req, res) => {
         name: name || path.basename(localPath),
         type,
         url: publicUrl,
+        ...(Number.isFinite(file.size) ? { size: file.size } : {}),
+        ...(typeof file.sha256 === 'string' ? { sha256: file.sha256 } : {}),
       });
     }
 
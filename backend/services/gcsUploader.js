@@ -39,12 +39,15 @@ const DATA_TYPE_RELATIVE_PATHS = {
   description: "description",
   bpmn: "bpmn",
   report: "report",
+  analytics: "analytics",
+  sketches: "sketches",
   log_raw: "log/raw",
   log_cleaned: "log/cleaned",
   chart_dotted: "charts/dotted_chart",
   chart_throughput_time_density: "charts/throughput_time_density",
   chart_unwanted_activity_stats: "charts/unwanted_activity_stats",
   store: "store",
+  models: "models",
 };
 
 const sanitizeSegment = (value, fallback) => {
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Tests import the backend packages (chatbot, process) the way main.py does.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Directly-follows successors of the synthetic process; "X" is a rare detour.
+_SUCCESSORS = {
+    "Register": ["Check", "Check", "Check", "Approve"],
+    "Check": ["Approve", "Approve", "Reject", "X"],
+    "X": ["Check", "Approve"],
+    "Approve": ["Pay", "Pay", "Archive"],
+    "Reject": ["Archive"],
+    "Pay": ["Archive"],
+}
+
+
+@pytest.fixture(scope="session")
+def event_log() -> pd.DataFrame:
+    """A small event log: 120 cases over the first half of 2020, events grouped by case."""
+
+    rng = np.random.default_rng(7)
+    rows = []
+    for case in range(120):
+        timestamp = pd.Timestamp("2020-01-01", tz="UTC") + pd.Timedelta(minutes=int(rng.integers(0, 180 * 24 * 60)))
+        activity = "Register"
+        while True:
+            rows.append({"case:concept:name": f"c{case}", "concept:name": activity, "time:timestamp": timestamp})
+            if activity == "Archive":
+                break
+            activity = str(rng.choice(_SUCCESSORS[activity]))
+            timestamp = timestamp + pd.Timedelta(minutes=int(rng.integers(1, 5 * 24 * 60)))
+    return pd.DataFrame(rows)
@@ -0,0 +1,142 @@
+"""Conditional-request revalidation of cached artefacts against a local HTTP stand-in."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+
+from chatbot import dataset_loader
+from chatbot.dataset_loader import DatasetFile, _download_file_sync, _meta_path
+
+
+class ArtefactServer:
+    """Serves one mutable body with an ETag and answers If-None-Match with 304."""
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                if self.headers.get("If-None-Match") == server.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", server.etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", server.etag)
+                self.send_header("Content-Length", str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/report/report.json"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def publish(self, body: bytes, etag: str) -> None:
+        self.body, self.etag = body, etag
+
+
+@pytest.fixture
+def server():
+    stand_in = ArtefactServer(b'{"version": 1}', '"v1"')
+    stand_in.thread.start()
+    yield stand_in
+    stand_in.httpd.shutdown()
+    stand_in.httpd.server_close()
+
+
+def _file(url: str, body: Optional[bytes] = None) -> DatasetFile:
+    sha256 = hashlib.sha256(body).hexdigest() if body is not None else None
+    return DatasetFile(type="report", name="report.json", url=url, sha256=sha256)
+
+
+def test_first_download_writes_the_sidecar(server, tmp_path):
+    target = tmp_path / "report.json"
+
+    assert _download_file_sync(server.url, target, file_info=_file(server.url)) is True
+
+    assert target.read_bytes() == server.body
+    meta = json.loads(_meta_path(target).read_text(encoding="utf-8"))
+    assert meta["url"] == server.url
+    assert meta["etag"] == '"v1"'
+    assert meta["size"] == len(server.body)
+    assert meta["sha256"] == hashlib.sha256(server.body).hexdigest()
+    assert "If-None-Match" not in server.requests[0]
+    assert not (tmp_path / "report.json.part").exists()
+
+
+def test_not_modified_reuses_the_cached_file(server, tmp_path):
+    target = tmp_path / "report.json"
+    _download_file_sync(server.url, target, file_info=_file(server.url))
+    mtime = target.stat().st_mtime_ns
+
+    assert _download_file_sync(server.url, target, file_info=_file(server.url)) is False
+
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert target.read_bytes() == server.body
+    assert target.stat().st_mtime_ns == mtime
+
+
+def test_matching_digest_skips_the_request(server, tmp_path):
+    target = tmp_path / "report.json"
+    _download_file_sync(server.url, target, file_info=_file(server.url))
+    requests_before = len(server.requests)
+
+    assert _download_file_sync(server.url, target, file_info=_file(server.url, server.body)) is False
+
+    assert len(server.requests) == requests_before
+
+
+def test_changed_remote_file_is_fetched_again(server, tmp_path):
+    target = tmp_path / "report.json"
+    _download_file_sync(server.url, target, file_info=_file(server.url))
+    server.publish(b'{"version": 2, "sections": []}', '"v2"')
+
+    assert _download_file_sync(server.url, target, file_info=_file(server.url)) is True
+
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert target.read_bytes() == server.body
+    meta = json.loads(_meta_path(target).read_text(encoding="utf-8"))
+    assert meta["etag"] == '"v2"'
+    assert meta["sha256"] == hashlib.sha256(server.body).hexdigest()
+
+
+def test_concurrent_loads_share_one_lock_that_is_dropped_afterwards(monkeypatch):
+    loads = []
+
+    async def fake_load(dataset_id, dataset_payload, folder, files, *, user_id):
+        loads.append(dataset_id)
+        await asyncio.sleep(0.01)
+        if dataset_id == "broken":
+            raise RuntimeError("artefacts unavailable")
+        return SimpleNamespace(approx_bytes=1)
+
+    monkeypatch.setattr(dataset_loader, "_load_dataset_artefacts", fake_load)
+    payload = {"files": [{"type": "report", "name": "report.json", "url": "gs://bucket/report.json"}]}
+
+    async def load(dataset_id):
+        return await dataset_loader.load_dataset_artefacts(dataset_id, payload, user_id="lock-test")
+
+    async def main():
+        return await asyncio.gather(load("a"), load("a"), load("a"), load("broken"), return_exceptions=True)
+
+    first, second, third, broken = asyncio.run(main())
+
+    assert first is second is third
+    assert isinstance(broken, RuntimeError)
+    assert sorted(loads) == ["a", "broken"]
+    assert not [key for key in dataset_loader._load_locks if key[0] == "lock-test"]
@@ -0,0 +1,76 @@
+"""Vectorised footprint conformance against pm4py's trace-by-trace footprints conformance."""
+
+from __future__ import annotations
+
+from collections import Counter
+
+import pytest
+
+pm4py = pytest.importorskip("pm4py")
+
+from pm4py.algo.conformance.footprints import algorithm as footprints_conformance  # noqa: E402
+from pm4py.algo.discovery.footprints import algorithm as footprints_discovery  # noqa: E402
+
+from process.footprint_conformance import END, START, ModelRelations, check_footprints  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def tree(event_log):
+    # Mined on the frequent variants only, so the rare detours deviate.
+    return pm4py.discover_process_tree_inductive(pm4py.filter_variants_top_k(event_log, 3))
+
+
+def _reference(event_log, tree):
+    model = footprints_discovery.apply(tree)
+    traces = footprints_discovery.apply(
+        pm4py.convert_to_event_log(event_log), variant=footprints_discovery.Variants.TRACE_BY_TRACE
+    )
+    violations = footprints_conformance.apply(
+        traces,
+        model,
+        variant=footprints_conformance.Variants.TRACE_EXTENSIVE,
+        parameters={"enable_act_always_executed": False},
+    )
+    edge_cases = Counter()
+    unfit = 0
+    for violation in violations:
+        edges = set(violation["footprints"])
+        edges |= {(START, activity) for activity in violation["start_activities"]}
+        edges |= {(activity, END) for activity in violation["end_activities"]}
+        edge_cases.update(edges)
+        unfit += bool(edges)
+    return unfit, dict(edge_cases)
+
+
+def _unordered(checked):
+    # Row order follows first appearance in the frame.
+    return {
+        **checked,
+        "deviating_edges": sorted(checked["deviating_edges"], key=lambda row: row["edge"]),
+        "unknown_activities": sorted(checked["unknown_activities"]),
+    }
+
+
+def test_unfit_cases_and_deviating_edges_match_pm4py(event_log, tree):
+    checked = check_footprints(event_log, ModelRelations.from_tree(tree))
+    unfit, edge_cases = _reference(event_log, tree)
+
+    assert checked["num_cases"] == event_log["case:concept:name"].nunique()
+    assert checked["num_unfit_cases"] == unfit > 0
+    assert {row["edge"]: row["cases"] for row in checked["deviating_edges"]} == edge_cases
+
+
+def test_events_are_ordered_by_timestamp_within_cases(event_log, tree):
+    relations = ModelRelations.from_tree(tree)
+    shuffled = event_log.sample(frac=1.0, random_state=3)
+
+    assert _unordered(check_footprints(shuffled, relations)) == _unordered(check_footprints(event_log, relations))
+
+
+def test_events_without_an_activity_are_ignored(event_log, tree):
+    relations = ModelRelations.from_tree(tree)
+    with_gap = event_log.copy()
+    with_gap.loc[with_gap.index[-1], "concept:name"] = None
+    trimmed = event_log.iloc[:-1]
+
+    assert _unordered(check_footprints(with_gap, relations)) == _unordered(check_footprints(trimmed, relations))
@@ -0,0 +1,61 @@
+"""Quantile sketches against exact quantiles of the same values."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from process.quantile_sketch import LogSketches, QuantileSketch
+
+QUANTILES = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99)
+
+
+def _assert_within_alpha(sketch: QuantileSketch, values: np.ndarray) -> None:
+    for q in QUANTILES:
+        exact = np.quantile(values, q, method="lower")
+        assert sketch.quantile(q) == pytest.approx(exact, rel=sketch.alpha, abs=1e-9), q
+
+
+@pytest.mark.parametrize("alpha", [0.01, 0.05])
+def test_quantiles_within_alpha(alpha):
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.lognormal(8.0, 2.0, 5000), np.zeros(50)])
+
+    _assert_within_alpha(QuantileSketch.from_values(values, alpha), values)
+
+
+def test_merged_sketches_answer_like_one_sketch():
+    rng = np.random.default_rng(2)
+    parts = [rng.exponential(3600.0, size) for size in (10, 400, 2500)]
+    merged = QuantileSketch.from_values(parts[0])
+    for part in parts[1:]:
+        merged = merged.merge(QuantileSketch.from_values(part))
+
+    whole = QuantileSketch.from_values(np.concatenate(parts))
+    assert [merged.quantile(q) for q in QUANTILES] == [whole.quantile(q) for q in QUANTILES]
+    assert merged.count == whole.count
+    assert merged.mean == pytest.approx(whole.mean)
+
+
+def test_log_sketches_match_pandas(event_log):
+    sketches = LogSketches.from_frame(event_log)
+
+    ordered = event_log.sort_values(["case:concept:name", "time:timestamp"])
+    seconds = (ordered["time:timestamp"] - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+    cases = ordered["case:concept:name"]
+    durations = seconds.groupby(cases).max() - seconds.groupby(cases).min()
+    _assert_within_alpha(sketches.case_durations, durations.to_numpy())
+
+    same_case = cases.to_numpy()[1:] == cases.to_numpy()[:-1]
+    activities = ordered["concept:name"].to_numpy()
+    waits = np.diff(seconds.to_numpy())[same_case]
+    sources, targets = activities[:-1][same_case], activities[1:][same_case]
+    pairs = set(zip(sources, targets))
+    assert set(sketches.pairs) == pairs
+    for pair in pairs:
+        _assert_within_alpha(sketches.pairs[pair], waits[(sources == pair[0]) & (targets == pair[1])])
+
+    matched, merged = sketches.waiting_times(source="Check")
+    assert sorted(matched) == sorted(pair for pair in pairs if pair[0] == "Check")
+    _assert_within_alpha(merged, waits[sources == "Check"])
@@ -0,0 +1,40 @@
+"""Case-window index against pm4py's ``traces_intersecting`` time filter."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+pm4py = pytest.importorskip("pm4py")
+
+from process.time_index import CaseWindowIndex, filter_cases_intersecting  # noqa: E402
+
+
+def _windows(event_log):
+    first_start = event_log.groupby("case:concept:name")["time:timestamp"].min().sort_values().iloc[10]
+    return [
+        ("2020-03-01 00:00:00", "2020-03-31 23:59:59"),
+        ("2020-01-01 00:00:00", "2020-12-31 00:00:00"),
+        ("2020-02-10 12:00:00", "2020-02-11 12:00:00"),
+        ("2019-01-01 00:00:00", "2019-02-01 00:00:00"),
+        # A bound equal to a case start: the comparison is strict on both sides.
+        (first_start.strftime("%Y-%m-%d %H:%M:%S"), "2020-04-15 00:00:00"),
+    ]
+
+
+def test_event_rows_match_pm4py_traces_intersecting(event_log):
+    frame = event_log.assign(row=np.arange(len(event_log)))
+    index = CaseWindowIndex.from_frame(frame)
+
+    for start, end in _windows(event_log):
+        expected = pm4py.filter_time_range(frame, start, end, mode="traces_intersecting")
+        rows = index.event_rows(start, end)
+        assert rows.tolist() == sorted(expected["row"].tolist()), (start, end)
+
+
+def test_filter_cases_intersecting_matches_pm4py(event_log):
+    for start, end in _windows(event_log):
+        expected = pm4py.filter_time_range(event_log, start, end, mode="traces_intersecting")
+        filtered = filter_cases_intersecting(event_log, start, end)
+        assert set(filtered["case:concept:name"]) == set(expected["case:concept:name"]), (start, end)
+        assert len(filtered) == len(expected)
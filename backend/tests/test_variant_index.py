@@ -0,0 +1,44 @@
+"""Variant index against pm4py's variants of the same log."""
+
+from __future__ import annotations
+
+import pytest
+
+pm4py = pytest.importorskip("pm4py")
+
+from process.variant_index import VariantIndex  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def variants(event_log):
+    return {tuple(variant): int(count) for variant, count in pm4py.get_variants(event_log).items()}
+
+
+@pytest.fixture(scope="module")
+def index(event_log):
+    return VariantIndex.from_frame(event_log)
+
+
+def test_variant_counts_match_pm4py(index, variants):
+    assert index.num_cases == sum(variants.values())
+    assert {tuple(index.decode(v)): int(index.counts[v]) for v in range(index.num_variants)} == variants
+    # Ids are ranks: most frequent first.
+    assert list(index.counts) == sorted(index.counts, reverse=True)
+
+
+def test_prefix_queries_match_pm4py(index, variants):
+    prefixes = {variant[:length] for variant in variants for length in range(1, len(variant) + 1)}
+    for prefix in prefixes:
+        matching = {variant for variant in variants if variant[:len(prefix)] == prefix}
+        codes = index.encode(prefix)
+        assert {tuple(index.decode(v)) for v in index.with_prefix(codes)} == matching, prefix
+        assert index.prefix_cases(codes) == sum(variants[variant] for variant in matching), prefix
+
+
+def test_variant_of_case_and_cases_of_variant(event_log, index, variants):
+    traces = event_log.groupby("case:concept:name", sort=False)["concept:name"].agg(tuple)
+    for case_id, trace in traces.items():
+        variant_id = index.variant_of_case(case_id)
+        assert tuple(index.decode(variant_id)) == trace
+        assert case_id in index.cases_of(variant_id)
+    assert index.encode(["Register", "Unknown"]) is None
@@ -472,7 +472,7 @@ ws.onclose = () => {
                 </CButton>
                 <input
                   type="file"
-                  accept=".xes, .xes.gz"
+                  accept=".xes, .xes.gz, .csv, .csv.gz, .parquet"
                   ref={fileInputRef}
                   style={{ display: "none" }}
                   onChange={handleFileChange}
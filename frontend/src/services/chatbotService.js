@@ -30,7 +30,7 @@ const resolveAuthToken = () => {
   }
 }
 
-export const askChatbot = async ({ question, datasetId, sessionId, summary }) => {
+const buildChatbotRequest = ({ question, datasetId, sessionId, summary }) => {
   const trimmedQuestion = typeof question === 'string' ? question.trim() : ''
   if (!trimmedQuestion.length) {
     throw new Error('Question must not be empty.')
@@ -65,6 +65,11 @@ export const askChatbot = async ({ question, datasetId, sessionId, summary }) =>
     }
   }
 
+  return { payload, authToken }
+}
+
+export const askChatbot = async (params) => {
+  const { payload, authToken } = buildChatbotRequest(params)
   const response = await chatbotClient.post('/api/chatbot/query', payload, {
     headers: {
       Authorization: `Bearer ${authToken}`,
@@ -73,6 +78,87 @@ export const askChatbot = async ({ question, datasetId, sessionId, summary }) =>
   return response.data
 }
 
+const parseSseBlock = (block) => {
+  let event = 'message'
+  const dataLines = []
+  block.split('\n').forEach((line) => {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim()
+    } else if (line.startsWith('data:')) {
+      dataLines.push(line.slice(5).trim())
+    }
+  })
+  if (!dataLines.length) {
+    return null
+  }
+  try {
+    return { event, data: JSON.parse(dataLines.join('\n')) }
+  } catch (error) {
+    return null
+  }
+}
+
+// Streaming variant of askChatbot: calls onEvent(event, data) for every server-sent event
+// (session, tool_call, tool_result, delta, message) and resolves with the `done` payload.
+export const streamChatbot = async ({ onEvent, ...params }) => {
+  const { payload, authToken } = buildChatbotRequest(params)
+  const response = await fetch(`${resolveChatbotBaseUrl()}/api/chatbot/query/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+      Authorization: `Bearer ${authToken}`,
+    },
+    body: JSON.stringify(payload),
+  })
+
+  if (!response.ok || !response.body) {
+    let detail = ''
+    try {
+      const data = await response.json()
+      detail = typeof data?.detail === 'string' ? data.detail : ''
+    } catch (error) {
+      detail = ''
+    }
+    throw new Error(detail || `Chatbot request failed (${response.status})`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  let result = null
+
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) {
+      break
+    }
+    buffer += decoder.decode(value, { stream: true })
+    let boundary = buffer.indexOf('\n\n')
+    while (boundary !== -1) {
+      const parsed = parseSseBlock(buffer.slice(0, boundary))
+      buffer = buffer.slice(boundary + 2)
+      boundary = buffer.indexOf('\n\n')
+      if (!parsed) {
+        continue
+      }
+      if (parsed.event === 'error') {
+        throw new Error(parsed.data?.detail || 'Chatbot agent error')
+      }
+      if (parsed.event === 'done') {
+        result = parsed.data
+      } else if (typeof onEvent === 'function') {
+        onEvent(parsed.event, parsed.data)
+      }
+    }
+  }
+
+  if (!result) {
+    throw new Error('Chatbot stream ended unexpectedly.')
+  }
+  return result
+}
+
 export const extractChatbotError = (error, fallback = 'Không thể kết nối chatbot') => {
   if (axios.isAxiosError?.(error)) {
     const data = error.response?.data
@@ -2,7 +2,7 @@ import React, { useEffect, useMemo, useRef, useState } from 'react'
 import { CAlert, CButton, CForm, CFormInput } from '@coreui/react'
 
 import { useDb } from '../../../context/DbContext'
-import { askChatbot, extractChatbotError } from '../../../services/chatbotService'
+import { extractChatbotError, streamChatbot } from '../../../services/chatbotService'
 
 const createTimestamp = () => new Date().toISOString()
 
@@ -102,6 +102,15 @@ const Chatbot = () => {
     )
   }
 
+  const updateMessage = (chatId, liveId, producer) => {
+    updateConversation(chatId, (conversation) => ({
+      ...conversation,
+      messages: (conversation.messages || []).map((message) =>
+        message.liveId === liveId ? producer(message) : message,
+      ),
+    }))
+  }
+
   const handleSelectConversation = (conversationId) => {
     setCurrentChatId(conversationId)
     setError(null)
@@ -162,12 +171,30 @@ const Chatbot = () => {
     setIsSending(true)
     setError(null)
 
+    // Placeholder bot message filled in while the answer streams.
+    const liveId = `live-${Date.now()}`
+    pushMessage(chatId, { role: 'bot', text: '...', liveId, timestamp: createTimestamp() }, conversationRecord)
+
     try {
-      const response = await askChatbot({
+      let streamedText = ''
+      const response = await streamChatbot({
         question: trimmed,
         datasetId: conversationRecord.datasetId || activeDatasetId,
         sessionId: conversationRecord.sessionId,
         summary: conversationRecord.summary || conversationRecord.name,
+        onEvent: (event, data) => {
+          if (event === 'delta') {
+            streamedText += data?.text || ''
+          } else if (event === 'message') {
+            streamedText = data?.text || streamedText
+          } else if (event === 'tool_call' && !streamedText) {
+            updateMessage(chatId, liveId, (message) => ({ ...message, text: `Dang xu ly (${data?.name})...` }))
+            return
+          } else {
+            return
+          }
+          updateMessage(chatId, liveId, (message) => ({ ...message, text: streamedText }))
+        },
       })
       const nextSummary = sanitizeSummary(
         response?.session?.summary,
@@ -186,14 +213,18 @@ const Chatbot = () => {
         summary: nextSummary,
       }))
 
-      pushMessage(chatId, {
+      updateMessage(chatId, liveId, () => ({
         role: 'bot',
         text: deriveAnswerText(response),
         raw: response,
         timestamp: createTimestamp(),
-      })
+      }))
     } catch (err) {
       const message = extractChatbotError(err)
+      updateConversation(chatId, (conversation) => ({
+        ...conversation,
+        messages: (conversation.messages || []).filter((item) => item.liveId !== liveId),
+      }))
       pushMessage(chatId, { role: 'error', text: message, timestamp: createTimestamp() })
       setError(message)
     } finally {